@@ -18,10 +18,74 @@ please consult our Course Syllabus.
 This file is Copyright (c) 2024 CSC111 Teaching Team
 """
 
+from __future__ import annotations
+import sys
+
 # Note: You may add in other import statements here as needed
-from game_data import World, Item, Location, Player, MissionLocation
+from game_data import History, World, Item, Location, Player, MissionLocation
+
+# The typing module is only needed by type checkers, and importing it would slow down starting the game
+_TYPE_CHECKING = False
+if _TYPE_CHECKING:
+    from typing import Callable, Optional, TextIO
 
 # Note: You may add helper functions, classes, etc. here as needed
+MENU = ['go', 'goto', 'look', 'inventory', 'score', 'hint', 'undo', 'save', 'load', 'quit']
+MAX_MOVES = 60
+START_X, START_Y = 2, 4
+# The (dx, dy) of a move in each direction, and the direction of each (dx, dy)
+DIRECTIONS = {'north': (0, -1), 'south': (0, 1), 'east': (1, 0), 'west': (-1, 0)}
+_DIRECTION_NAMES = {step: direction for direction, step in DIRECTIONS.items()}
+
+
+class Command:
+    """A line of player input, parsed into a verb and the argument of that verb.
+
+    Instance Attributes:
+        - verb:
+            The first word of the input in lower case, or '' if the input has no words.
+        - arg:
+            The rest of the words of the input in lower case, separated by single spaces.
+    """
+    verb: str
+    arg: str
+
+    def __init__(self, verb: str, arg: str) -> None:
+        """Initialize a new command."""
+        self.verb = verb
+        self.arg = arg
+
+    def __repr__(self) -> str:
+        return f'Command({self.verb!r}, {self.arg!r})'
+
+
+def parse_command(player_choice: str) -> Command:
+    """Return the command in the given line of player input."""
+    words = player_choice.lower().split()
+    if not words:
+        return Command('', '')
+    return Command(words[0], ' '.join(words[1:]))
+
+
+# The function that handles the commands with each verb, called with the world, the player, the player's location,
+# the command and the menu actions. Verbs that are not in COMMANDS are actions of interactables, if anything.
+COMMANDS: dict[str, Callable[[World, Player, Location, Command, list[str]], None]] = {}
+
+
+def register_command(verb: str) -> Callable:
+    """Return a decorator that makes the function it decorates handle the commands with the given verb,
+    in place of the handler registered for verb before, if any.
+
+    Content packs add or replace commands this way, without changing do_action:
+
+        @register_command('dance')
+        def dance(world: World, player: Player, location: Location, command: Command, menu: list[str]) -> None:
+            player.output.emit('action', f'You dance {command.arg}.')
+    """
+    def register(handler: Callable[[World, Player, Location, Command, list[str]], None]) -> Callable:
+        COMMANDS[verb] = handler
+        return handler
+    return register
 
 
 def do_action(world: World,
@@ -34,177 +98,390 @@ def do_action(world: World,
     If action is not a move function, then it prompts player for another action, and recursively calls this function.
     Returns 1 if player quits.
     """
+    dispatch(world, player, player_location, parse_command(player_choice), menu_actions)
 
-    try:
-        action_input = player_choice.lower().split()[0]
-    except IndexError:
-        action_input = ''
-    arg = ' '.join(player_choice.lower().split()[1:])
-
-    if action_input == 'go':
-        if arg == 'north':
-            world.move_player(player.x, player.y - 1, player)
-            # return
-        elif arg == 'south':
-            world.move_player(player.x, player.y + 1, player)
-            # return
-        elif arg == 'east':
-            world.move_player(player.x + 1, player.y, player)
-            # return
-        elif arg == 'west':
-            world.move_player(player.x - 1, player.y, player)
-            # return
-        else:
-            print('\nInvalid direction. Please go north, east, south, or west.')
-    elif action_input == 'pick':
-        world.pick(player, player_location, arg)
-    elif action_input == 'drop':
-        world.drop(player, player_location, arg)
-    elif action_input == 'look':
-        player_location.get_long()
-    elif action_input == 'quit':
-        # return
-        pass
-    elif action_input == 'score':
-        print(f'Score: {player.score}')
-    elif action_input == 'inventory':
-        inv = []
-        for item in player.inventory:
-            inv.append(item.name)
-        if not inv:
-            print('Inventory is empty.')
-        else:
-            print(', '.join(inv))
-    elif action_input == 'open':
-        if 'open' not in player_location.available_actions:
-            print('Nothing can be opened in this location.')
-        elif arg in player_location.available_actions['open']:
-            world.open(player, player_location, arg)
+
+def dispatch(world: World, player: Player, player_location: Location, command: Command,
+             menu_actions: list[str]) -> None:
+    """Handle the given command of the player at player_location, with the handler registered for its verb.
+    Otherwise, if the verb is an action of an interactable in the player's inventory or location, do that action.
+    """
+    handler = COMMANDS.get(command.verb)
+    if handler is not None:
+        handler(world, player, player_location, command, menu_actions)
+    elif command.verb in player_location.available_actions or command.verb in player.inventory.actions:
+        do_interactable_action(world, player, player_location, command)
+    else:
+        player.output.emit('error', 'Invalid action.')
+
+
+def do_interactable_action(world: World, player: Player, player_location: Location, command: Command) -> None:
+    """Do the action command.verb on the interactable named command.arg, looking in the player's inventory
+    before their location.
+    """
+    obj = player.inventory.first(command.arg)
+    if obj is None:
+        obj = player_location.interactables.first(command.arg)
+    if obj:
+        if command.verb not in obj.actions:
+            player.output.emit('error', 'You cannot do that action on this object.')
+        elif isinstance(obj, Item):
+            obj.do_action(player, command.verb)
         else:
-            print(f'You cannot open a {arg}.')
-
-    elif action_input == 'menu':
-        print("Menu Options: \n")
-        for option in menu_actions:
-            print(option)
-        print(f'\nActions available at LOCATION {player_location.num}: \n')
-        for action in player_location.available_actions:
-            print(f'{action} [argument]')
-            # Print all Item or Furniture objects that an action can be performed on.
-            print('\t' + ', '.join(player_location.available_actions[action]) + '\n')
-    elif (any(action_input == a for a in player_location.available_actions)
-          or any(action_input == a for i in p.inventory for a in i.actions)):
-        obj = None
-        # Check if item is in inventory
-        if arg in {i.name for i in player.inventory}:
-            for item in player.inventory:
-                if item.name == arg:
-                    obj = item
-                    break
-        # Check if interactable is in location
+            obj.do_action(world, player, player_location, command.verb)
+    else:
+        player.output.emit('error', f'{command.arg} does not exist in your inventory or at this location.')
+
+
+@register_command('go')
+def go_command(world: World, player: Player, player_location: Location, command: Command,
+               menu_actions: list[str]) -> None:
+    """Move the player in the direction command.arg."""
+    if command.arg in DIRECTIONS:
+        dx, dy = DIRECTIONS[command.arg]
+        world.move_player(player.x + dx, player.y + dy, player)
+    else:
+        player.output.emit('error', '\nInvalid direction. Please go north, east, south, or west.')
+
+
+@register_command('goto')
+def goto_command(world: World, player: Player, player_location: Location, command: Command,
+                 menu_actions: list[str]) -> None:
+    """Walk the player along a shortest route to the location numbered command.arg, which they have visited.
+    Each step costs a move, and the locations passed on the way are visited as if the player had stopped there.
+    The walk stops early if the player wins or runs out of moves on the way.
+    """
+    if not command.arg.isdigit():
+        player.output.emit('error', 'Please go to a location number, such as "goto 5".')
+        return
+    destination = world.location_index.get(int(command.arg))
+    if destination is None or destination.num not in world.coordinates:
+        player.output.emit('error', f'There is no LOCATION {command.arg}.')
+    elif not destination.visited:
+        player.output.emit('error', f'You have not been to LOCATION {destination.num} yet.')
+    elif destination is player_location:
+        player.output.emit('error', f'You are already at LOCATION {destination.num}.')
+    else:
+        route = world.get_navigation().path((player.x, player.y), world.coordinates[destination.num])
+        if route is None:
+            player.output.emit('error', f'LOCATION {destination.num} cannot be reached from here.')
+            return
+        for i, (dx, dy) in enumerate(route):
+            world.move_player(player.x + dx, player.y + dy, player)
+            if i == len(route) - 1 or check_for_victory(player) or player.moves >= MAX_MOVES:
+                break
+            begin_turn(world, player)
+
+
+def _moves(count: int) -> str:
+    """Return count as a number of moves, such as '1 move' or '3 moves'."""
+    return f'{count} move' if count == 1 else f'{count} moves'
+
+
+@register_command('hint')
+def hint_command(world: World, player: Player, player_location: Location, command: Command,
+                 menu_actions: list[str]) -> None:
+    """Tell the player how far the exam is, and where to go next."""
+    navigation = world.get_navigation()
+    moves_left = MAX_MOVES - player.moves
+    distance = moves_to_exam(world, player)
+    if distance is None:
+        player.output.emit('hint', 'Hint: The Exam Center cannot be reached from here.')
+        return
+    player.output.emit('hint', f'Hint: The Exam Center is {_moves(distance)} away, '
+                               f'and you have {_moves(moves_left)} left.')
+    if distance >= moves_left:
+        player.output.emit('hint', 'Hint: You cannot make it to your exam in time without getting some moves back.')
+    elif all(player.has_item(name) for name in world.required_items):
+        route = navigation.path((player.x, player.y), world.exam)
+        if route:
+            player.output.emit('hint', f'Hint: You have everything you need. '
+                                       f'Go {_DIRECTION_NAMES[route[0]]} to head to the exam.')
+    else:
+        unvisited = [world.coordinates[location.num] for location in world.locations
+                     if not location.visited and location.num in world.coordinates]
+        nearest = navigation.nearest((player.x, player.y), unvisited)
+        if nearest is not None:
+            cell, moves = nearest
+            route = navigation.path((player.x, player.y), cell)
+            player.output.emit('hint', f'Hint: The nearest place you have not been to is {_moves(moves)} away. '
+                                       f'Go {_DIRECTION_NAMES[route[0]]}.')
+
+
+@register_command('pick')
+def pick_command(world: World, player: Player, player_location: Location, command: Command,
+                 menu_actions: list[str]) -> None:
+    """Pick up the item named command.arg."""
+    world.pick(player, player_location, command.arg)
+
+
+@register_command('drop')
+def drop_command(world: World, player: Player, player_location: Location, command: Command,
+                 menu_actions: list[str]) -> None:
+    """Drop the item named command.arg."""
+    world.drop(player, player_location, command.arg)
+
+
+@register_command('look')
+def look_command(world: World, player: Player, player_location: Location, command: Command,
+                 menu_actions: list[str]) -> None:
+    """Print the long description of the player's location."""
+    player_location.get_long(player.output)
+
+
+@register_command('quit')
+def quit_command(world: World, player: Player, player_location: Location, command: Command,
+                 menu_actions: list[str]) -> None:
+    """Do nothing; quitting is handled by take_turn."""
+
+
+@register_command('score')
+def score_command(world: World, player: Player, player_location: Location, command: Command,
+                  menu_actions: list[str]) -> None:
+    """Print the player's score."""
+    player.output.emit('info', f'Score: {player.score}')
+
+
+@register_command('inventory')
+def inventory_command(world: World, player: Player, player_location: Location, command: Command,
+                      menu_actions: list[str]) -> None:
+    """Print the names of the items in the player's inventory."""
+    inv = []
+    for item in player.inventory:
+        inv.append(item.name)
+    if not inv:
+        player.output.emit('info', 'Inventory is empty.')
+    else:
+        player.output.emit('info', ', '.join(inv))
+
+
+@register_command('open')
+def open_command(world: World, player: Player, player_location: Location, command: Command,
+                 menu_actions: list[str]) -> None:
+    """Open the furniture named command.arg."""
+    if 'open' not in player_location.available_actions:
+        player.output.emit('error', 'Nothing can be opened in this location.')
+    elif command.arg in player_location.available_actions['open']:
+        world.open(player, player_location, command.arg)
+    else:
+        player.output.emit('error', f'You cannot open a {command.arg}.')
+
+
+@register_command('undo')
+def undo_command(world: World, player: Player, player_location: Location, command: Command,
+                 menu_actions: list[str]) -> None:
+    """Undo the last turn, or the number of turns in command.arg, in which something changed."""
+    if player.history is None:
+        player.output.emit('error', 'Undo is not available in this game.')
+    elif command.arg and not command.arg.isdigit():
+        player.output.emit('error', 'Please undo a number of turns, such as "undo 2".')
+    else:
+        undone = player.history.rewind(player, int(command.arg) if command.arg else 1)
+        if undone == 0:
+            player.output.emit('error', 'There is nothing to undo.')
         else:
-            for interactable in player_location.interactables:
-                if interactable.name == arg:
-                    obj = interactable
-                    break
-        if obj:
-            if isinstance(obj, Item):
-                if action_input in obj.actions:
-                    obj.do_action(player, action_input)
-                else:
-                    print('You cannot do that action on this object.')
-            else:
-                if action_input in obj.actions:
-                    obj.do_action(world, player, player_location, action_input)
-                else:
-                    print('You cannot do that action on this object.')
+            player.output.emit('info', f'Undid {undone} turn{"" if undone == 1 else "s"}.')
+
+
+def save_command(world: World, player: Player, player_location: Location, command: Command,
+                 menu_actions: list[str]) -> None:
+    """Save the game to the file named command.arg, or to game_state.SAVE_FILE if no file is named."""
+    import game_state  # Imported here because game_state imports this module
+    path = command.arg or game_state.SAVE_FILE
+    try:
+        size = game_state.save_to_file(world, player, path)
+    except OSError as error:
+        player.output.emit('error', f'Could not save the game to {path}: {error.strerror}.')
+    else:
+        player.output.emit('info', f'Game saved to {path} ({size} bytes).')
+
+
+def load_command(world: World, player: Player, player_location: Location, command: Command,
+                 menu_actions: list[str]) -> None:
+    """Continue the game saved in the file named command.arg, or in game_state.SAVE_FILE if no file is named."""
+    import game_state  # Imported here because game_state imports this module
+    path = command.arg or game_state.SAVE_FILE
+    try:
+        game_state.load_from_file(world, player, path)
+    except OSError as error:
+        player.output.emit('error', f'Could not load a game from {path}: {error.strerror}.')
+    except game_state.SaveFileError as error:
+        player.output.emit('error', f'Could not load a game from {path}: {error}.')
+    else:
+        player.output.emit('info', f'Game loaded from {path}.')
+
+
+# The handlers of the commands that read or write a file named by the player. They are not in COMMANDS unless
+# register_file_commands is called, so that the clients of a server cannot name files on its machine.
+FILE_COMMANDS = {'save': save_command, 'load': load_command}
+
+
+def register_file_commands() -> None:
+    """Register the commands in FILE_COMMANDS, for a game played by the person running it."""
+    COMMANDS.update(FILE_COMMANDS)
+
+
+@register_command('stats')
+def stats_command(world: World, player: Player, player_location: Location, command: Command,
+                  menu_actions: list[str]) -> None:
+    """Show the calls and latencies recorded by the instrumentation module, or, for "stats export",
+    export them to the file that the game was started with (see the instrumentation module).
+    """
+    import instrumentation  # Imported here so that starting the game stays cheap
+    record = instrumentation.active()
+    if record is None:
+        player.output.emit('error', 'Stats are not being recorded. Start the game with --stats to record them.')
+    elif command.arg == 'export':
+        if record.export_path is None:
+            player.output.emit('error', 'Stats cannot be exported. Start the game with --stats=FILE to export them.')
+            return
+        try:
+            record.export(record.export_path)
+        except OSError as error:
+            player.output.emit('error', f'Could not export stats to {record.export_path}: {error.strerror}.')
         else:
-            print(f'{arg} does not exist in your inventory or at this location.')
+            player.output.emit('info', f'Stats exported to {record.export_path}.')
+    elif command.arg:
+        player.output.emit('error', 'Type "stats" to see the stats, or "stats export" to export them.')
     else:
-        print('Invalid action.')
+        player.output.emit('info', record.report())
 
-    # Prompt player for action again
-    # player_choice = input("\nChoose action: ")
-    # call = do_action(world, player, player_location, player_choice, menu_actions)
-    # Check if player called quit
 
-    # return
+@register_command('menu')
+def menu_command(world: World, player: Player, player_location: Location, command: Command,
+                 menu_actions: list[str]) -> None:
+    """Print the menu options and the actions available at the player's location."""
+    lines = ['Menu Options: \n']
+    lines.extend(menu_actions)
+    lines.append(f'\nActions available at LOCATION {player_location.num}: \n')
+    for action in player_location.available_actions:
+        lines.append(f'{action} [argument]')
+        # List all Item or Furniture objects that an action can be performed on.
+        lines.append('\t' + ', '.join(player_location.available_actions[action]) + '\n')
+    player.output.emit('info', '\n'.join(lines))
 
 
 def check_for_victory(player: Player) -> bool:
     """
     Returns True if the given player has won.
-    A player has won if they are at the exam center with a tcard, cheat sheet, and lucky pen in their inventory
+    A player has won if they are at the exam of their world with every item needed to win in their inventory
+    (a tcard, cheat sheet, and lucky pen in the default world), before running out of moves.
     """
-    at_exam_hall = (player.y == 4) and (player.x == 3)
-    has_all_items = [False, False, False]
+    return player.moves < MAX_MOVES and player.world.has_won(player)
 
-    for item in player.inventory:
-        if item.name == 'tcard':
-            has_all_items[0] = True
-        if item.name == 'cheat sheet':
-            has_all_items[1] = True
-        if item.name == 'lucky pen':
-            has_all_items[2] = True
-
-    if at_exam_hall and (all(status for status in has_all_items)) and player.moves < 60:
-        return True
-    else:
-        return False
 
+def moves_to_exam(world: World, player: Player) -> Optional[int]:
+    """Return the fewest moves the given player needs to walk to the exam location,
+    or None if it cannot be reached from where they are or the world has no exam.
+    """
+    if world.exam is None:
+        return None
+    return world.get_navigation().distance((player.x, player.y), world.exam)
 
-if __name__ == "__main__":
-    quit_game = False
 
-    import python_ta
-    python_ta.check_all(config={
-        'max-line-length': 120
-    })
+def new_game(map_data: TextIO, location_data: TextIO, items_data: TextIO,
+             lazy_descriptions: bool = False) -> tuple[World, Player]:
+    """Return a new World loaded from the given open files and a Player at the starting location.
+    If lazy_descriptions is True, location descriptions are read from location_data when they are needed.
+    """
+    w = World(map_data, location_data, items_data, lazy_descriptions)
+    # set starting location of player; you may change the x, y coordinates here as appropriate
+    p = Player(START_X, START_Y, w)
+    w.add_interactables_to_locations()
+    w.add_actions_to_locations()
+    return w, p
 
-    with open("map.txt") as map_file, open("locations.txt") as locations_file, open("items.txt") as items_file:
-        w = World(map_file, locations_file, items_file)
 
-        p = Player(2, 4, w)  # set starting location of player; you may change the x, y coordinates here as appropriate
-        w.add_interactables_to_locations()
-        w.add_actions_to_locations()
+def begin_turn(world: World, player: Player) -> Location:
+    """Describe the given player's current location at the start of a turn, and return that location.
+
+    Points are added if it is the player's first time visiting the location.
+    If the location is a MissionLocation, then the player's delivery is checked.
+    """
+    location = world.get_location(player.x, player.y)
 
-        menu = ["go", "look", "inventory", "score", "quit"]
+    # Print location description depending on if player has visited before
+    # Add points if player first time visiting
+    location.visit(player)
 
-        w.get_game_introduction()
-        print(f'You can always type {', '.join(menu)} at any location.\n')
-        input('Press ENTER to continue.')
+    # If location is MissionLocation, then check if player has items to pick up
+    if isinstance(location, MissionLocation):
+        location.check_delivery(world, player, location)
+
+    return location
 
-        while not p.victory and p.moves < 60 and not quit_game:
-            location = w.get_location(p.x, p.y)
 
-            # Print location description depending on if player has visited before
-            # Add points if player first time visiting
-            location.visit(p)
+def take_turn(world: World, player: Player, location: Location, choice: str, menu: list[str]) -> bool:
+    """Execute the player's choice of action at the given location, and update their victory status.
+    Return True if the player chose to quit.
+
+    Preconditions:
+        - world.get_location(player.x, player.y) is location
+    """
+    if choice == 'quit':
+        return True
 
-            # If location is MissionLocation, then check if player has items to pick up
-            if isinstance(location, MissionLocation):
-                location.check_delivery(w, p, location)
+    if player.history is not None:
+        player.history.begin_step(player)
+    do_action(world, player, location, choice, menu)
 
-            available_actions = location.available_actions
+    if check_for_victory(player):
+        player.victory = True
+    return False
+
+
+def is_game_over(player: Player, quit_game: bool) -> bool:
+    """Return whether the game is over for the given player."""
+    return player.victory or player.moves >= MAX_MOVES or quit_game
+
+
+def play_game(world: World, player: Player, menu: list[str]) -> bool:
+    """Play turns until the game is over, reading each action from the player's input source.
+    Return True if the player quit.
+    """
+    quit_game = False
 
-            print("What to do?\n")
-            choice = input("\nEnter action: ").lower().strip()
+    while not is_game_over(player, quit_game):
+        location = begin_turn(world, player)
 
-            if choice == 'quit':
-                quit_game = True
-            else:
-                do_action(w, p, location, choice, menu)
+        player.output.emit('prompt', 'What to do?\n')
+        choice = player.input_source("\nEnter action: ").lower().strip()
 
-            if check_for_victory(p):
-                p.victory = True
+        quit_game = take_turn(world, player, location, choice, menu)
 
-    if p.victory:
-        print('\x1B[3mSome time later...\x1B[0m')
-        print('You made it to your exam in time with all your items.')
-        print('You feel pretty confident about how you did! The studying paid off, hopefully.')
-        print(f'Score: {p.score}')
+    return quit_game
+
+
+def print_ending(player: Player, quit_game: bool) -> None:
+    """Print how the game ended for the given player."""
+    if player.victory:
+        player.output.emit('ending', '\x1B[3mSome time later...\x1B[0m\n'
+                                     'You made it to your exam in time with all your items.\n'
+                                     'You feel pretty confident about how you did! The studying paid off, hopefully.\n'
+                                     f'Score: {player.score}', player)
     elif not quit_game:
-        print('You took too long to get to your exam. You missed it.')
-        print(f'Score: {p.score}')
+        player.output.emit('ending', 'You took too long to get to your exam. You missed it.\n'
+                                     f'Score: {player.score}', player)
     else:
-        print('Quitting game...')
+        player.output.emit('ending', 'Quitting game...', player)
+
+
+if __name__ == "__main__":
+    # --stats records the latencies of the game, and --stats=FILE also lets "stats export" write them to FILE
+    stats_options = [arg for arg in sys.argv[1:] if arg == '--stats' or arg.startswith('--stats=')]
+    if stats_options:
+        import instrumentation
+        instrumentation.enable(sys.modules[__name__], stats_options[-1][len('--stats='):] or None)
+
+    register_file_commands()
+    with open("map.txt") as map_file, open("locations.txt") as locations_file, open("items.txt") as items_file:
+        w, p = new_game(map_file, locations_file, items_file)
+        p.history = History()
+
+        w.get_game_introduction()
+        print(f"You can always type {', '.join(MENU)} at any location.\n")
+        input('Press ENTER to continue.')
+
+        quit_game = play_game(w, p, MENU)
+
+    print_ending(p, quit_game)
@@ -0,0 +1,924 @@
+"""CSC111 Project 1: Benchmarks
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains benchmarks for the game engine. Run a benchmark by name:
+
+    python benchmarks.py moves
+
+The startup benchmark exits with a non-zero status if a startup budget is exceeded.
+
+The suite measures loading generated worlds, the cost of each of the main commands and replaying the
+transcripts end to end. Its results can be saved as a JSON baseline, and compared with a baseline later,
+exiting with a non-zero status if a benchmark has regressed:
+
+    python benchmarks.py suite --save baseline.json
+    python benchmarks.py suite --compare baseline.json
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2024 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import asyncio
+import gc
+import io
+import json
+import os
+import py_compile
+import random
+import subprocess
+import tempfile
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from typing import Callable, Optional
+
+from adventure import (DIRECTIONS, MENU, START_X, START_Y, begin_turn, check_for_victory, dispatch, do_action,
+                       is_game_over, new_game, parse_command, take_turn)
+from compiled_world import compile_files, load_compiled
+from game_data import LockedFurniture, Player, World
+from game_log import rebuild
+from navigation import NavigationIndex
+from game_output import BufferedSink, EventSink, NullSink, PrintSink
+from game_state import WORLD_FILES, WorldDefinition, decode_state
+from headless import replay, replay_transcript
+from playtest import AGENTS, playtest
+from server import GameServer, GameSession
+from solver import solve, verify
+from world_generator import generate_map, generate_sparse_map, generate_world, load_generated_world, write_world
+
+TRANSCRIPTS = ('gameplay1.txt', 'gameplay2.txt', 'gameplay3.txt', 'gameplay4.txt', 'solution.txt')
+
+# Cold-start budgets in milliseconds, on top of the time to start a bare interpreter
+STARTUP_BUDGETS = {
+    'import game_data': 10.0,
+    'launch adventure.py': 20.0,
+}
+# Modules that must never be loaded by starting the game
+DEV_ONLY_MODULES = ('python_ta', 'pylint', 'astroid')
+
+# The sizes of the generated worlds of the suite, the commands it measures, and how much slower than its
+# baseline a benchmark must be to be a regression. Runs of the suite on the same tree differ by up to about
+# 1.8x on a busy machine, so only a benchmark that takes more than twice as long as its baseline is flagged.
+SUITE_SIZES = (10, 50)
+SUITE_COMMANDS = ('go', 'pick', 'drop', 'open', 'menu')
+SUITE_TOLERANCE = 1.0
+BASELINE_VERSION = 1
+
+
+def bench_moves(sizes: tuple[int, ...] = (10, 100, 300), moves: int = 100_000) -> dict[int, float]:
+    """Return the average time in microseconds of World.move_player on size x size generated worlds.
+
+    The player walks back and forth between the last two locations of the bottom row,
+    which are the last locations in the world's locations list.
+    A constant time per move as size grows means moves do not scan the world.
+    """
+    results = {}
+    for size in sizes:
+        w = load_generated_world(size, size)
+        p = Player(size - 2, size - 1, w)
+
+        start = time.perf_counter()
+        for _ in range(moves // 2):
+            w.move_player(p.x + 1, p.y, p)
+            w.move_player(p.x - 1, p.y, p)
+        elapsed = time.perf_counter() - start
+
+        results[size * size] = elapsed / moves * 1e6
+    return results
+
+
+def print_moves(results: dict[int, float]) -> None:
+    """Print the results of bench_moves as a table."""
+    print(f'{"locations":>12} {"us/move":>10} {"x smallest":>11}')
+    smallest = min(results)
+    for locations, us_per_move in results.items():
+        print(f'{locations:>12} {us_per_move:>10.3f} {us_per_move / results[smallest]:>11.2f}')
+
+
+def bench_replay(transcripts: tuple[str, ...] = TRANSCRIPTS, repeat: int = 200) -> dict[str, float]:
+    """Return the number of games per second that headless.replay_transcript replays for each transcript."""
+    results = {}
+    for transcript in transcripts:
+        replay_transcript(transcript)  # Read the world files before timing
+        start = time.perf_counter()
+        for _ in range(repeat):
+            replay_transcript(transcript)
+        results[transcript] = repeat / (time.perf_counter() - start)
+    return results
+
+
+def print_replay(results: dict[str, float]) -> None:
+    """Print the results of bench_replay as a table."""
+    print(f'{"transcript":>16} {"games/s":>10}')
+    for transcript, games_per_second in results.items():
+        print(f'{transcript:>16} {games_per_second:>10.0f}')
+
+
+def _run_python(args: list[str], stdin: str = '') -> float:
+    """Return the wall time in milliseconds of running the Python interpreter with args in this directory."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], input=stdin, text=True, capture_output=True, check=True,
+                   cwd=os.path.dirname(os.path.abspath(__file__)))
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_startup(repeat: int = 10) -> dict[str, float]:
+    """Return the best cold-start time in milliseconds of a bare interpreter, of importing game_data
+    and of launching adventure.py and quitting immediately, over repeat runs each.
+    The bytecode of game_data and adventure is compiled before measuring.
+    """
+    # Measure a warm bytecode cache, as a player would have after their first launch
+    for module in ('game_data.py', 'adventure.py'):
+        py_compile.compile(os.path.join(os.path.dirname(os.path.abspath(__file__)), module))
+
+    runs = {
+        'bare interpreter': (['-c', 'pass'], ''),
+        'import game_data': (['-c', 'import game_data'], ''),
+        'launch adventure.py': (['adventure.py'], '\nquit\n'),
+    }
+    return {name: min(_run_python(args, stdin) for _ in range(repeat)) for name, (args, stdin) in runs.items()}
+
+
+def check_startup(results: dict[str, float]) -> list[str]:
+    """Return a message for every startup budget exceeded in results from bench_startup,
+    and for every development-only module loaded by importing game_data.
+    """
+    failures = []
+    for name, budget in STARTUP_BUDGETS.items():
+        overhead = results[name] - results['bare interpreter']
+        if overhead > budget:
+            failures.append(f'{name} took {overhead:.1f} ms over a bare interpreter (budget {budget:.1f} ms)')
+
+    check = f'import sys, game_data; sys.exit(any(m in sys.modules for m in {DEV_ONLY_MODULES!r}))'
+    try:
+        _run_python(['-c', check])
+    except subprocess.CalledProcessError:
+        failures.append(f'import game_data loaded one of {", ".join(DEV_ONLY_MODULES)}')
+    return failures
+
+
+def print_startup(results: dict[str, float]) -> None:
+    """Print the results of bench_startup as a table, and exit with status 1 if a budget is exceeded."""
+    print(f'{"run":>20} {"ms":>8} {"budget":>8}')
+    for name, milliseconds in results.items():
+        budget = STARTUP_BUDGETS.get(name)
+        budget_text = f'+{budget:.0f}' if budget is not None else ''
+        print(f'{name:>20} {milliseconds:>8.1f} {budget_text:>8}')
+
+    failures = check_startup(results)
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    if failures:
+        sys.exit(1)
+
+
+def bench_state(repeat: int = 1000) -> dict[str, float]:
+    """Return the average time in microseconds of starting a game by parsing the world files,
+    starting a game from a WorldDefinition, and capturing, copying and restoring a GameState.
+    """
+    definition = WorldDefinition.from_files()
+    w, p = definition.new_game()
+    state = definition.capture(w, p)
+
+    def parse_files() -> None:
+        """Start a new game by parsing the world files."""
+        with open(WORLD_FILES[0]) as map_file, open(WORLD_FILES[1]) as locations_file, \
+                open(WORLD_FILES[2]) as items_file:
+            new_game(map_file, locations_file, items_file)
+
+    runs = {
+        'parse files': parse_files,
+        'definition.new_game': definition.new_game,
+        'capture': lambda: definition.capture(w, p),
+        'copy': state.copy,
+        'restore': lambda: definition.restore(w, p, state),
+    }
+    results = {}
+    for name, run in runs.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        results[name] = (time.perf_counter() - start) / repeat * 1e6
+    return results
+
+
+def bench_solver(sizes: tuple[int, ...] = (20, 50, 100, 150), density: float = 0.9,
+                 seed: int = 1) -> dict[int, tuple[float, Optional[int], bool]]:
+    """Return, for generated size x size quest worlds, the time in seconds to solve the world,
+    the number of lines in the solution, and whether replaying the solution in the game wins.
+    """
+    results = {}
+    for size in sizes:
+        w = load_generated_world(size, size, density, seed=seed, quest=True)
+        definition = WorldDefinition.from_world(w, Player(START_X, START_Y, w))
+        start = time.perf_counter()
+        solution = solve(*definition.new_game())
+        elapsed = time.perf_counter() - start
+        won = solution is not None and verify(definition, solution).victory
+        results[len(w.locations)] = (elapsed, None if solution is None else len(solution), won)
+    return results
+
+
+def print_solver(results: dict[int, tuple[float, Optional[int], bool]]) -> None:
+    """Print the results of bench_solver as a table."""
+    print(f'{"locations":>10} {"seconds":>8} {"lines":>6} {"wins":>5}')
+    for locations, (seconds, lines, won) in results.items():
+        print(f'{locations:>10} {seconds:>8.3f} {str(lines):>6} {str(won):>5}')
+
+
+async def _play_over_tcp(port: int, commands: str) -> str:
+    """Send every line of commands to a game server on localhost and return everything it sends back."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(commands.encode())
+    await writer.drain()
+    output = await reader.read()
+    writer.close()
+    return output.decode()
+
+
+async def _bench_server(clients: int, transcript: str) -> dict[str, float]:
+    """Helper for bench_server that runs the server and its clients in one event loop."""
+    game_server = GameServer()
+    server = await game_server.start(port=0)
+    port = server.sockets[0].getsockname()[1]
+    with open(transcript) as f:
+        commands = ''.join(f.readlines()[1:])
+
+    start = time.perf_counter()
+    outputs = await asyncio.gather(*(_play_over_tcp(port, commands) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+
+    expected = replay_transcript(transcript).score
+    finished = sum(1 for output in outputs if output.rstrip().endswith(f'Score: {expected}'))
+
+    tracemalloc.start()
+    sessions = [game_server.new_session() for _ in range(clients)]
+    bytes_per_session = tracemalloc.get_traced_memory()[0] / len(sessions)
+    tracemalloc.stop()
+
+    return {'clients': clients, 'finished': finished, 'seconds': elapsed, 'games/s': clients / elapsed,
+            'KB/session': bytes_per_session / 1024}
+
+
+def bench_server(clients: int = 2000, transcript: str = 'solution.txt') -> dict[str, float]:
+    """Return the time for the given number of concurrent clients to each play transcript against a
+    GameServer on localhost, how many of them finished with the expected score, and the memory of a session.
+    """
+    return asyncio.run(_bench_server(clients, transcript))
+
+
+def bench_playtest(episodes: int = 2000, workers: Optional[int] = None) -> dict[str, dict[str, float]]:
+    """Return the episodes per second and the win rate of playtesting the given number of episodes
+    with each kind of agent.
+    """
+    results = {}
+    for agent in AGENTS:
+        start = time.perf_counter()
+        stats = playtest(episodes, agent, workers, chunk_size=max(1, episodes // 20))
+        elapsed = time.perf_counter() - start
+        results[agent] = {'episodes/s': stats.episodes / elapsed, 'win rate': stats.win_rate()}
+    return results
+
+
+def bench_bulk(sizes: tuple[int, ...] = (1000, 100_000), turns: int = 60, loop_games: int = 1000) -> dict[str, float]:
+    """Return the turns per second played by bulk_engine.BulkGames of each of the given numbers of games,
+    and by the game loop playing loop_games games one after another, where every game plays turns random
+    commands from the commands that change games.
+    """
+    import numpy as np  # Only this benchmark needs NumPy
+    from bulk_engine import BulkGames, BulkWorld
+
+    definition = WorldDefinition.from_files()
+    w, p = definition.new_game()
+    p.output = NullSink()
+    commands = [f'go {direction}' for direction in DIRECTIONS] + ['look']
+    for interactable in w.objects:
+        commands.extend(f'{verb} {interactable.name}' for verb in ('pick', 'drop', 'open', 'examine', 'deliver'))
+    keys = {f'open {furniture.name}': furniture.key
+            for furniture in w.objects if isinstance(furniture, LockedFurniture)}
+    rules = BulkWorld(w)
+    numbers = np.array([rules.command(command, keys.get(command, '')) for command in commands])
+
+    results = {}
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        chosen = numbers[rng.integers(len(numbers), size=(turns, size))]
+        start = time.perf_counter()
+        games = BulkGames(rules, p, size)
+        for turn in range(turns):
+            games.step(chosen[turn])
+        results[f'bulk {size} games'] = size * turns / (time.perf_counter() - start)
+
+    choices = rng.integers(len(commands), size=(loop_games, turns)).tolist()
+    start = time.perf_counter()
+    played = 0
+    for game_choices in choices:
+        definition.restore(w, p, definition.initial)
+        location = begin_turn(w, p)
+        for choice in game_choices:
+            if is_game_over(p, False):
+                break
+            command = commands[choice]
+            p.input_source = lambda prompt, key=keys.get(command, ''): key
+            take_turn(w, p, location, command, MENU)
+            played += 1
+            if not is_game_over(p, False):
+                location = begin_turn(w, p)
+    results['game loop'] = played / (time.perf_counter() - start)
+    return results
+
+
+def bench_compiled(sizes: tuple[int, ...] = (10, 100, 320), items_per_location: int = 1) -> dict[int, dict[str, float]]:
+    """Return the time in milliseconds to load a size x size generated world from its text files and from
+    its compiled file, and the size of both in bytes, for each of the given sizes.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            write_world(directory, size, size, items_per_location=items_per_location)
+            files = tuple(os.path.join(directory, filename) for filename in WORLD_FILES)
+            compiled_path = os.path.join(directory, 'world.bin')
+            compile_files(compiled_path, files)
+
+            start = time.perf_counter()
+            with open(files[0]) as map_file, open(files[1]) as locations_file, open(files[2]) as items_file:
+                new_game(map_file, locations_file, items_file)
+            text_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            load_compiled(compiled_path)
+            compiled_ms = (time.perf_counter() - start) * 1000
+
+            results[size * size] = {'text ms': text_ms, 'compiled ms': compiled_ms,
+                                    'text bytes': sum(os.path.getsize(filename) for filename in files),
+                                    'compiled bytes': os.path.getsize(compiled_path)}
+    return results
+
+
+def bench_descriptions(size: int = 317, description_lines: int = 6) -> dict[str, dict[str, float]]:
+    """Return the memory in MiB and load time in milliseconds of a size x size generated world, whose long
+    descriptions have the given number of lines, when its descriptions are loaded fully, lazily, and from its
+    compiled file. Also return the time in microseconds to visit a location whose description is not cached.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        write_world(directory, size, size, description_lines=description_lines)
+        files = tuple(os.path.join(directory, filename) for filename in WORLD_FILES)
+        compiled_path = os.path.join(directory, 'world.bin')
+        compile_files(compiled_path, files)
+        loaders = {
+            'full': lambda: WorldDefinition.from_files(files),
+            'lazy': lambda: WorldDefinition.from_files(files, lazy_descriptions=True),
+            'compiled': lambda: WorldDefinition.from_compiled(compiled_path),
+        }
+        for name, loader in loaders.items():
+            tracemalloc.start()
+            definition = loader()
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del definition
+
+            start = time.perf_counter()
+            definition = loader()
+            elapsed = time.perf_counter() - start
+
+            # Read the long description of many locations, each for the first time
+            w, p = definition.new_game()
+            locations = w.locations[1::max(1, len(w.locations) // 1000)]
+            with open(os.devnull, 'w') as null, redirect_stdout(null):
+                visit_start = time.perf_counter()
+                for location in locations:
+                    location.visit(p)
+                visit_us = (time.perf_counter() - visit_start) / len(locations) * 1e6
+            results[name] = {'MiB': memory / 2 ** 20, 'load ms': elapsed * 1000, 'visit us': visit_us}
+            del definition, w, p
+    return results
+
+
+def bench_items(size: int = 100, items_per_location: int = 100) -> dict[str, float]:
+    """Return the time in seconds and the records per second of loading the items file of a size x size
+    generated world with the given number of items per location.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        write_world(directory, size, size, items_per_location=items_per_location)
+        files = tuple(os.path.join(directory, filename) for filename in WORLD_FILES)
+        with open(files[0]) as map_file, open(files[1]) as locations_file, tempfile.TemporaryFile('w+') as no_items:
+            no_items.write('TEMPLATE\n\n')
+            no_items.seek(0)
+            w = World(map_file, locations_file, no_items)
+        with open(files[2]) as items_file:
+            start = time.perf_counter()
+            interactables = w.load_items(items_file)
+            elapsed = time.perf_counter() - start
+    records = sum(len(location_interactables) for location_interactables in interactables.values())
+    return {'records': records, 'seconds': elapsed, 'records/s': records / elapsed}
+
+
+def bench_dispatch(commands: int = 1_000_000) -> dict[str, float]:
+    """Return the number of commands per second that are parsed, and that are parsed and handled, in the starting
+    location of a new game. The commands are a mix of built-in commands, interactable actions and invalid input.
+    """
+    w, p = WorldDefinition.from_files().new_game()
+    location = w.get_location(p.x, p.y)
+    mix = ['score', 'inventory', 'go nowhere', 'Open  the DOOR', 'read nothing', 'xyzzy plugh', '']
+    lines = [mix[i % len(mix)] for i in range(commands)]
+
+    start = time.perf_counter()
+    for line in lines:
+        parse_command(line)
+    parse_elapsed = time.perf_counter() - start
+
+    with open(os.devnull, 'w') as null, redirect_stdout(null):
+        start = time.perf_counter()
+        for line in lines:
+            do_action(w, p, location, line, MENU)
+        elapsed = time.perf_counter() - start
+
+        parsed = [parse_command(line) for line in lines]
+        start = time.perf_counter()
+        for command in parsed:
+            dispatch(w, p, location, command, MENU)
+        dispatch_elapsed = time.perf_counter() - start
+    return {'parse/s': commands / parse_elapsed, 'do_action/s': commands / elapsed,
+            'dispatch/s': commands / dispatch_elapsed}
+
+
+def bench_sinks(transcripts: tuple[str, ...] = TRANSCRIPTS, repeat: int = 500) -> dict[str, float]:
+    """Return the number of commands per second played from the given transcripts in one game, with each kind
+    of output sink. The print sink prints to /dev/null, which is how output was discarded before there were sinks.
+    """
+    definition = WorldDefinition.from_files()
+    w, p = definition.new_game()
+    games = []
+    for transcript in transcripts:
+        with open(transcript) as f:
+            games.append(f.read().splitlines()[1:])
+    commands = repeat * sum(len(lines) for lines in games)
+
+    sinks = {'print': PrintSink(), 'null': NullSink(), 'buffered': BufferedSink(), 'events': EventSink()}
+    results = {}
+    with open(os.devnull, 'w') as null, redirect_stdout(null):
+        for name, sink in sinks.items():
+            p.output = sink
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for lines in games:
+                    definition.restore(w, p, definition.initial)
+                    lines = iter(lines)
+                    p.input_source = lambda prompt: next(lines, '')
+                    location = begin_turn(w, p)
+                    quit_game = False
+                    for line in lines:
+                        quit_game = take_turn(w, p, location, line.lower().strip(), MENU)
+                        if is_game_over(p, quit_game):
+                            break
+                        location = begin_turn(w, p)
+                    if isinstance(sink, BufferedSink):
+                        sink.take()
+                    elif isinstance(sink, EventSink):
+                        sink.events.clear()
+            results[name] = commands / (time.perf_counter() - start)
+    return results
+
+
+def bench_save(transcript: str = 'solution.txt', repeat: int = 10_000) -> dict[str, float]:
+    """Return the size in bytes of the game saved halfway through the given transcript, and the time in
+    microseconds to save it, to decode it, and to load it into a game.
+    """
+    definition = WorldDefinition.from_files()
+    with open(transcript) as f:
+        lines = f.read().splitlines()[1:]
+    result = replay_transcript(transcript)
+    w, p = definition.new_game()
+    replay(lines[:len(result.steps) // 2], game=(w, p))
+    data = definition.save(w, p)
+    w2, p2 = definition.new_game()
+
+    results = {'bytes': len(data)}
+    for name, operation in (('save us', lambda: definition.save(w, p)),
+                            ('decode us', lambda: decode_state(definition, data)),
+                            ('load us', lambda: definition.load(w2, p2, data))):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            operation()
+        results[name] = (time.perf_counter() - start) / repeat * 1e6
+    return results
+
+
+def bench_undo(transcript: str = 'solution.txt', repeat: int = 200) -> dict[str, float]:
+    """Return the number of steps in the undo history of the game played by the given transcript, and the time in
+    microseconds to replay the transcript and then to rewind every step of it.
+    """
+    definition = WorldDefinition.from_files()
+    with open(transcript) as f:
+        lines = f.read().splitlines()[1:]
+
+    replay_time = rewind_time = 0.0
+    steps = 0
+    for _ in range(repeat):
+        w, p = definition.new_game()
+        start = time.perf_counter()
+        replay(lines, game=(w, p))
+        middle = time.perf_counter()
+        steps = p.history.rewind(p, p.history.limit)
+        rewind_time += time.perf_counter() - middle
+        replay_time += middle - start
+    return {'steps': steps, 'replay us': replay_time / repeat * 1e6, 'rewind us': rewind_time / repeat * 1e6}
+
+
+def bench_log(transcript: str = 'solution.txt', checkpoint_every: tuple[int, ...] = (10, 50, 1000),
+              repeat: int = 200) -> dict[int, dict[str, float]]:
+    """Return the size in bytes of the log of a server session playing transcript, the time in microseconds
+    to play the session with and without a log, and to rebuild the state after its last turn,
+    for each of the given numbers of turns between checkpoints.
+    """
+    definition = WorldDefinition.from_files()
+    with open(transcript) as f:
+        lines = f.read().splitlines()[1:]
+
+    def play(log_file: Optional[io.StringIO], every: int = 0) -> None:
+        """Play transcript in a new session, logging it to log_file if it is given."""
+        session = GameSession(definition.new_game()[1], log_file)
+        session.start()
+        if session.log is not None:
+            session.log.checkpoint_every = every
+        for line in lines:
+            if session.is_over():
+                break
+            session.handle_line(line)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        play(None)
+    unlogged = (time.perf_counter() - start) / repeat * 1e6
+
+    results = {}
+    for every in checkpoint_every:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            log_file = io.StringIO()
+            play(log_file, every)
+        logged = (time.perf_counter() - start) / repeat * 1e6
+        log_lines = log_file.getvalue().splitlines()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            rebuild(log_lines, definition)
+        results[every] = {'bytes': len(log_file.getvalue()), 'play us': unlogged, 'logged play us': logged,
+                          'rebuild us': (time.perf_counter() - start) / repeat * 1e6}
+    return results
+
+
+def bench_navigation(sizes: tuple[int, ...] = (10, 100, 300), queries: int = 10_000) -> dict[int, dict[str, float]]:
+    """Return the time in milliseconds to index the map of a size x size generated world, and the average time in
+    microseconds to find the distance and the path between its corners, and the distance from each location to a
+    corner, once the index has been built, for each of the given sizes.
+    """
+    results = {}
+    for size in sizes:
+        w = load_generated_world(size, size)
+        start = time.perf_counter()
+        index = NavigationIndex(w.map, w.coordinates.values())
+        build = time.perf_counter() - start
+        corners = ((0, 0), (size - 1, size - 1))
+        index.distance(*corners)
+
+        cells = iter(list(w.coordinates.values()) * (queries // len(w.coordinates) + 1))
+
+        results[size] = {'build ms': build * 1e3}
+        for name, query in (('distance us', lambda: index.distance(*corners)),
+                            ('path us', lambda: index.path(*corners)),
+                            ('to corner us', lambda: index.distance(next(cells), corners[1]))):
+            start = time.perf_counter()
+            for _ in range(queries):
+                query()
+            results[size][name] = (time.perf_counter() - start) / queries * 1e6
+    return results
+
+
+def bench_sparse(sizes: tuple[int, ...] = (1000, 3000, 10_000), density: float = 0.01, dense_limit: int = 3000,
+                 lookups: int = 100_000) -> dict[int, dict[str, Optional[float]]]:
+    """Return the memory in MiB of a size x size generated map where density of the cells are walkable, as a
+    SparseMap and as a nested list, and the average time in microseconds to look up a random cell of each,
+    for each of the given sizes. Nested lists are only measured up to dense_limit x dense_limit.
+    """
+    results = {}
+    for size in sizes:
+        rng = random.Random(size)
+        cells = [(rng.randrange(size), rng.randrange(size)) for _ in range(lookups)]
+        results[size] = {}
+        maps = [('sparse', lambda: generate_sparse_map(size, size, density))]
+        if size <= dense_limit:
+            maps.append(('dense', lambda: generate_map(size, size, density)))
+        for name, generate in maps:
+            tracemalloc.start()
+            world_map = generate()
+            results[size][f'{name} MiB'] = tracemalloc.get_traced_memory()[0] / 2 ** 20
+            tracemalloc.stop()
+            lookup = world_map.location_number if name == 'sparse' else lambda x, y: world_map[y][x]
+            start = time.perf_counter()
+            for x, y in cells:
+                lookup(x, y)
+            results[size][f'{name} lookup us'] = (time.perf_counter() - start) / lookups * 1e6
+            del world_map
+    return results
+
+
+def bench_storage(sizes: tuple[int, ...] = (100, 300), items_per_location: int = 2) -> dict[int, dict[str, float]]:
+    """Return the memory in MiB of a size x size generated world with the given number of items per location,
+    and of each new game of that world, for each of the given sizes.
+    """
+    results = {}
+    for size in sizes:
+        tracemalloc.start()
+        w = load_generated_world(size, size, items_per_location=items_per_location)
+        definition = WorldDefinition.from_world(w, Player(START_X, START_Y, w))
+        world_memory = tracemalloc.get_traced_memory()[0]
+        game = definition.new_game()
+        game_memory = tracemalloc.get_traced_memory()[0] - world_memory
+        tracemalloc.stop()
+        results[size] = {'world MiB': world_memory / 2 ** 20, 'game MiB': game_memory / 2 ** 20}
+        del w, definition, game
+    return results
+
+
+def bench_objects(size: int = 400, items_per_location: int = 5) -> dict[str, float]:
+    """Return the memory in bytes per location and per item of a size x size generated world, and of a new game
+    of it, where every location has the given number of items. The defaults make a world of about a million objects.
+    """
+    memory = {}
+    for items in (0, items_per_location):
+        tracemalloc.start()
+        w = load_generated_world(size, size, items_per_location=items)
+        world_memory = tracemalloc.get_traced_memory()[0]
+        game = w.fork()
+        game_memory = tracemalloc.get_traced_memory()[0] - world_memory
+        tracemalloc.stop()
+        memory[items] = (world_memory, game_memory, len(w.locations), len(w.objects))
+        del w, game
+
+    world_memory, game_memory, locations, _ = memory[0]
+    item_world_memory, item_game_memory, _, items = memory[items_per_location]
+    return {'objects': locations + items,
+            'world bytes/location': world_memory / locations,
+            'world bytes/item': (item_world_memory - world_memory) / items,
+            'game bytes/location': game_memory / locations,
+            'game bytes/item': (item_game_memory - game_memory) / items}
+
+
+def bench_warehouse(sizes: tuple[int, ...] = (10, 1000, 10_000), repeat: int = 10_000) -> dict[int, float]:
+    """Return the average time in microseconds to pick up and drop an item, and to examine it,
+    in a location holding each of the given numbers of items.
+    """
+    results = {}
+    for size in sizes:
+        w = load_generated_world(1, 1, items_per_location=size)
+        p = Player(0, 0, w)
+        location = w.get_location(0, 0)
+        # The item in the middle of the location is the worst case for a linear search
+        item_name = f'item {location.num}.{size // 2}'
+        with open(os.devnull, 'w') as null, redirect_stdout(null):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                w.pick(p, location, item_name)
+                do_action(w, p, location, f'examine {item_name}', MENU)
+                w.drop(p, location, item_name)
+            results[size] = (time.perf_counter() - start) / repeat * 1e6
+    return results
+
+
+def bench_instrumentation(transcript: str = 'solution.txt', repeat: int = 500) -> dict[str, float]:
+    """Return the games per second that headless.replay_transcript replays of transcript before instrumentation
+    is enabled, while it is enabled, and after it is disabled again.
+    """
+    import instrumentation
+
+    def games_per_second() -> float:
+        """Return the games per second that transcript is replayed."""
+        start = time.perf_counter()
+        for _ in range(repeat):
+            replay_transcript(transcript)
+        return repeat / (time.perf_counter() - start)
+
+    replay_transcript(transcript)  # Read the world files before timing
+    results = {'off': games_per_second()}
+    instrumentation.enable()
+    try:
+        results['on'] = games_per_second()
+    finally:
+        instrumentation.disable()
+    results['off again'] = games_per_second()
+    return results
+
+
+def bench_victory(sizes: tuple[int, ...] = (0, 100, 10_000), repeat: int = 100_000) -> dict[int, float]:
+    """Return the average time in microseconds of adventure.check_for_victory for a player at the exam of a
+    generated quest world, holding every item needed to win and each of the given numbers of other items.
+    """
+    w = load_generated_world(100, 100, items_per_location=1, quest=True)
+    required = [w.objects[w.item_masks[name].bit_length() - 1] for name in w.required_items]
+    others = [obj for obj in w.objects if obj not in required]
+    results = {}
+    for size in sizes:
+        p = Player(*w.exam, w)
+        p.inventory.extend(others[:size] + required)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            check_for_victory(p)
+        results[size] = (time.perf_counter() - start) / repeat * 1e6
+    return results
+
+
+def _best_average(run: Callable[[], float], repeat: int, rounds: int) -> float:
+    """Return the least over rounds of the average of repeat results of run,
+    which returns the seconds that one operation took.
+    """
+    gc.collect()  # Start from the same heap, so that garbage from earlier benchmarks is not collected during this one
+    return min(sum(run() for _ in range(repeat)) / repeat for _ in range(rounds))
+
+
+def _timed(operation: Callable[[], object]) -> float:
+    """Return the seconds that calling operation took."""
+    start = time.perf_counter()
+    operation()
+    return time.perf_counter() - start
+
+
+def bench_suite(sizes: tuple[int, ...] = SUITE_SIZES, items_per_location: int = 2, repeat: int = 2000,
+                rounds: int = 5) -> dict[str, float]:
+    """Return the seconds per operation of each benchmark of the suite, named by what it measures:
+
+        - 'load NxN': World.__init__ of a generated N x N quest world with items_per_location items per location
+        - 'COMMAND NxN': do_action of COMMAND in a new game of that world, for each command in SUITE_COMMANDS
+        - 'replay TRANSCRIPT': replaying TRANSCRIPT of the default world from start to end, for each of TRANSCRIPTS
+
+    Each result is the best over rounds of the average over repeat operations (fewer for the slower ones),
+    so that one slow round on a busy machine does not count as a regression.
+    """
+    results = {}
+    for size in sizes:
+        texts = generate_world(size, size, 1.0, items_per_location, seed=size, quest=True)
+        results[f'load {size}x{size}'] = _best_average(
+            lambda: _timed(lambda: World(*(io.StringIO(text) for text in texts))), max(1, repeat // size), rounds)
+
+        w = World(*(io.StringIO(text) for text in texts))
+        w.add_interactables_to_locations()
+        w.add_actions_to_locations()
+        # Play next to the quest desk, which every generated quest world has, stepping away from the map's edge
+        desk = next(obj for obj in w.objects if obj.name == 'desk')
+        location = next(location for location in w.locations if desk in location.interactables)
+        x, y = w.coordinates[location.num]
+        p = Player(x, y, w)
+        p.output = NullSink()
+        step = 'east' if w.get_location(x + 1, y) is not None else 'west'
+        back = {'east': 'west', 'west': 'east'}[step]
+        item = next(obj for obj in location.interactables if obj.name.startswith('item '))
+
+        def go() -> float:
+            """Return the seconds that a move away and a move back took, per move."""
+            seconds = _timed(lambda: do_action(w, p, w.get_location(p.x, p.y), f'go {step}', MENU))
+            return (seconds + _timed(lambda: do_action(w, p, w.get_location(p.x, p.y), f'go {back}', MENU))) / 2
+
+        def pick() -> float:
+            """Return the seconds that picking up the item took, dropping it again untimed."""
+            seconds = _timed(lambda: do_action(w, p, location, f'pick {item.name}', MENU))
+            w.drop(p, location, item.name)
+            return seconds
+
+        def drop() -> float:
+            """Return the seconds that dropping the item took, picking it up first untimed."""
+            w.pick(p, location, item.name)
+            return _timed(lambda: do_action(w, p, location, f'drop {item.name}', MENU))
+
+        def open_desk() -> float:
+            """Return the seconds that opening the desk took, closing it first untimed."""
+            desk.opened = False
+            return _timed(lambda: do_action(w, p, location, 'open desk', MENU))
+
+        for command, run in zip(SUITE_COMMANDS, (go, pick, drop, open_desk,
+                                                 lambda: _timed(lambda: do_action(w, p, location, 'menu', MENU)))):
+            results[f'{command} {size}x{size}'] = _best_average(run, repeat, rounds)
+
+    for transcript in TRANSCRIPTS:
+        replay_transcript(transcript)  # Read the world files before timing
+        results[f'replay {transcript}'] = _best_average(lambda: _timed(lambda: replay_transcript(transcript)),
+                                                        max(1, repeat // 20), rounds)
+    return results
+
+
+def save_baseline(results: dict[str, float], path: str) -> None:
+    """Write results from bench_suite to the file at path as a JSON baseline."""
+    with open(path, 'w') as f:
+        json.dump({'version': BASELINE_VERSION, 'python': sys.version.split()[0], 'results': results}, f, indent=2)
+        f.write('\n')
+
+
+def load_baseline(path: str) -> dict[str, float]:
+    """Return the results of the JSON baseline in the file at path, or raise ValueError if it is not one."""
+    with open(path) as f:
+        baseline = json.load(f)
+    if not isinstance(baseline, dict) or baseline.get('version') != BASELINE_VERSION:
+        raise ValueError(f'{path} is not a benchmark baseline of version {BASELINE_VERSION}')
+    return baseline['results']
+
+
+def compare_results(results: dict[str, float], baseline: dict[str, float],
+                    tolerance: float = SUITE_TOLERANCE) -> list[str]:
+    """Return a message for every benchmark in both results and baseline that takes more than
+    1 + tolerance times as long as in baseline.
+    """
+    return [f'{name} takes {results[name] / baseline[name]:.2f}x as long as the baseline '
+            f'({_seconds(results[name])} against {_seconds(baseline[name])})'
+            for name in results if name in baseline and results[name] > baseline[name] * (1 + tolerance)]
+
+
+def _seconds(seconds: float) -> str:
+    """Return seconds in the unit that reads best: microseconds or milliseconds."""
+    return f'{seconds * 1e6:.2f} us' if seconds < 0.001 else f'{seconds * 1e3:.2f} ms'
+
+
+def print_suite(results: dict[str, float], baseline: Optional[dict[str, float]] = None) -> None:
+    """Print results from bench_suite as a table, with the ratio of each result to baseline if it is given."""
+    print(f'{"benchmark":>24} {"time":>12} {"baseline":>12} {"ratio":>7}')
+    for name, seconds in results.items():
+        if baseline is not None and name in baseline:
+            print(f'{name:>24} {_seconds(seconds):>12} {_seconds(baseline[name]):>12} '
+                  f'{seconds / baseline[name]:>7.2f}')
+        else:
+            print(f'{name:>24} {_seconds(seconds):>12}')
+
+
+def run_suite(args: list[str]) -> None:
+    """Run bench_suite with the given command line arguments, and exit with status 1 if a regression is found:
+
+        python benchmarks.py suite [--size N ...] [--save BASELINE] [--compare BASELINE] [--tolerance FRACTION]
+    """
+    import argparse  # Imported here because only the suite has options
+
+    parser = argparse.ArgumentParser(prog='benchmarks.py suite')
+    parser.add_argument('--size', type=int, action='append', help='the width and height of a generated world')
+    parser.add_argument('--save', metavar='BASELINE', help='write the results to this JSON baseline')
+    parser.add_argument('--compare', metavar='BASELINE', help='flag regressions against this JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=SUITE_TOLERANCE,
+                        help='the fraction slower than the baseline that is not a regression')
+    options = parser.parse_args(args)
+
+    baseline = load_baseline(options.compare) if options.compare else None
+    results = bench_suite(tuple(options.size) if options.size else SUITE_SIZES)
+    print_suite(results, baseline)
+    if options.save:
+        save_baseline(results, options.save)
+        print(f'Saved baseline to {options.save}')
+    if baseline is not None:
+        regressions = compare_results(results, baseline, options.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION: {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+BENCHMARKS: dict[str, Callable[[], None]] = {
+    'moves': lambda: print_moves(bench_moves()),
+    'replay': lambda: print_replay(bench_replay()),
+    'startup': lambda: print_startup(bench_startup()),
+    'server': lambda: print(bench_server()),
+    'compiled': lambda: print(bench_compiled()),
+    'descriptions': lambda: print(bench_descriptions()),
+    'dispatch': lambda: print({name: f'{rate:,.0f}' for name, rate in bench_dispatch().items()}),
+    'sinks': lambda: print({name: f'{rate:,.0f} commands/s' for name, rate in bench_sinks().items()}),
+    'save': lambda: print(bench_save()),
+    'undo': lambda: print(bench_undo()),
+    'log': lambda: print(bench_log()),
+    'navigation': lambda: print(bench_navigation()),
+    'sparse': lambda: print(bench_sparse()),
+    'storage': lambda: print(bench_storage()),
+    'objects': lambda: print({name: round(value) for name, value in bench_objects().items()}),
+    'warehouse': lambda: print({size: f'{us:.1f} us' for size, us in bench_warehouse().items()}),
+    'instrumentation': lambda: print({name: f'{rate:,.0f} games/s' for name, rate in bench_instrumentation().items()}),
+    'victory': lambda: print({size: f'{us:.2f} us' for size, us in bench_victory().items()}),
+    'items': lambda: print(bench_items()),
+    'playtest': lambda: print(bench_playtest()),
+    'bulk': lambda: print({name: f'{rate:,.0f} turns/s' for name, rate in bench_bulk().items()}),
+    'solver': lambda: print_solver(bench_solver()),
+    'state': lambda: print({name: f'{us:.1f} us' for name, us in bench_state().items()}),
+}
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['suite']:
+        run_suite(sys.argv[2:])
+        sys.exit()
+    for benchmark_name in sys.argv[1:] or list(BENCHMARKS):
+        print(f'== {benchmark_name}')
+        BENCHMARKS[benchmark_name]()
@@ -0,0 +1,592 @@
+"""CSC111 Project 1: Bulk Simulation Engine
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module plays many games of one world at once, for large-scale playtesting. Instead of a Player and
+a forked World for each game, the state of every game is kept in NumPy arrays, one row per game: the player's
+cell, moves, score and victory, and bitsets of the objects in their inventory, the furniture they have opened,
+the locations they have visited, and so on. Objects are identified by their id in World.objects, and bit i of
+a bitset is bit i % 64 of word i // 64 of the game's row.
+
+A world is compiled once into a BulkWorld of transition tables: the cell reached by a move in each direction
+from each walkable cell, the location of each cell, and the points, kind and mission of each object. Commands
+are compiled into numbered rules, and BulkGames.step plays one command in every game at once:
+
+    rules = BulkWorld(w)
+    games = BulkGames(rules, p, 100_000)
+    games.step(np.full(100_000, rules.command('go east')))
+
+Games agree step for step with the game loop of the adventure module (take_turn, then begin_turn if the game
+is not over) for the commands that change a game by moving the player, picking up, dropping and opening
+interactables, and doing the actions of MissionFurniture. Commands that only print are played as doing
+nothing, and commands whose effects are not modelled, such as undo, are refused when they are compiled.
+To check that the engine agrees with the game on transcripts, from the command line:
+
+    python bulk_engine.py gameplay1.txt solution.txt
+
+This module needs NumPy, which the rest of the game does not.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2024 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import sys
+from typing import Iterable, Optional
+
+import numpy as np
+
+from adventure import COMMANDS, DIRECTIONS, MAX_MOVES, MENU, begin_turn, is_game_over, parse_command, take_turn
+from game_data import (Furniture, Item, LockedFurniture, MissionFurniture, MissionItem, MissionLocation, Player,
+                       PowerUp, World, walkable_cells)
+from game_output import NullSink
+from game_state import WorldDefinition
+
+# The kinds of compiled commands
+NOTHING, QUIT, GO, PICK, DROP, OPEN, EXAMINE, DELIVER = range(8)
+
+# Verbs whose commands only print, so they are played as doing nothing
+PRINTING_VERBS = ('look', 'inventory', 'score', 'menu', 'hint', 'stats')
+
+_ONE = np.uint64(1)
+
+
+def _bits(ids: np.ndarray) -> np.ndarray:
+    """Return the bit of each object id in ids within its word of a bitset."""
+    return np.left_shift(_ONE, (ids & 63).astype(np.uint64))
+
+
+def _has(bitsets: np.ndarray, games: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Return whether bit ids[k] is set in the bitset of game games[k], for each k."""
+    return bitsets[games, ids >> 6] & _bits(ids) != 0
+
+
+def _add(bitsets: np.ndarray, games: np.ndarray, ids: np.ndarray) -> None:
+    """Set bit ids[k] in the bitset of game games[k], for each k.
+
+    Preconditions:
+        - games has no duplicates
+    """
+    bitsets[games, ids >> 6] |= _bits(ids)
+
+
+def _discard(bitsets: np.ndarray, games: np.ndarray, ids: np.ndarray) -> None:
+    """Clear bit ids[k] in the bitset of game games[k], for each k.
+
+    Preconditions:
+        - games has no duplicates
+    """
+    bitsets[games, ids >> 6] &= ~_bits(ids)
+
+
+class BulkWorld:
+    """The transition tables of a world, and the rules of the commands compiled for it, for BulkGames.
+
+    Locations are numbered in the order of World.location_index, and walkable cells row by row.
+
+    Instance Attributes:
+        - world:
+            The world these tables were compiled from.
+        - cell_x:
+            The x coordinate of each walkable cell.
+        - cell_y:
+            The y coordinate of each walkable cell.
+        - cell_location:
+            The location of each walkable cell.
+        - neighbours:
+            The cell reached by moving in each direction of DIRECTIONS from each walkable cell,
+            or -1 if that move is blocked.
+        - exam_cell:
+            The cell of the exam of the world, or -1 if it has none or it is not walkable.
+        - location_points:
+            The points for visiting each location.
+        - mission_locations:
+            The MissionLocations, with the id of the object to deliver to each and the id of the MissionItem
+            received for it, or -1 for an object that is not in the world.
+        - points:
+            The points of each object.
+        - moves_back:
+            The moves back of each object, which is 0 for every object but a PowerUp.
+        - is_mission_item:
+            Whether each object is a MissionItem.
+        - is_power_up:
+            Whether each object is a PowerUp.
+        - furniture_of:
+            The id of the furniture each item was loaded in, or -1 if it was not loaded in furniture.
+        - home:
+            The location of each furniture, or -1 for an item.
+        - mission_furniture:
+            The ids of the MissionItems given by, delivered to and received from each MissionFurniture,
+            or -1 for an object that is not in the world or is not a MissionFurniture.
+        - required:
+            The ids of the items needed to win, or None if one of them is not in the world.
+        - words:
+            The number of 64 bit words in each bitset of objects.
+
+    Representation Invariants:
+        - len(self.cell_x) == len(self.cell_y) == len(self.cell_location) == len(self.neighbours)
+        - len(self.points) == len(self.world.objects)
+    """
+    world: World
+    cell_x: np.ndarray
+    cell_y: np.ndarray
+    cell_location: np.ndarray
+    neighbours: np.ndarray
+    exam_cell: int
+    location_points: np.ndarray
+    mission_locations: np.ndarray
+    points: np.ndarray
+    moves_back: np.ndarray
+    is_mission_item: np.ndarray
+    is_power_up: np.ndarray
+    furniture_of: np.ndarray
+    home: np.ndarray
+    mission_furniture: np.ndarray
+    required: Optional[np.ndarray]
+    words: int
+    # The number of each walkable cell, by its (x, y) coordinates
+    _cells: dict[tuple[int, int], int]
+    # The number of each location, by its location number
+    _locations: dict[int, int]
+    # The id of each object, by its name
+    _ids: dict[str, int]
+    # The compiled commands: the number of each, by its text and the answer to its prompt, and the kind and the
+    # two arguments of each, by its number
+    _commands: dict[tuple[str, str], int]
+    _rules: list[tuple[int, int, int]]
+    _rule_table: np.ndarray
+
+    def __init__(self, world: World) -> None:
+        """Compile the given world, whose interactables have been added to its locations.
+
+        Raise ValueError if two interactables of world have the same name, since commands name them.
+
+        Preconditions:
+            - every walkable cell of world.map is the number of a location of world
+        """
+        self.world = world
+        self._locations = {location_num: i for i, location_num in enumerate(world.location_index)}
+        locations = list(world.location_index.values())
+        self.location_points = np.array([location.points for location in locations], dtype=np.int32)
+
+        cells = [(x, y, location_num) for x, y, location_num in walkable_cells(world.map)]
+        self._cells = {(x, y): i for i, (x, y, _) in enumerate(cells)}
+        self.cell_x = np.array([x for x, _, _ in cells], dtype=np.int32)
+        self.cell_y = np.array([y for _, y, _ in cells], dtype=np.int32)
+        self.cell_location = np.array([self._locations[location_num] for _, _, location_num in cells],
+                                      dtype=np.int32)
+        self.neighbours = np.array([[self._cells.get((x + dx, y + dy), -1) for dx, dy in DIRECTIONS.values()]
+                                    for x, y, _ in cells], dtype=np.int32).reshape(len(cells), len(DIRECTIONS))
+        self.exam_cell = self._cells.get(world.exam, -1)
+
+        objects = world.objects
+        self._ids = {}
+        for i, interactable in enumerate(objects):
+            if interactable.name in self._ids:
+                raise ValueError(f'two interactables are named {interactable.name!r}')
+            self._ids[interactable.name] = i
+        self.words = max(1, (len(objects) + 63) // 64)
+        self.points = np.array([interactable.points for interactable in objects], dtype=np.int32)
+        self.moves_back = np.array([interactable.moves_back if isinstance(interactable, PowerUp) else 0
+                                    for interactable in objects], dtype=np.int32)
+        self.is_mission_item = np.array([isinstance(interactable, MissionItem) for interactable in objects], dtype=bool)
+        self.is_power_up = np.array([isinstance(interactable, PowerUp) for interactable in objects], dtype=bool)
+
+        self.furniture_of = np.full(len(objects), -1, dtype=np.int32)
+        self.home = np.full(len(objects), -1, dtype=np.int32)
+        for location_num, interactables in world.interactables.items():
+            for interactable in interactables:
+                if isinstance(interactable, Furniture) and location_num in self._locations:
+                    self.home[self._ids[interactable.name]] = self._locations[location_num]
+                    for item in interactable.items:
+                        self.furniture_of[self._ids[item.name]] = self._ids[interactable.name]
+
+        self.mission_furniture = np.full((len(objects), 3), -1, dtype=np.int32)
+        for i, interactable in enumerate(objects):
+            if isinstance(interactable, MissionFurniture):
+                self.mission_furniture[i] = [self._mission_item(interactable.item_given),
+                                             self._id(interactable.item_to_deliver, Item),
+                                             self._mission_item(interactable.item_to_receive)]
+        self.mission_locations = np.array([(self._locations[location.num], self._id(location.item_to_deliver, Item),
+                                            self._mission_item(location.item_to_receive))
+                                           for location in locations if isinstance(location, MissionLocation)],
+                                          dtype=np.int32).reshape(-1, 3)
+
+        required = [self._id(name, Item) for name in world.required_items]
+        self.required = np.array(required, dtype=np.intp) if -1 not in required else None
+
+        self._commands = {}
+        self._rules = []
+        self._rule_table = np.zeros((0, 3), dtype=np.int32)
+
+    def _id(self, name: str, kind: type) -> int:
+        """Return the id of the object of the given kind named name, or -1 if there is none."""
+        i = self._ids.get(name, -1)
+        return i if i != -1 and isinstance(self.world.objects[i], kind) else -1
+
+    def _mission_item(self, name: str) -> int:
+        """Return the id of the MissionItem named name, or -1 if there is none."""
+        return self._id(name, MissionItem)
+
+    def cell(self, x: int, y: int) -> int:
+        """Return the number of the walkable cell at (x, y), or -1 if there is none."""
+        return self._cells.get((x, y), -1)
+
+    def command(self, text: str, answer: str = '') -> int:
+        """Return the number of the rule for the command in text, such as 'pick tcard', compiling it if it has
+        not been compiled yet. If the command opens a LockedFurniture, answer is the key the player enters.
+
+        Raise ValueError if the command changes a game in a way that BulkGames does not model.
+
+        Preconditions:
+            - text is in lower case, without leading and trailing whitespace, as take_turn is given it
+        """
+        key = (text, answer)
+        if key not in self._commands:
+            self._commands[key] = len(self._rules)
+            self._rules.append(self._compile(text, answer))
+        return self._commands[key]
+
+    def _compile(self, text: str, answer: str) -> tuple[int, int, int]:
+        """Return the kind and the two arguments of the rule for the command in text, as described in command."""
+        if text == 'quit':
+            return QUIT, -1, -1
+        command = parse_command(text)
+        verb, name = command.verb, command.arg
+        if verb == 'go':
+            return (GO, list(DIRECTIONS).index(name), -1) if name in DIRECTIONS else (NOTHING, -1, -1)
+        elif verb == 'pick':
+            return PICK, self._id(name, Item), -1
+        elif verb == 'drop':
+            return DROP, self._id(name, Item), -1
+        elif verb == 'open':
+            furniture = self._id(name, Furniture)
+            if furniture == -1 or 'open' not in self.world.objects[furniture].actions:
+                return NOTHING, -1, -1
+            obj = self.world.objects[furniture]
+            return OPEN, furniture, int(not isinstance(obj, LockedFurniture) or answer == obj.key)
+        elif verb in PRINTING_VERBS or verb == 'quit':
+            return NOTHING, -1, -1
+        elif verb in COMMANDS:
+            raise ValueError(f'the effects of {verb!r} commands are not modelled')
+
+        # The action of an interactable, which only changes the game if it is the action of a MissionFurniture
+        furniture = self._id(name, MissionFurniture)
+        if furniture != -1 and verb in self.world.objects[furniture].actions:
+            if verb == 'examine':
+                return EXAMINE, furniture, -1
+            elif verb == 'deliver':
+                return DELIVER, furniture, -1
+        return NOTHING, -1, -1
+
+    def rules(self) -> np.ndarray:
+        """Return the kind and the two arguments of every compiled rule, one row per rule."""
+        if len(self._rule_table) != len(self._rules):
+            self._rule_table = np.array(self._rules, dtype=np.int32).reshape(-1, 3)
+        return self._rule_table
+
+
+class BulkGames:
+    """Many games of one world, played a command at a time in every game at once.
+
+    Instance Attributes:
+        - rules:
+            The compiled world that these games are played in.
+        - cell:
+            The player's cell in each game.
+        - moves:
+            The player's moves in each game.
+        - score:
+            The player's score in each game.
+        - victory:
+            Whether the player has won each game.
+        - quit:
+            Whether the player has quit each game.
+        - inventory:
+            The bitset of the objects in the player's inventory, in each game.
+        - picked_up:
+            The bitset of the items that have ever been picked up, in each game.
+        - stored:
+            The bitset of the items still stored in the furniture they were loaded in, in each game.
+        - opened:
+            The bitset of the furniture that has been opened, in each game.
+        - completed:
+            The bitset of the MissionItems whose mission has been completed, in each game.
+        - visited:
+            The bitset of the locations that have been visited, in each game.
+        - missions:
+            The bitset of the MissionLocations whose mission has been completed, in each game.
+        - place:
+            The location of each object in each game, or -1 if it is in the player's inventory.
+
+    Representation Invariants:
+        - all the attributes but rules have one row per game
+    """
+    rules: BulkWorld
+    cell: np.ndarray
+    moves: np.ndarray
+    score: np.ndarray
+    victory: np.ndarray
+    quit: np.ndarray
+    inventory: np.ndarray
+    picked_up: np.ndarray
+    stored: np.ndarray
+    opened: np.ndarray
+    completed: np.ndarray
+    visited: np.ndarray
+    missions: np.ndarray
+    place: np.ndarray
+
+    def __init__(self, rules: BulkWorld, player: Player, count: int) -> None:
+        """Initialize count games, each in the state of the game of player, and begin their turn as begin_turn
+        does, so that each player is about to enter their first command.
+
+        Preconditions:
+            - player.world is rules.world, or a fork of it
+            - the player is on a walkable cell
+        """
+        self.rules = rules
+        w = player.world
+        locations = list(w.location_index.values())
+
+        def bitset(flags: Iterable[bool], size: int) -> np.ndarray:
+            """Return the bitset with the bits of flags that are True, repeated for every game."""
+            bits = np.zeros((1, max(1, (size + 63) // 64)), dtype=np.uint64)
+            for i, flag in enumerate(flags):
+                if flag:
+                    bits[0, i >> 6] |= _ONE << np.uint64(i & 63)
+            return np.repeat(bits, count, axis=0)
+
+        self.cell = np.full(count, rules.cell(player.x, player.y), dtype=np.int32)
+        self.moves = np.full(count, player.moves, dtype=np.int32)
+        self.score = np.full(count, player.score, dtype=np.int32)
+        self.victory = np.full(count, player.victory, dtype=bool)
+        self.quit = np.zeros(count, dtype=bool)
+
+        ids = {id(interactable): i for i, interactable in enumerate(w.objects)}
+        in_inventory = {ids[id(item)] for item in player.inventory}
+        self.inventory = bitset((i in in_inventory for i in range(len(w.objects))), len(w.objects))
+        self.picked_up = bitset((getattr(obj, 'picked_up', False) for obj in w.objects), len(w.objects))
+        self.stored = bitset((bool(getattr(obj, 'stored_in_furniture', '')) for obj in w.objects), len(w.objects))
+        self.opened = bitset((getattr(obj, 'opened', False) for obj in w.objects), len(w.objects))
+        self.completed = bitset((isinstance(obj, MissionItem) and obj.mission_completed for obj in w.objects),
+                                len(w.objects))
+        self.visited = bitset((location.visited for location in locations), len(locations))
+        self.missions = bitset((isinstance(location, MissionLocation) and location.mission_completed
+                                for location in locations), len(locations))
+
+        place = np.full(len(w.objects), -1, dtype=np.int32)
+        for location_num, interactables in w.interactables.items():
+            for interactable in interactables:
+                place[ids[id(interactable)]] = rules._locations.get(location_num, -1)
+        self.place = np.repeat(place[np.newaxis], count, axis=0)
+
+        self._begin_turn(np.arange(count))
+
+    def __len__(self) -> int:
+        return len(self.cell)
+
+    def x(self) -> np.ndarray:
+        """Return the player's x coordinate in each game."""
+        return self.rules.cell_x[self.cell]
+
+    def y(self) -> np.ndarray:
+        """Return the player's y coordinate in each game."""
+        return self.rules.cell_y[self.cell]
+
+    def location(self) -> np.ndarray:
+        """Return the location of the player in each game."""
+        return self.rules.cell_location[self.cell]
+
+    def is_over(self) -> np.ndarray:
+        """Return whether each game is over, as is_game_over decides."""
+        return self.victory | (self.moves >= MAX_MOVES) | self.quit
+
+    def step(self, commands: np.ndarray) -> None:
+        """Play the command with rule number commands[k] in game k, for every game k that is not over,
+        and begin the next turn of every game that is not over afterwards.
+
+        Preconditions:
+            - len(commands) == len(self)
+            - every number in commands was returned by self.rules.command
+        """
+        rules = self.rules
+        playing = np.flatnonzero(~self.is_over())
+        kinds, first, second = rules.rules()[np.asarray(commands)[playing]].T
+
+        quitting = playing[kinds == QUIT]
+        self.quit[quitting] = True
+
+        going = kinds == GO
+        games, destinations = playing[going], rules.neighbours[self.cell[playing[going]], first[going]]
+        moved = destinations != -1
+        self.cell[games[moved]] = destinations[moved]
+        self.moves[games[moved]] += 1
+
+        for kind, action in ((PICK, self._pick), (DROP, self._drop), (OPEN, self._open),
+                             (EXAMINE, self._examine), (DELIVER, self._deliver)):
+            chosen = (kinds == kind) & (first != -1)
+            if kind == OPEN:
+                chosen &= second == 1
+            if chosen.any():
+                action(playing[chosen], first[chosen])
+
+        playing = playing[kinds != QUIT]
+        if rules.required is not None and rules.exam_cell != -1:
+            winning = playing[(self.cell[playing] == rules.exam_cell) & (self.moves[playing] < MAX_MOVES)]
+            for item in rules.required:
+                winning = winning[_has(self.inventory, winning, np.full(len(winning), item))]
+            self.victory[winning] = True
+
+        self._begin_turn(playing[~self.is_over()[playing]])
+
+    def _at(self, games: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        """Return whether object ids[k] is at the location of the player of game games[k], for each k."""
+        return self.place[games, ids] == self.rules.cell_location[self.cell[games]]
+
+    def _pick(self, games: np.ndarray, items: np.ndarray) -> None:
+        """Pick up item items[k] in game games[k], for each k, as World.pick does."""
+        rules = self.rules
+        ok = ~_has(self.inventory, games, items) & self._at(games, items)
+        mission_items = rules.is_mission_item[items]
+        ok &= ~mission_items | _has(self.completed, games, items)
+        furniture = rules.furniture_of[items]
+        closed = ~_has(self.opened, games, np.maximum(furniture, 0))
+        ok &= mission_items | rules.is_power_up[items] | ~(_has(self.stored, games, items) & closed)
+        games, items = games[ok], items[ok]
+
+        first_time = ~_has(self.picked_up, games, items)
+        self.score[games[first_time]] += rules.points[items[first_time]]
+        _add(self.picked_up, games, items)
+        # A PowerUp gives its moves back both in Player.add_to_inv and in World.pick
+        self.moves[games] += 2 * rules.moves_back[items]
+        _add(self.inventory, games, items)
+        self.place[games, items] = -1
+
+    def _drop(self, games: np.ndarray, items: np.ndarray) -> None:
+        """Drop item items[k] in game games[k], for each k, as World.drop does."""
+        held = _has(self.inventory, games, items)
+        games, items = games[held], items[held]
+        _discard(self.inventory, games, items)
+        _discard(self.stored, games, items)
+        self.place[games, items] = self.rules.cell_location[self.cell[games]]
+
+    def _open(self, games: np.ndarray, furniture: np.ndarray) -> None:
+        """Open furniture furniture[k] in game games[k], for each k, as World.open does with the right key."""
+        here = self.rules.cell_location[self.cell[games]]
+        ok = (self.rules.home[furniture] == here) & ~_has(self.opened, games, furniture)
+        games, furniture = games[ok], furniture[ok]
+        self.score[games] += self.rules.points[furniture]
+        _add(self.opened, games, furniture)
+
+    def _receive(self, games: np.ndarray, received: np.ndarray, delivered: np.ndarray) -> np.ndarray:
+        """Complete the mission of the MissionItem received[k] and deliver delivered[k] in game games[k], for each k
+        where the player has delivered[k] and received[k] is at their location, as the check_delivery methods do.
+        Return which of the games those are.
+        """
+        ok = (received != -1) & (delivered != -1)
+        ok[ok] = _has(self.inventory, games[ok], delivered[ok]) & self._at(games[ok], received[ok])
+        games, received, delivered = games[ok], received[ok], delivered[ok]
+        _add(self.completed, games, received)
+        self._pick(games, received)
+        self._drop(games, delivered)
+        return ok
+
+    def _examine(self, games: np.ndarray, furniture: np.ndarray) -> None:
+        """Examine the MissionFurniture furniture[k] in game games[k], for each k,
+        as MissionFurniture.do_action does.
+        """
+        given = self.rules.mission_furniture[furniture, 0]
+        ok = (self.rules.home[furniture] == self.rules.cell_location[self.cell[games]]) & (given != -1)
+        ok[ok] = self._at(games[ok], given[ok])
+        _add(self.completed, games[ok], given[ok])
+        self._pick(games[ok], given[ok])
+
+    def _deliver(self, games: np.ndarray, furniture: np.ndarray) -> None:
+        """Deliver to the MissionFurniture furniture[k] in game games[k], for each k, as MissionFurniture.do_action
+        does.
+        """
+        ok = self.rules.home[furniture] == self.rules.cell_location[self.cell[games]]
+        games, furniture = games[ok], furniture[ok]
+        self._receive(games, self.rules.mission_furniture[furniture, 2], self.rules.mission_furniture[furniture, 1])
+
+    def _begin_turn(self, games: np.ndarray) -> None:
+        """Visit the location of the player of each of games, and check their delivery if it is a MissionLocation,
+        as begin_turn does.
+        """
+        rules = self.rules
+        locations = self.rules.cell_location[self.cell[games]]
+        first_time = ~_has(self.visited, games, locations)
+        self.score[games[first_time]] += rules.location_points[locations[first_time]]
+        _add(self.visited, games, locations)
+
+        for location, delivered, received in rules.mission_locations:
+            here = games[(locations == location)]
+            here = here[~_has(self.missions, here, np.full(len(here), location))]
+            if len(here):
+                done = self._receive(here, np.full(len(here), received), np.full(len(here), delivered))
+                _add(self.missions, here[done], np.full(int(done.sum()), location))
+
+
+def differences(definition: WorldDefinition, commands: Iterable[str]) -> list[str]:
+    """Play commands in a new game of definition and in BulkGames of the same game, side by side, and return a
+    description of every turn after which they are in different states. Prompts read the next command, as in a
+    transcript.
+    """
+    w, p = definition.new_game()
+    p.output = NullSink()
+    lines = iter(commands)
+    answers = []
+
+    def read_answer(prompt: str = '') -> str:
+        """Return the next command, as the answer to prompt."""
+        answers.append(next(lines))
+        return answers[-1]
+
+    p.input_source = read_answer
+    rules = BulkWorld(w)
+    games = BulkGames(rules, p, 1)
+    location = begin_turn(w, p)
+    found = []
+    turn = 0
+    for command in lines:
+        if is_game_over(p, False):
+            break
+        turn += 1
+        command = command.lower().strip()
+        answers.clear()
+        quit_game = take_turn(w, p, location, command, MENU)
+        if not is_game_over(p, quit_game):
+            location = begin_turn(w, p)
+        games.step(np.array([rules.command(command, answers[0] if answers else '')]))
+
+        expected = (p.x, p.y, p.moves, p.score, p.victory, quit_game,
+                    sorted(w.objects.index(item) for item in p.inventory))
+        actual = (int(games.x()[0]), int(games.y()[0]), int(games.moves[0]), int(games.score[0]),
+                  bool(games.victory[0]), bool(games.quit[0]),
+                  [i for i in range(len(w.objects)) if _has(games.inventory, np.array([0]), np.array([i]))[0]])
+        if expected != actual:
+            found.append(f'turn {turn} ({command!r}): the game is in {expected}, the bulk engine in {actual}')
+        if quit_game:
+            break
+    return found
+
+
+if __name__ == '__main__':
+    world_definition = WorldDefinition.from_files()
+    for path in sys.argv[1:]:
+        with open(path) as transcript:
+            # The first line of a transcript answers the "Press ENTER to continue." prompt
+            transcript_commands = transcript.read().splitlines()[1:]
+        problems = differences(world_definition, transcript_commands)
+        print(f'{path}: {"agrees" if not problems else f"{len(problems)} differences"}')
+        for problem in problems:
+            print(f'\t{problem}')
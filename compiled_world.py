@@ -0,0 +1,300 @@
+"""CSC111 Project 1: Compiled Worlds
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module compiles the map, locations and items text files of a world into a single
+packed binary file, and loads worlds from that file. Loading memory-maps the file: the map,
+locations and interactables are built from fixed-size integer records without parsing any text,
+and location descriptions are only decoded the first time they are read.
+
+    python compiled_world.py world.bin [MAP LOCATIONS ITEMS]
+
+A compiled file starts with a header of MAGIC, FORMAT_VERSION and the (offset, size) in bytes of
+each section in SECTIONS. All integers are little-endian, and every section starts on an 8 byte boundary.
+
+    rows:           the length of each row of the map (int32)
+    cells:          the location numbers of the map, row by row (int32)
+    coordinates:    (number, x, y) of each location number on the map (int32)
+    locations:      (number, points, item to deliver, item to receive, items needed to win) of each location (int32)
+    objects:        OBJECT_FIELDS of each interactable, in the order of World.objects (int32)
+    actions:        (action, output) of every action of every interactable (int32)
+    strings:        the strings referred to by the records above, separated by NUL characters (UTF-8)
+    bounds:         the offsets of the brief and long description of each location in descriptions (int64)
+    descriptions:   the descriptions of the locations (UTF-8)
+
+Strings are referred to by their index in the strings section, or -1 for no string. The items needed to win
+at an ExamLocation are one string of their names separated by commas, and are -1 at every other location.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2024 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import mmap
+import struct
+import sys
+from array import array
+from itertools import islice
+from typing import Union
+
+from adventure import START_X, START_Y
+from game_data import (ActionTables, DescriptionSource, ExamLocation, Furniture, Interactables, Item, LockedFurniture,
+                       Location, MissionFurniture, MissionItem, MissionLocation, PausedGC, Player, PowerUp, World)
+from game_output import PRINT_SINK
+
+MAGIC = b'CSCW'
+FORMAT_VERSION = 2
+SECTIONS = ('rows', 'cells', 'coordinates', 'locations', 'objects', 'actions', 'strings', 'bounds', 'descriptions')
+HEADER = struct.Struct('<4sI' + 'QQ' * len(SECTIONS))
+
+# The interactable classes, indexed by the kind stored in their records
+KINDS = (Item, Furniture, LockedFurniture, MissionFurniture, PowerUp, MissionItem)
+OBJECT_FIELDS = ('kind', 'location', 'container', 'name', 'points', 'stored_in_furniture', 'moves_back', 'key',
+                 'item_given', 'item_to_deliver', 'item_to_receive', 'actions_count')
+
+LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+class CompiledWorldError(Exception):
+    """Raised when a file is not a compiled world that this module can load."""
+
+
+class _StringTable:
+    """The strings of a compiled world, each stored once."""
+    strings: list[str]
+    _ids: dict[str, int]
+
+    def __init__(self) -> None:
+        self.strings = []
+        self._ids = {}
+
+    def add(self, string: Union[str, None]) -> int:
+        """Return the index of string in this table, adding it if it is new, or -1 if string is None or empty."""
+        if not string:
+            return -1
+        if string not in self._ids:
+            self._ids[string] = len(self.strings)
+            self.strings.append(string)
+        return self._ids[string]
+
+
+def _packed(typecode: str, values: list[int]) -> bytes:
+    """Return values as little-endian integers of the given array typecode."""
+    packed = array(typecode, values)
+    if not LITTLE_ENDIAN:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpacked(view: memoryview, typecode: str) -> Union[memoryview, array]:
+    """Return the little-endian integers of the given array typecode in view, without copying them if possible."""
+    if LITTLE_ENDIAN:
+        return view.cast(typecode)
+    values = array(typecode, view)
+    values.byteswap()
+    return values
+
+
+def compile_world(world: World) -> bytes:
+    """Return the compiled form of the given world, which no player has played in."""
+    strings = _StringTable()
+
+    rows = [len(row) for row in world.map]
+    cells = [location_number for row in world.map for location_number in row]
+    coordinates = [value for location_number, (x, y) in world.coordinates.items() for value in (location_number, x, y)]
+
+    locations = []
+    descriptions = []
+    for location in world.locations:
+        if isinstance(location, MissionLocation):
+            mission = [strings.add(location.item_to_deliver), strings.add(location.item_to_receive)]
+        else:
+            mission = [-1, -1]
+        required = strings.add(','.join(location.required_items)) if isinstance(location, ExamLocation) else -1
+        locations.extend([location.num, location.points] + mission + [required])
+        descriptions.extend([location.brief.encode(), location.long.encode()])
+    bounds = [0]
+    for description in descriptions:
+        bounds.append(bounds[-1] + len(description))
+
+    ids = {id(interactable): i for i, interactable in enumerate(world.objects)}
+    containers = {}
+    for interactable in world.objects:
+        if isinstance(interactable, Furniture):
+            for item in interactable.items:
+                containers[id(item)] = ids[id(interactable)]
+
+    objects = []
+    actions = []
+    for location_number, interactables in world.interactables.items():
+        for interactable in interactables:
+            record = dict.fromkeys(OBJECT_FIELDS, -1)
+            record.update(kind=KINDS.index(type(interactable)), location=location_number,
+                          container=containers.get(id(interactable), -1), name=strings.add(interactable.name),
+                          points=interactable.points, actions_count=len(interactable.actions))
+            if isinstance(interactable, Item):
+                record['stored_in_furniture'] = strings.add(interactable.stored_in_furniture)
+            if isinstance(interactable, PowerUp):
+                record['moves_back'] = interactable.moves_back
+            elif isinstance(interactable, LockedFurniture):
+                record['key'] = strings.add(interactable.key)
+            elif isinstance(interactable, MissionFurniture):
+                record.update(item_given=strings.add(interactable.item_given),
+                              item_to_deliver=strings.add(interactable.item_to_deliver),
+                              item_to_receive=strings.add(interactable.item_to_receive))
+            objects.extend(record.values())
+            for action, output in interactable.actions.items():
+                actions.extend([strings.add(action), strings.add(output)])
+
+    sections = {
+        'rows': _packed('i', rows),
+        'cells': _packed('i', cells),
+        'coordinates': _packed('i', coordinates),
+        'locations': _packed('i', locations),
+        'objects': _packed('i', objects),
+        'actions': _packed('i', actions),
+        'strings': '\0'.join(strings.strings).encode(),
+        'bounds': _packed('q', bounds),
+        'descriptions': b''.join(descriptions),
+    }
+
+    header_fields = []
+    body = bytearray()
+    for name in SECTIONS:
+        body.extend(b'\0' * (-(HEADER.size + len(body)) % 8))
+        header_fields.extend([HEADER.size + len(body), len(sections[name])])
+        body.extend(sections[name])
+    return HEADER.pack(MAGIC, FORMAT_VERSION, *header_fields) + bytes(body)
+
+
+def compile_files(path: str, files: tuple[str, str, str] = ('map.txt', 'locations.txt', 'items.txt')) -> int:
+    """Compile the world in the given map, locations and items files into the file at path,
+    and return the size of the compiled world in bytes.
+    """
+    with open(files[0]) as map_file, open(files[1]) as locations_file, open(files[2]) as items_file:
+        world = World(map_file, locations_file, items_file)
+    compiled = compile_world(world)
+    with open(path, 'wb') as f:
+        f.write(compiled)
+    return len(compiled)
+
+
+def load_compiled(path: str) -> World:
+    """Return the world compiled in the file at path, with its interactables added to its locations.
+
+    The file is memory-mapped for as long as the world, or any fork of it, is in use.
+    """
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(buffer) < HEADER.size:
+        raise CompiledWorldError(f'{path} is not a compiled world')
+    magic, version, *header_fields = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise CompiledWorldError(f'{path} is not a compiled world')
+    if version != FORMAT_VERSION:
+        raise CompiledWorldError(f'{path} is compiled in format version {version}, not {FORMAT_VERSION}')
+
+    view = memoryview(buffer)
+    sections = {name: view[header_fields[2 * i]:header_fields[2 * i] + header_fields[2 * i + 1]]
+                for i, name in enumerate(SECTIONS)}
+    with PausedGC():
+        return _build_world(sections)
+
+
+def _build_world(sections: dict[str, memoryview]) -> World:
+    """Return the world in the given sections of a compiled world, with its interactables added to its locations."""
+    # The empty string is added at the end, so that strings[-1] is the empty string
+    strings = str(sections['strings'], 'utf-8').split('\0') + ['']
+
+    world = World.__new__(World)
+    world.output = PRINT_SINK
+    world.navigation = None
+
+    world.map = []
+    cells = _unpacked(sections['cells'], 'i')
+    start = 0
+    for row_length in _unpacked(sections['rows'], 'i'):
+        world.map.append(cells[start:start + row_length].tolist())
+        start += row_length
+
+    coordinates = _unpacked(sections['coordinates'], 'i').tolist()
+    world.coordinates = dict(zip(coordinates[0::3], zip(coordinates[1::3], coordinates[2::3])))
+
+    bounds = _unpacked(sections['bounds'], 'q')
+    descriptions = DescriptionSource(sections['descriptions'], bounds[:-1], bounds[1:])
+    locations = _unpacked(sections['locations'], 'i').tolist()
+    world.locations = []
+    world.location_index = {}
+    for i, (location_number, points, item_to_deliver, item_to_receive, required) in enumerate(
+            zip(*[iter(locations)] * 5)):
+        if required != -1:
+            location = ExamLocation(location_number, points, '', '',
+                                    tuple(name for name in strings[required].split(',') if name))
+        elif item_to_deliver == -1:
+            location = Location(location_number, points, '', '')
+        else:
+            location = MissionLocation(location_number, points, '', '',
+                                       strings[item_to_deliver], strings[item_to_receive])
+        location.describe_from(descriptions, 2 * i, 2 * i + 1)
+        world.locations.append(location)
+        world.location_index.setdefault(location_number, location)
+
+    world.objects = []
+    world.interactables = {}
+    records = _unpacked(sections['objects'], 'i').tolist()
+    action_strings = [strings[string] for string in _unpacked(sections['actions'], 'i').tolist()]
+    action_pairs = zip(action_strings[0::2], action_strings[1::2])
+    action_tables = ActionTables()
+    for (kind, location_number, container, name, points, stored_in_furniture, moves_back, key,
+         item_given, item_to_deliver, item_to_receive, actions_count) in zip(*[iter(records)] * len(OBJECT_FIELDS)):
+        interactable_actions = dict(islice(action_pairs, actions_count))
+
+        kind = KINDS[kind]
+        if kind is MissionFurniture:
+            interactable = MissionFurniture(strings[name], points, interactable_actions, strings[item_given],
+                                            strings[item_to_deliver], strings[item_to_receive])
+        elif kind is LockedFurniture:
+            interactable = LockedFurniture(strings[name], points, strings[key])
+        elif kind is PowerUp:
+            interactable = PowerUp(strings[name], points, None, moves_back)
+        elif kind is Furniture:
+            interactable = Furniture(strings[name], points)
+        else:
+            interactable = kind(strings[name], points)
+        # The actions were compiled after loading, so they are used as they are
+        interactable.actions = action_tables.intern(interactable_actions)
+        if issubclass(kind, Item):
+            interactable.stored_in_furniture = strings[stored_in_furniture]
+        if container != -1:
+            world.objects[container].store(interactable)
+        world.objects.append(interactable)
+        if location_number not in world.interactables:
+            world.interactables[location_number] = Interactables()
+        world.interactables[location_number].append(interactable)
+    world.index_conditions()
+
+    world.add_interactables_to_locations()
+    world.add_actions_to_locations()
+    return world
+
+
+def new_compiled_game(path: str) -> tuple[World, Player]:
+    """Return a new World loaded from the compiled world in the file at path and a Player at the starting location."""
+    w = load_compiled(path)
+    return w, Player(START_X, START_Y, w)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in {2, 5}:
+        print('usage: python compiled_world.py OUTPUT [MAP LOCATIONS ITEMS]')
+        sys.exit(2)
+    size = compile_files(sys.argv[1], tuple(sys.argv[2:5])) if len(sys.argv) == 5 else compile_files(sys.argv[1])
+    print(f'compiled {size} bytes into {sys.argv[1]}')
@@ -19,12 +19,826 @@ please consult our Course Syllabus.
 This file is Copyright (c) 2024 CSC111 Teaching Team
 """
 from __future__ import annotations
-from typing import Optional, TextIO, Union
+import copy
+import gc
 
-import python_ta
-python_ta.check_all(config={
-    'max-line-length': 120
-})
+from game_output import PRINT_SINK, OutputSink
+
+# The typing module is only needed by type checkers, since annotations are not evaluated.
+# It is not imported at runtime because importing it dominates the time to import this module.
+_TYPE_CHECKING = False
+if _TYPE_CHECKING:
+    from array import array
+    from typing import BinaryIO, Callable, Iterable, Iterator, Optional, Sequence, TextIO, Union
+    from navigation import NavigationIndex
+
+
+class PausedGC:
+    """A context manager pausing cyclic garbage collection, for loading worlds.
+
+    Loading only creates objects that stay alive, and each collection triggered by the new objects
+    would scan all of them again for nothing, which makes loading large worlds much slower.
+    """
+    _was_enabled: bool
+
+    def __enter__(self) -> None:
+        self._was_enabled = gc.isenabled()
+        gc.disable()
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._was_enabled:
+            gc.enable()
+
+
+class WorldFileError(Exception):
+    """Raised when a world file is not in the expected format.
+
+    Instance Attributes:
+        - filename:
+            The name of the world file.
+        - line_number:
+            The number of the line of the world file where the problem was found, starting from 1.
+    """
+    filename: str
+    line_number: int
+
+    def __init__(self, filename: str, line_number: int, message: str) -> None:
+        super().__init__(f'{filename}:{line_number}: {message}')
+        self.filename = filename
+        self.line_number = line_number
+
+    @staticmethod
+    def unexpected(filename: str, line_number: int, expected: str, line: str) -> WorldFileError:
+        """Return an error saying that the given line was read where something else was expected."""
+        return WorldFileError(filename, line_number,
+                              f'expected {expected}, got {repr(line.strip()) if line else "the end of the file"}')
+
+
+class DescriptionSource:
+    """Location descriptions that are decoded on demand from a buffer, such as a memory-mapped file,
+    instead of being kept in memory. The most recently read descriptions are cached.
+
+    Instance Attributes:
+        - buffer:
+            The UTF-8 encoded text of the descriptions.
+        - starts:
+            The offset in buffer that each description slot starts at.
+        - ends:
+            The offset in buffer that each description slot ends at.
+        - cache_size:
+            The greatest number of decoded descriptions kept in the cache.
+
+    Representation Invariants:
+        - len(self.starts) == len(self.ends)
+        - self.cache_size > 0
+        - len(self._cache) <= self.cache_size
+    """
+    buffer: Union[bytes, memoryview]
+    starts: Sequence[int]
+    ends: Sequence[int]
+    cache_size: int
+    _cache: dict[int, str]
+
+    def __init__(self, buffer: Union[bytes, memoryview], starts: Sequence[int], ends: Sequence[int],
+                 cache_size: int = 256) -> None:
+        """Initialize a new source of the descriptions in buffer, where slot i is buffer[starts[i]:ends[i]]."""
+        self.buffer = buffer
+        self.starts = starts
+        self.ends = ends
+        self.cache_size = cache_size
+        self._cache = {}
+
+    def add(self, start: int, end: int) -> int:
+        """Add a description slot for buffer[start:end], and return the new slot.
+
+        Preconditions:
+            - self.starts and self.ends can be appended to
+        """
+        self.starts.append(start)
+        self.ends.append(end)
+        return len(self.starts) - 1
+
+    def get(self, slot: int) -> str:
+        """Return the description in the given slot.
+        Line endings are translated to '\\n', as when a file is read in text mode.
+        """
+        # The cache is a dict kept in order from least to most recently used
+        cache = self._cache
+        text = cache.pop(slot, None)
+        if text is None:
+            text = str(self.buffer[self.starts[slot]:self.ends[slot]], 'utf-8')
+            if '\r' in text:
+                text = text.replace('\r\n', '\n')
+            if len(cache) >= self.cache_size:
+                del cache[next(iter(cache))]
+        cache[slot] = text
+        return text
+
+
+class SparseMap:
+    """A map that keeps only its walkable cells, for huge maps that are mostly blocked.
+
+    A SparseMap is read like the nested list of World.map: self[y][x] is the location number at (x, y),
+    or -1 if that cell is blocked, and indexing outside the map raises IndexError. Negative indices count
+    from the end, as they do for lists. The walkable cells are kept in compressed sparse rows: the walkable
+    cells of row y are those at self.row_starts[y] up to self.row_starts[y + 1] in self.xs, in increasing order,
+    and self.numbers holds their location numbers. A cell is found by binary search in its row.
+
+    Instance Attributes:
+        - row_lengths:
+            The length of each row of the map, including its blocked cells.
+        - row_starts:
+            The index in self.xs of the first walkable cell of each row, followed by the number of walkable cells.
+        - xs:
+            The x coordinate of each walkable cell, row by row.
+        - numbers:
+            The location number of each walkable cell, row by row.
+
+    Representation Invariants:
+        - len(self.row_starts) == len(self.row_lengths) + 1
+        - len(self.xs) == len(self.numbers) == self.row_starts[-1]
+        - -1 not in self.numbers
+    """
+    row_lengths: array
+    row_starts: array
+    xs: array
+    numbers: array
+
+    def __init__(self) -> None:
+        """Initialize a new map with no rows."""
+        # Imported here, since most maps are nested lists and the array module is slow to import
+        from array import array
+        self.row_lengths = array('i')
+        self.row_starts = array('q', [0])
+        self.xs = array('i')
+        self.numbers = array('i')
+
+    @staticmethod
+    def from_rows(rows: Iterable[Iterable[int]]) -> SparseMap:
+        """Return a sparse map of the given rows of location numbers, where -1 is a blocked cell."""
+        world_map = SparseMap()
+        for row in rows:
+            row = list(row)
+            world_map.append_row(len(row), [(x, n) for x, n in enumerate(row) if n != -1])
+        return world_map
+
+    def append_row(self, length: int, cells: Iterable[tuple[int, int]]) -> None:
+        """Add a row of the given length to the bottom of this map, with the given (x, location number) walkable cells.
+
+        Preconditions:
+            - the cells are in increasing order of x, and 0 <= x < length for each of them
+        """
+        for x, location_number in cells:
+            self.xs.append(x)
+            self.numbers.append(location_number)
+        self.row_lengths.append(length)
+        self.row_starts.append(len(self.xs))
+
+    def __len__(self) -> int:
+        """Return the number of rows of this map."""
+        return len(self.row_lengths)
+
+    def __getitem__(self, y: int) -> _SparseRow:
+        """Return row y of this map."""
+        if y < 0:
+            y += len(self.row_lengths)
+        if not 0 <= y < len(self.row_lengths):
+            raise IndexError('map row index out of range')
+        return _SparseRow(self, y)
+
+    def __iter__(self) -> Iterator[_SparseRow]:
+        """Return an iterator over the rows of this map."""
+        return (_SparseRow(self, y) for y in range(len(self.row_lengths)))
+
+    def cell_index(self, x: int, y: int) -> int:
+        """Return the index of the walkable cell at (x, y) in self.xs, or -1 if that cell is blocked or off the map."""
+        if not 0 <= y < len(self.row_lengths):
+            return -1
+        # Imported here, since most maps are nested lists and do not need it
+        from bisect import bisect_left
+        start, end = self.row_starts[y], self.row_starts[y + 1]
+        i = bisect_left(self.xs, x, start, end)
+        return i if i < end and self.xs[i] == x else -1
+
+    def location_number(self, x: int, y: int) -> int:
+        """Return the location number at (x, y), or -1 if that cell is blocked or off the map."""
+        i = self.cell_index(x, y)
+        return -1 if i == -1 else self.numbers[i]
+
+    def walkable_cells(self) -> Iterator[tuple[int, int, int]]:
+        """Return an iterator over the (x, y, location number) of the walkable cells of this map, row by row."""
+        for y in range(len(self.row_lengths)):
+            for i in range(self.row_starts[y], self.row_starts[y + 1]):
+                yield self.xs[i], y, self.numbers[i]
+
+
+class _SparseRow:
+    """A row of a SparseMap, read like a list of location numbers."""
+    world_map: SparseMap
+    y: int
+
+    def __init__(self, world_map: SparseMap, y: int) -> None:
+        self.world_map = world_map
+        self.y = y
+
+    def __len__(self) -> int:
+        return self.world_map.row_lengths[self.y]
+
+    def __getitem__(self, x: int) -> int:
+        """Return the location number at x in this row, or -1 if that cell is blocked."""
+        length = self.world_map.row_lengths[self.y]
+        if x < 0:
+            x += length
+        if not 0 <= x < length:
+            raise IndexError('map row index out of range')
+        i = self.world_map.cell_index(x, self.y)
+        return -1 if i == -1 else self.world_map.numbers[i]
+
+    def __iter__(self) -> Iterator[int]:
+        """Return an iterator over every location number in this row, including -1 for each blocked cell."""
+        world_map = self.world_map
+        x = 0
+        for i in range(world_map.row_starts[self.y], world_map.row_starts[self.y + 1]):
+            while x < world_map.xs[i]:
+                yield -1
+                x += 1
+            yield world_map.numbers[i]
+            x += 1
+        for _ in range(x, len(self)):
+            yield -1
+
+
+def walkable_cells(world_map: Union[list[list[int]], SparseMap]) -> Iterator[tuple[int, int, int]]:
+    """Return an iterator over the (x, y, location number) of the walkable cells of world_map, row by row."""
+    if isinstance(world_map, SparseMap):
+        return world_map.walkable_cells()
+    return ((x, y, location_number) for y, row in enumerate(world_map) for x, location_number in enumerate(row)
+            if location_number != -1)
+
+
+class _LineReader:
+    """Reads the lines of a binary file of UTF-8 text like a file opened in text mode,
+    keeping track of where the last line read is in the file.
+
+    Instance Attributes:
+        - stream:
+            The binary file being read.
+        - line:
+            The last line read, as it is in the file.
+        - start:
+            The offset in the file of the start of the last line read.
+        - end:
+            The offset in the file of the end of the last line read, where the next line starts.
+    """
+    stream: BinaryIO
+    line: bytes
+    start: int
+    end: int
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self.stream = stream
+        self.line = b''
+        self.start = stream.tell()
+        self.end = self.start
+
+    def readline(self) -> str:
+        """Return the next line of the file, or '' at the end of the file."""
+        self.line = self.stream.readline()
+        self.start = self.end
+        self.end += len(self.line)
+        line = str(self.line, 'utf-8')
+        return line[:-2] + '\n' if line.endswith('\r\n') else line
+
+    def record_stripped(self, descriptions: DescriptionSource) -> int:
+        """Add the last line read, without leading and trailing whitespace, as a slot of descriptions,
+        and return the new slot.
+        """
+        start = self.start + len(self.line) - len(self.line.lstrip())
+        return descriptions.add(start, start + len(self.line.strip()))
+
+
+class _LinkedDict(dict):
+    """A dict whose keys are kept in order as a linked list, so that a removed key can be put back between the keys
+    that were around it in O(1) time. Keys are only added and removed with append, insert_after and discard,
+    which keep the order, but the values of the keys in it can be changed like those of any dict.
+
+    Representation Invariants:
+        - list(self) is the keys of this dict, each once
+    """
+    __slots__ = ('_links',)
+    # The keys of this dict, in order, as a circular linked list with None as its head: self._links[key] is
+    # [the key before key, the key after key], so self._links[None] is [the last key, the first key]
+    _links: dict
+
+    def __init__(self) -> None:
+        """Initialize a new, empty dict."""
+        self._links = {None: [None, None]}
+
+    def __iter__(self) -> Iterator:
+        links = self._links
+        key = links[None][1]
+        while key is not None:
+            yield key
+            key = links[key][1]
+
+    def __reversed__(self) -> Iterator:
+        links = self._links
+        key = links[None][0]
+        while key is not None:
+            yield key
+            key = links[key][0]
+
+    def __repr__(self) -> str:
+        return '{' + ', '.join(f'{key!r}: {self[key]!r}' for key in self) + '}'
+
+    def keys(self) -> list:
+        """Return the keys of this dict, in order."""
+        return list(self)
+
+    def values(self) -> list:
+        """Return the values of this dict, in the order of their keys."""
+        return [self[key] for key in self]
+
+    def items(self) -> list:
+        """Return the (key, value) pairs of this dict, in order."""
+        return [(key, self[key]) for key in self]
+
+    def append(self, key: object, value: object) -> None:
+        """Add key to the end of this dict with the given value.
+
+        Preconditions:
+            - key is not None and key not in self
+        """
+        self[key] = value
+        links = self._links
+        head = links[None]
+        last = head[0]
+        links[key] = [last, None]
+        links[last][1] = key
+        head[0] = key
+
+    def insert_after(self, previous: object, key: object, value: object) -> None:
+        """Add key to this dict with the given value, right after the key previous, or first if previous is None.
+
+        Preconditions:
+            - key is not None and key not in self
+            - previous is None or previous in self
+        """
+        self[key] = value
+        links = self._links
+        before = links[previous]
+        following = before[1]
+        links[key] = [previous, following]
+        before[1] = key
+        links[following][0] = key
+
+    def discard(self, key: object) -> object:
+        """Remove key from this dict, and return the key that was before it, or None if it was first.
+
+        Preconditions:
+            - key in self
+        """
+        del self[key]
+        links = self._links
+        previous, following = links.pop(key)
+        links[previous][1] = following
+        links[following][0] = previous
+        return previous
+
+    def clear(self) -> None:
+        """Remove every key from this dict."""
+        super().clear()
+        self._links = {None: [None, None]}
+
+
+class Interactables:
+    """An ordered collection of Item and Furniture objects, indexed by name.
+
+    Objects are kept in the order they were added, like a list. Adding, removing, finding an object
+    and finding the objects with a name take the same time however many objects are in the collection,
+    and so does putting a removed object back in its place.
+    The actions that can be performed on the objects are counted as objects are added and removed,
+    so the actions available in the collection are always up to date.
+
+    Representation Invariants:
+        - Every object in this collection is in it once
+        - list(self._by_name[name]) == [obj for obj in self if obj.name == name], for each name in self._by_name
+        - self._actions[action][name] == len([obj for obj in self.named(name) if action in obj.actions]),
+          for each action in self._actions and each name in self._actions[action]
+        - No count in self._actions is 0, and no mapping in self._actions is empty
+        - self._next[self._prev[obj]] is obj and self._prev[self._next[obj]] is obj, for each obj in self._next
+    """
+    # The objects in this collection, in order, as a circular linked list through the keys of these dicts, with None
+    # as its head: self._next[None] is the first object, and self._prev[None] is the last.
+    # A removed object can be put back after the object that was before it without moving any other object.
+    _next: dict[Optional[Union[Item, Furniture]], Optional[Union[Item, Furniture]]]
+    _prev: dict[Optional[Union[Item, Furniture]], Optional[Union[Item, Furniture]]]
+    # The objects with each name, in order
+    _by_name: dict[str, list[Union[Item, Furniture]]]
+    # The number of objects with each name that each action can be performed on. The actions and the names of each
+    # action are kept in _LinkedDicts, so that putting an object back also puts its name and actions back in order.
+    _actions: dict[str, dict[str, int]]
+
+    def __init__(self, objects: Iterable[Union[Item, Furniture]] = ()) -> None:
+        """Initialize a new collection of the given objects."""
+        self._next = {None: None}
+        self._prev = {None: None}
+        self._by_name = {}
+        self._actions = _LinkedDict()
+        self.extend(objects)
+
+    def __iter__(self) -> Iterator[Union[Item, Furniture]]:
+        following = self._next
+        obj = following[None]
+        while obj is not None:
+            yield obj
+            obj = following[obj]
+
+    def __len__(self) -> int:
+        return len(self._next) - 1
+
+    def __contains__(self, obj: object) -> bool:
+        return obj is not None and obj in self._next
+
+    def __repr__(self) -> str:
+        return f'Interactables({list(self)!r})'
+
+    def append(self, obj: Union[Item, Furniture]) -> None:
+        """Add obj to the end of this collection.
+
+        Preconditions:
+            - obj not in self
+        """
+        last = self._prev[None]
+        self._next[last] = obj
+        self._next[obj] = None
+        self._prev[None] = obj
+        self._prev[obj] = last
+        if obj.name in self._by_name:
+            self._by_name[obj.name].append(obj)
+        else:
+            self._by_name[obj.name] = [obj]
+        self._count_actions(obj)
+
+    def extend(self, objects: Iterable[Union[Item, Furniture]]) -> None:
+        """Add each of the given objects to the end of this collection, in order."""
+        for obj in objects:
+            self.append(obj)
+
+    def remove(self, obj: Union[Item, Furniture]) -> tuple[Optional[Union[Item, Furniture]], int,
+                                                           list[tuple[str, Optional[str], bool]]]:
+        """Remove obj from this collection, and return where it was, for put_back: the object before it
+        (or None, if it was first), its index among the objects with its name, and for each action that its name
+        was removed from, in order, that action, the name or action before it, and whether the action was removed.
+
+        Preconditions:
+            - obj in self
+        """
+        previous, following = self._prev.pop(obj), self._next.pop(obj)
+        self._next[previous] = following
+        self._prev[following] = previous
+        same_name = self._by_name[obj.name]
+        if len(same_name) == 1:
+            index = 0
+            del self._by_name[obj.name]
+        else:
+            index = same_name.index(obj)
+            del same_name[index]
+        removed = []
+        for action in obj.actions:
+            names = self._actions[action]
+            if names[obj.name] > 1:
+                names[obj.name] -= 1
+            elif len(names) > 1:
+                removed.append((action, names.discard(obj.name), False))
+            else:
+                removed.append((action, self._actions.discard(action), True))
+        return previous, index, removed
+
+    def put_back(self, obj: Union[Item, Furniture],
+                 place: tuple[Optional[Union[Item, Furniture]], int, list[tuple[str, Optional[str], bool]]]) -> None:
+        """Add obj back to where it was in this collection, given where remove returned it was.
+        The names and actions of this collection are put back in their order too.
+
+        Preconditions:
+            - obj not in self
+            - This collection has the same objects, in the same order, as just after obj was removed
+        """
+        previous, index, removed = place
+        self._link(obj, previous)
+        if obj.name in self._by_name:
+            self._by_name[obj.name].insert(index, obj)
+        else:
+            self._by_name[obj.name] = [obj]
+        for action, previous_key, action_removed in reversed(removed):
+            if action_removed:
+                names = _LinkedDict()
+                names.append(obj.name, 1)
+                self._actions.insert_after(previous_key, action, names)
+            else:
+                self._actions[action].insert_after(previous_key, obj.name, 1)
+        if len(removed) < len(obj.actions):
+            restored = [action for action, _, _ in removed]
+            for action in obj.actions:
+                if action not in restored:
+                    self._actions[action][obj.name] += 1
+
+    def _link(self, obj: Union[Item, Furniture], previous: Optional[Union[Item, Furniture]]) -> None:
+        """Link obj into the order of this collection, right after previous, or first if previous is None."""
+        following = self._next[previous]
+        self._next[previous] = obj
+        self._next[obj] = following
+        self._prev[following] = obj
+        self._prev[obj] = previous
+
+    def clear(self) -> None:
+        """Remove every object from this collection."""
+        self._next = {None: None}
+        self._prev = {None: None}
+        self._by_name.clear()
+        self._actions.clear()
+
+    @property
+    def actions(self) -> dict[str, dict[str, int]]:
+        """Return a mapping of each action that can be performed on an object in this collection to the names of
+        those objects, in the order the names were first added, each with the number of those objects with that name.
+        A name is added again when an object with it is added after every object with it was removed, but not when
+        a removed object is put back.
+        The result is kept up to date as objects are added and removed, and must not be mutated.
+        """
+        return self._actions
+
+    def recount_actions(self) -> None:
+        """Count the actions of the objects in this collection again.
+        This is only needed after the actions of an object in this collection are changed.
+        """
+        self._actions.clear()
+        for obj in self:
+            self._count_actions(obj)
+
+    def _count_actions(self, obj: Union[Item, Furniture]) -> None:
+        """Count each action of obj, which has just been added to this collection."""
+        for action in obj.actions:
+            if action in self._actions:
+                names = self._actions[action]
+                if obj.name in names:
+                    names[obj.name] += 1
+                else:
+                    names.append(obj.name, 1)
+            else:
+                names = _LinkedDict()
+                names.append(obj.name, 1)
+                self._actions.append(action, names)
+
+    def find_inconsistencies(self) -> list[str]:
+        """Return a description of each way that the name index or the action counts of this collection
+        are out of date, or [] if they are up to date.
+        """
+        by_name = {}
+        for obj in self:
+            by_name.setdefault(obj.name, []).append(obj)
+        problems = []
+        for name in by_name.keys() | self._by_name.keys():
+            if by_name.get(name) != self._by_name.get(name):
+                problems.append(f'the index of {name!r} is out of date')
+
+        actions = {}
+        for obj in self:
+            for action in obj.actions:
+                actions.setdefault(action, {}).setdefault(obj.name, 0)
+                actions[action][obj.name] += 1
+        for action in actions.keys() | self._actions.keys():
+            if actions.get(action) != self._actions.get(action):
+                problems.append(f'the count of action {action!r} is out of date')
+        for names in [self._actions, *self._actions.values()]:
+            if len(list(names)) != len(names):
+                problems.append(f'the order of {names!r} is out of date')
+        return problems
+
+    def named(self, name: str) -> Sequence[Union[Item, Furniture]]:
+        """Return the objects in this collection with the given name, in order. The result must not be mutated."""
+        return self._by_name.get(name, ())
+
+    def first(self, name: str, kind: type = object) -> Optional[Union[Item, Furniture]]:
+        """Return the first object in this collection with the given name that is an instance of kind,
+        or None if there is no such object.
+        """
+        for obj in self._by_name.get(name, ()):
+            if isinstance(obj, kind):
+                return obj
+        return None
+
+
+class Inventory(Interactables):
+    """The objects that a player has picked up: an ordered collection indexed by name, that also keeps the ids
+    of its objects as a bitmask, so that whether it holds any of a set of objects is one mask test.
+
+    Instance Attributes:
+        - mask:
+            The bitmask of the objects in this inventory: bit obj.obj_id is set for each obj in it.
+
+    Representation Invariants:
+        - self.mask == sum(1 << obj.obj_id for obj in self)
+
+    Preconditions:
+        - Every object added to this inventory has an id (obj.obj_id >= 0)
+    """
+    mask: int
+
+    def __init__(self, objects: Iterable[Union[Item, Furniture]] = ()) -> None:
+        """Initialize a new inventory of the given objects."""
+        self.mask = 0
+        super().__init__(objects)
+
+    def __repr__(self) -> str:
+        return f'Inventory({list(self)!r})'
+
+    def append(self, obj: Union[Item, Furniture]) -> None:
+        """Add obj to the end of this inventory.
+
+        Preconditions:
+            - obj not in self
+        """
+        super().append(obj)
+        self.mask |= 1 << obj.obj_id
+
+    def remove(self, obj: Union[Item, Furniture]) -> tuple[Optional[Union[Item, Furniture]], int,
+                                                           list[tuple[str, Optional[str], bool]]]:
+        """Remove obj from this inventory, and return where it was, for put_back.
+
+        Preconditions:
+            - obj in self
+        """
+        self.mask &= ~(1 << obj.obj_id)
+        return super().remove(obj)
+
+    def put_back(self, obj: Union[Item, Furniture],
+                 place: tuple[Optional[Union[Item, Furniture]], int, list[tuple[str, Optional[str], bool]]]) -> None:
+        """Add obj back to where it was in this inventory, given where remove returned it was."""
+        super().put_back(obj, place)
+        self.mask |= 1 << obj.obj_id
+
+    def clear(self) -> None:
+        """Remove every object from this inventory."""
+        super().clear()
+        self.mask = 0
+
+    def holds_any(self, mask: int) -> bool:
+        """Return whether this inventory holds any of the objects whose ids are set in mask."""
+        return self.mask & mask != 0
+
+    def find_inconsistencies(self) -> list[str]:
+        """Return a description of each way that the name index, the action counts or the mask of this
+        inventory are out of date, or [] if they are up to date.
+        """
+        problems = super().find_inconsistencies()
+        mask = 0
+        for obj in self:
+            mask |= 1 << obj.obj_id
+        if mask != self.mask:
+            problems.append('the mask is out of date')
+        return problems
+
+
+class History:
+    """A bounded history of the changes made in a game, so that its most recent turns can be undone.
+
+    Each turn is a step. A step records the player's coordinates, moves, score and victory status when it began,
+    and how to undo each change made to the game during it: the old value of each attribute of a location or
+    interactable that was changed, and each interactable that was added to or removed from a location or the
+    inventory. Changes are recorded through Player.change, Player.add_to and Player.remove_from.
+
+    Steps are kept in a ring buffer, so only the most recent limit steps can be undone. Recording a change takes
+    the same time however long the game has been played, and undoing a step takes time proportional to the
+    number of changes made in it.
+
+    Instance Attributes:
+        - limit:
+            The most steps that are kept.
+
+    Representation Invariants:
+        - self.limit > 0
+        - 0 <= len(self) <= self.limit
+    """
+    limit: int
+    # The steps, in a ring buffer starting at self._first. Each step is the (x, y, moves, score, victory) of the
+    # player when it began, and a list of how to undo each change made during it, in order.
+    _steps: list[Optional[tuple[tuple[int, int, int, int, bool], list[tuple]]]]
+    _first: int
+    _count: int
+
+    def __init__(self, limit: int = 100) -> None:
+        """Initialize a new, empty history keeping at most limit steps."""
+        self.limit = limit
+        self._steps = [None] * limit
+        self._first = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Return the number of steps in this history."""
+        return self._count
+
+    def clear(self) -> None:
+        """Forget every step, such as after the game is changed to a state saved elsewhere."""
+        self._steps = [None] * self.limit
+        self._first = 0
+        self._count = 0
+
+    def begin_step(self, p: Player) -> None:
+        """Begin a new step for the next turn of p. The current step is reused if nothing changed in it."""
+        position = (p.x, p.y, p.moves, p.score, p.victory)
+        if self._count:
+            current = self._steps[(self._first + self._count - 1) % self.limit]
+            if not current[1] and current[0] == position:
+                return
+        if self._count == self.limit:  # Forget the oldest step
+            self._first = (self._first + 1) % self.limit
+            self._count -= 1
+        self._steps[(self._first + self._count) % self.limit] = (position, [])
+        self._count += 1
+
+    def record(self, undo: tuple) -> None:
+        """Record how to undo a change made during the current step, as a function followed by its arguments.
+        Changes made before the first step are not recorded, since they cannot be undone.
+        """
+        if self._count:
+            self._steps[(self._first + self._count - 1) % self.limit][1].append(undo)
+
+    def rewind(self, p: Player, steps: int = 1) -> int:
+        """Undo the given number of most recent steps of the game of p in which something changed, and return the
+        number of steps undone, which is less than steps if this history has fewer steps.
+        """
+        undone = 0
+        while self._count and undone < steps:
+            index = (self._first + self._count - 1) % self.limit
+            position, changes = self._steps[index]
+            self._steps[index] = None
+            self._count -= 1
+            if changes or position != (p.x, p.y, p.moves, p.score, p.victory):
+                undone += 1
+            for undo in reversed(changes):
+                undo[0](*undo[1:])
+            p.x, p.y, p.moves, p.score, p.victory = position
+        return undone
+
+
+class ActionTables:
+    """A store of distinct tables of actions, so that interactables with the same actions share one table.
+
+    The lines of an items file that give an action are parsed once each, so equal lines give the same action and
+    text strings, and tables that differ only in some of their actions still share the strings of the rest.
+    Shared tables must not be mutated: Item.add_action and Furniture.add_actions give their object a changed copy
+    of its table instead. A store is only needed while a world is loaded, and can be dropped afterwards without
+    unsharing anything.
+    """
+    # Each distinct table, by its items
+    _tables: dict[tuple[tuple[str, str], ...], dict[str, str]]
+    # The action and text of each distinct ACTION:::TEXT line
+    _lines: dict[str, tuple[str, str]]
+
+    def __init__(self) -> None:
+        """Initialize a new, empty store of tables."""
+        self._tables = {}
+        self._lines = {}
+
+    def parse(self, line: str) -> Optional[tuple[str, str]]:
+        """Return the action and text in an ACTION:::TEXT line of an items file, or None if line is not one."""
+        parsed = self._lines.get(line)
+        if parsed is None:
+            action, separator, text = line.partition(':::')
+            if not separator:
+                return None
+            parsed = self._lines[line] = (action, text.strip())
+        return parsed
+
+    def intern(self, actions: dict[str, str]) -> dict[str, str]:
+        """Return the table in this store equal to actions, in the same order, adding actions as that table
+        if there is none yet. actions must not be mutated afterwards.
+        """
+        key = tuple(actions.items())
+        table = self._tables.get(key)
+        if table is None:
+            table = self._tables[key] = actions
+        return table
+
+
+# The names of the slots of each class copied by _copy_slots, from its base classes down to itself
+_slot_names: dict[type, tuple[str, ...]] = {}
+
+
+def _copy_slots(obj: object) -> object:
+    """Return a shallow copy of obj, whose class and base classes keep all of their attributes in __slots__.
+    This is several times faster than copy.copy without a __copy__ method, which goes through pickling.
+    """
+    cls = type(obj)
+    names = _slot_names.get(cls)
+    if names is None:
+        names = _slot_names[cls] = tuple(name for base in reversed(cls.__mro__)
+                                         for name in base.__dict__.get('__slots__', ()))
+    copied = object.__new__(cls)
+    for name in names:
+        setattr(copied, name, getattr(obj, name))
+    return copied
 
 
 class Location:
@@ -39,10 +853,14 @@ class Location:
             A brief description of this location.
         - long:
             A long description of this location.
+        - descriptions:
+            The source that this location's descriptions are read from on demand,
+            or None if both descriptions are kept in memory.
         - available_actions:
-            A list of all available actions/commands.
+            A mapping of each available action/command to the names of the Items and Furniture in this location
+            that it can be performed on. It is kept up to date as interactables are added and removed.
         - interactables:
-            A list of Item and Furniture objects that can be found and interacted with in this location.
+            The Item and Furniture objects that can be found and interacted with in this location, indexed by name.
             If empty, the location has nothing to examine.
         - visited:
             Boolean that is True if player has been to this location already.
@@ -53,12 +871,11 @@ class Location:
         - brief != ''
         - long != ''
     """
+    __slots__ = ('num', 'points', 'descriptions', '_brief', '_long', 'interactables', 'visited')
     num: int
     points: int
-    brief: str
-    long: str
-    available_actions: dict
-    interactables: list[Union[Item, Furniture]]
+    descriptions: Optional[DescriptionSource]
+    interactables: Interactables
     visited: bool
 
     def __init__(self, num: int, points: int, brief: str, long: str) -> None:
@@ -77,12 +894,52 @@ class Location:
 
         self.num = num
         self.points = points
-        self.brief = brief
-        self.long = long
-        self.interactables = []
-        self.available_actions = {}
+        self.descriptions = None
+        # Each description is either its text, or its slot in self.descriptions
+        self._brief = brief
+        self._long = long
+        self.interactables = Interactables()
         self.visited = False
 
+    def __copy__(self) -> Location:
+        """Return a shallow copy of this location."""
+        return _copy_slots(self)
+
+    @property
+    def brief(self) -> str:
+        """A brief description of this location."""
+        brief = self._brief
+        return brief if isinstance(brief, str) else self.descriptions.get(brief)
+
+    @brief.setter
+    def brief(self, brief: str) -> None:
+        self._brief = brief
+
+    @property
+    def long(self) -> str:
+        """A long description of this location."""
+        long = self._long
+        return long if isinstance(long, str) else self.descriptions.get(long)
+
+    @long.setter
+    def long(self, long: str) -> None:
+        self._long = long
+
+    def describe_from(self, descriptions: DescriptionSource, brief_slot: int, long_slot: int) -> None:
+        """Read this location's descriptions from the given slots of descriptions on demand,
+        instead of keeping them in memory.
+        """
+        self.descriptions = descriptions
+        self._brief = brief_slot
+        self._long = long_slot
+
+    @property
+    def available_actions(self) -> dict[str, dict[str, int]]:
+        """A mapping of each action that is available in this location to the names of the Items and Furniture
+        that it can be performed on, each with the number of them with that name. It must not be mutated.
+        """
+        return self.interactables.actions
+
     def get_available_actions(self) -> dict[str, list[str]]:
         """
         Return a mapping of each action that is available in this location
@@ -107,14 +964,7 @@ class Location:
         Preconditions:
             - self.num in {n for row in map for n in row}
         """
-        if self.num != -1:
-            for y in range(0, len(world.map)):
-                for x in range(0, len(world.map[0])):
-                    if world.map[y][x] == self.num:
-                        return x, y
-            return None
-        else:
-            return None
+        return world.coordinates.get(self.num)
 
     def visit(self, p: Player) -> None:
         """Prints this Location description.
@@ -128,23 +978,25 @@ class Location:
             - self.num != -1
         """
         if self.visited:
-            self.get_brief()
+            self.get_brief(p.output)
         else:
-            self.get_long()
-            self.visited = True
+            self.get_long(p.output)
+            p.change(self, 'visited', True)
             p.add_points(self.points)
 
-    def get_brief(self) -> None:
-        """Prints this Location's brief description to the console."""
+    def get_brief(self, output: OutputSink = PRINT_SINK) -> None:
+        """Prints this Location's brief description to the console, or sends it to output."""
         if self.num != -1:
-            print(f'\nLOCATION {self.num}')
-        print(self.brief)
+            output.emit('location', f'\nLOCATION {self.num}\n{self.brief}', self)
+        else:
+            output.emit('location', self.brief, self)
 
-    def get_long(self) -> None:
-        """Prints this Location's brief description to the console."""
+    def get_long(self, output: OutputSink = PRINT_SINK) -> None:
+        """Prints this Location's brief description to the console, or sends it to output."""
         if self.num != -1:
-            print(f'\nLOCATION {self.num}')
-        print(self.long)
+            output.emit('location', f'\nLOCATION {self.num}\n{self.long}', self)
+        else:
+            output.emit('location', self.long, self)
 
 
 class MissionLocation(Location):
@@ -167,6 +1019,7 @@ class MissionLocation(Location):
         - item_to_deliver != ''
         - item_to_receive != ''
     """
+    __slots__ = ('item_to_deliver', 'item_to_receive', 'mission_completed')
     item_to_deliver: str
     item_to_receive: str
     mission_completed: bool
@@ -189,19 +1042,37 @@ class MissionLocation(Location):
         """
         if not self.mission_completed:
             # Check if given player has item to deliver in their inventory
-            if any(item.name == self.item_to_deliver for item in p.inventory):
+            if p.has_item(self.item_to_deliver):
                 # Find item that player should receive
-                for interactable in location.interactables:
-                    if isinstance(interactable, MissionItem) and interactable.name == self.item_to_receive:
-                        # update the mission_completed status of this MissionItem object
-                        interactable.update_mission_completed(w, p, location)
-                        # drop the item to deliver
-                        w.drop(p, location, self.item_to_deliver)
-                        self.mission_completed = True
-                        return
+                item_to_receive = location.interactables.first(self.item_to_receive, MissionItem)
+                if item_to_receive is not None:
+                    # update the mission_completed status of this MissionItem object
+                    item_to_receive.update_mission_completed(w, p, location)
+                    # drop the item to deliver
+                    w.drop(p, location, self.item_to_deliver)
+                    p.change(self, 'mission_completed', True)
             else:  # Player does not have the item to deliver in their inventory
-                print('Hint: This is a special location. You have to have a special item '
-                      'in your inventory to receive something you might need when you visit this location.')
+                p.output.emit('hint', 'Hint: This is a special location. You have to have a special item '
+                              'in your inventory to receive something you might need when you visit this location.')
+
+
+class ExamLocation(Location):
+    """The location of the exam. A player wins when they are at this location with every required item
+    in their inventory, before they run out of moves.
+
+    Instance Attributes:
+        - required_items:
+            The names of the items that a player must have in their inventory to win at this location.
+
+    Representation Invariants:
+        - '' not in self.required_items
+    """
+    __slots__ = ('required_items',)
+    required_items: tuple[str, ...]
+
+    def __init__(self, num: int, points: int, brief: str, long: str, required_items: tuple[str, ...]) -> None:
+        super().__init__(num, points, brief, long)
+        self.required_items = required_items
 
 
 class Item:
@@ -215,21 +1086,26 @@ class Item:
         - actions:
             A dictionary of available actions for this item. The keys are the action calls.
             The values are text output that should be returned for calling those actions.
+            It may be shared with other interactables with the same actions, so it must not be mutated.
         - stored_in_furniture:
             Name of the Furniture that this Item is stored in.
             If it is not stored in a Location, then this is an empty string.
         - picked_up:
             Indicates whether this item has ever been picked up by a player.
             True if it has ever been picked up. Otherwise, picked_up is False.
+        - obj_id:
+            The index of this item in the objects of its world, or -1 if it is not in a world yet.
 
     Representation Invariants:
         - name != ""
     """
+    __slots__ = ('name', 'points', 'actions', 'stored_in_furniture', 'picked_up', 'obj_id')
     name: str
     points: int
     actions: dict[str, str]
     stored_in_furniture: str
     picked_up: bool
+    obj_id: int
 
     def __init__(self, name: str, points: int, actions: Optional[dict[str, str]] = None,
                  stored_in_furniture: Optional[str] = None) -> None:
@@ -241,19 +1117,28 @@ class Item:
         else:
             self.stored_in_furniture = ''
         self.picked_up = False
+        self.obj_id = -1
         if actions:
             for action in actions:
                 self.add_action(action, actions[action])
 
+    def __copy__(self) -> Item:
+        """Return a shallow copy of this item."""
+        return _copy_slots(self)
+
     def add_action(self, action: str, argument: str) -> None:
         """Helper function for self.__init__. Add or mutate an action in self.actions.
         If the action is pick or drop, then the action argument must
         be appended to the actions.
+
+        self.actions may be shared with other items (see ActionTables), so it is replaced with a changed copy.
         """
+        actions = dict(self.actions)
         if action in {'pick', 'drop'}:
-            self.actions[action] += f'\n{argument}'
+            actions[action] += f'\n{argument}'
         else:
-            self.actions[action] = argument
+            actions[action] = argument
+        self.actions = actions
 
     def do_action(self, p: Player, action: str) -> None:
         """Execute an action for this item if action is valid.
@@ -267,14 +1152,15 @@ class Item:
             - action in self.actions
         """
         if self in p.inventory:
-            print(self.actions[action].replace('\\n', '\n'))  # Replace \\n with new line escape character
+            # Replace \\n with new line escape character
+            p.output.emit('action', self.actions[action].replace('\\n', '\n'), self)
         else:
-            print('You cannot do that yet. Try picking up this item.')
+            p.output.emit('error', 'You cannot do that yet. Try picking up this item.', self)
 
-    def get_actions(self) -> None:
-        """Prints all action keys for this item."""
+    def get_actions(self, output: OutputSink = PRINT_SINK) -> None:
+        """Prints all action keys for this item, or sends them to output."""
         for action in self.actions:
-            print(action)
+            output.emit('info', action, self)
 
 
 class MissionItem(Item):
@@ -289,6 +1175,7 @@ class MissionItem(Item):
         - name != ''
         - points > 0
     """
+    __slots__ = ('mission_completed',)
     mission_completed: bool
 
     def __init__(self, name: str, points: int) -> None:
@@ -298,7 +1185,7 @@ class MissionItem(Item):
     def update_mission_completed(self, world: World, player: Player, location: Location) -> None:
         """Updates this mission_completed attribute to be True.
         The player that completed the mission picks up this item automatically."""
-        self.mission_completed = True
+        player.change(self, 'mission_completed', True)
         world.pick(player, location, self.name)
 
 
@@ -313,6 +1200,7 @@ class PowerUp(Item):
     Representation Invariants:
         - moves_back < 0
     """
+    __slots__ = ('moves_back',)
     moves_back: int
 
     def __init__(self, name: str, points: int, actions: dict[str, str], moves_back: int) -> None:
@@ -329,38 +1217,55 @@ class Furniture:
         - points:
             Points that a player earns for examining this furniture
         - items:
-            A list of items that can be found inside of this furniture
+            The items that can be found inside of this furniture, in the order they were stored in it
         - actions:
             A mapping representation of actions to their text output when
-            action is performed
+            action is performed. It may be shared with other interactables with the same actions,
+            so it must not be mutated.
         - opened:
             Indicates whether this furniture has been opened.
+        - obj_id:
+            The index of this furniture in the objects of its world, or -1 if it is not in a world yet.
 
     Representation Invariants:
         - name != ''
         - points >= 0
     """
+    __slots__ = ('name', 'points', 'items', 'actions', 'opened', 'obj_id')
     name: str
     points: int
-    items: list[Item]
+    items: tuple[Item, ...]
     actions: dict[str, str]
     opened: bool
+    obj_id: int
 
     def __init__(self, name: str, points: int, actions: dict[str, str] = None) -> None:
         """Initialize a new Furniture.
         """
         self.name = name
         self.points = points
-        self.items = []
+        # Most furniture is empty, and every empty furniture shares the empty tuple
+        self.items = ()
         if actions:
             self.actions = actions
         else:
             self.actions = {}
         self.opened = False
+        self.obj_id = -1
+
+    def __copy__(self) -> Furniture:
+        """Return a shallow copy of this furniture."""
+        return _copy_slots(self)
 
     def add_actions(self, action: str, output: str) -> None:
-        """Add an action to this Furniture."""
-        self.actions[action] = output
+        """Add an action to this Furniture.
+        self.actions may be shared with other furniture (see ActionTables), so it is replaced with a changed copy.
+        """
+        self.actions = {**self.actions, action: output}
+
+    def store(self, item: Item) -> None:
+        """Store item inside this Furniture, after the items already stored in it."""
+        self.items += (item,)
 
     def open(self, p: Player) -> None:
         """Opens this Furniture and sets this opened attribute to True.
@@ -368,11 +1273,13 @@ class Furniture:
         """
         if not self.opened:
             p.add_points(self.points)
-        self.opened = True
-        print(self.actions['open'])
-        print('Items stored in this furniture:')
-        for item in self.items:
-            print(f'\t- {item.name}')
+        p.change(self, 'opened', True)
+        p.output.emit('opened', self.actions['open'], self)
+        p.output.emit('contents', self.describe_contents(), self)
+
+    def describe_contents(self) -> str:
+        """Return a list of the items stored in this furniture, for the player."""
+        return 'Items stored in this furniture:' + ''.join(f'\n\t- {item.name}' for item in self.items)
 
     def do_action(self, w: World, p: Player, location: Location, action: str) -> None:
         """Executes an action if it is valid.
@@ -387,9 +1294,9 @@ class Furniture:
         """
         if w.get_location(p.x, p.y) is location and self in location.interactables:
             if action in self.actions:
-                print(self.actions[action])
+                p.output.emit('action', self.actions[action], self)
             else:
-                print(f'{action} cannot be performed on {self.name}.')
+                p.output.emit('error', f'{action} cannot be performed on {self.name}.', self)
 
 
 class LockedFurniture(Furniture):
@@ -403,8 +1310,8 @@ class LockedFurniture(Furniture):
         - key:
             Password required for a player to "open" this locked furniture
         - items:
-            A list of items that can be found inside of this locked furniture.
-            If there are no items in this Furniture, the list is empty.
+            The items that can be found inside of this locked furniture.
+            If there are no items in this Furniture, it is empty.
         - opened:
             Indicates whether this LockedFurniture is unlocked.
 
@@ -412,10 +1319,11 @@ class LockedFurniture(Furniture):
         - name != ''
         - points >= 0
     """
+    __slots__ = ('key',)
     name: str
     points: int
     key: str
-    items: list[Item]
+    items: tuple[Item, ...]
     actions: dict[str, str]
     opened: bool
 
@@ -430,17 +1338,15 @@ class LockedFurniture(Furniture):
         """Opens this Furniture and prompts player for key.
         Sets this opened attribute to True if
         provided key matches this key attribute."""
-        key = input('What is the key?\n')
+        key = p.input_source('What is the key?\n')
         if key == self.key:
             if not self.opened:
                 p.add_points(self.points)
-            self.opened = True
-            print(self.actions['open'])
-            print('Items stored in this furniture:')
-            for item in self.items:
-                print(f'\t- {item.name}')
+            p.change(self, 'opened', True)
+            p.output.emit('opened', self.actions['open'], self)
+            p.output.emit('contents', self.describe_contents(), self)
         else:
-            print(f'Incorrect key. Try again by calling \"open {self.name}\".')
+            p.output.emit('error', f'Incorrect key. Try again by calling \"open {self.name}\".', self)
 
 
 class MissionFurniture(Furniture):
@@ -462,6 +1368,7 @@ class MissionFurniture(Furniture):
         - item_to_deliver != ''
         - item_to_receive != ''
     """
+    __slots__ = ('item_given', 'item_to_deliver', 'item_to_receive')
     item_given: str
     item_to_deliver: str
     item_to_receive: str
@@ -487,7 +1394,7 @@ class MissionFurniture(Furniture):
                 elif action == 'deliver':
                     self.check_delivery(w, p, location)
             else:
-                print(f'{action} cannot be performed on {self.name}.')
+                p.output.emit('error', f'{action} cannot be performed on {self.name}.', self)
 
     def give_item_to_player(self, w: World, p: Player, location: Location) -> None:
         """
@@ -503,13 +1410,11 @@ class MissionFurniture(Furniture):
         assert w.get_location(p.x, p.y) is location
 
         # MissionItem search
-        for interactable in location.interactables:
-            if isinstance(interactable, MissionItem) and interactable.name == self.item_given:
-                # update the mission_completed status of this MissionItem object
-                interactable.update_mission_completed(w, p, location)
-                print(self.actions['examine'])
-                return
-        return
+        item_given = location.interactables.first(self.item_given, MissionItem)
+        if item_given is not None:
+            # update the mission_completed status of this MissionItem object
+            item_given.update_mission_completed(w, p, location)
+            p.output.emit('action', self.actions['examine'], self)
 
     def check_delivery(self, w: World, p: Player, location: Location) -> None:
         """Checks if player has delivered correct item.
@@ -520,18 +1425,18 @@ class MissionFurniture(Furniture):
             - w.get_location(p.x, p.y) is location
             - self.item_to_receive in location.interactables
         """
-        if any(item.name == self.item_to_deliver for item in p.inventory):  # Player has picked up the item to deliver
+        if p.has_item(self.item_to_deliver):  # Player has picked up the item to deliver
             # Find item player should receive for completing mission
-            for interactable in location.interactables:
-                if isinstance(interactable, MissionItem) and interactable.name == self.item_to_receive:
-                    # update the mission_completed status of this MissionItem object
-                    interactable.update_mission_completed(w, p, location)
-                    # drop the item to deliver
-                    w.drop(p, location, self.item_to_deliver)
-                    print(self.actions['deliver'])
-                    return
+            item_to_receive = location.interactables.first(self.item_to_receive, MissionItem)
+            if item_to_receive is not None:
+                # update the mission_completed status of this MissionItem object
+                item_to_receive.update_mission_completed(w, p, location)
+                # drop the item to deliver
+                w.drop(p, location, self.item_to_deliver)
+                p.output.emit('delivered', self.actions['deliver'], self)
         else:  # Player does not have the item to deliver in their inventory
-            print(f'You cannot deliver anything in your inventory! Hint: You are looking for {self.item_to_deliver}.')
+            p.output.emit('error', 'You cannot deliver anything in your inventory! '
+                                   f'Hint: You are looking for {self.item_to_deliver}.', self)
 
 
 class Player:
@@ -544,7 +1449,7 @@ class Player:
         - y:
             The player's y coordinate on the map.
         - inventory:
-            Objects that the player has picked up.
+            Objects that the player has picked up, indexed by name and kept as a bitmask of their ids.
         - victory:
             The player's victory status
         - world:
@@ -553,19 +1458,31 @@ class Player:
             Number of moves the player has taken.
         - score:
             The player's score
+        - input_source:
+            The function used to prompt this player for more input, such as the key of a LockedFurniture.
+            It takes a prompt and returns the line entered, like the built-in input function.
+        - output:
+            The sink that everything shown to this player is sent to. It starts as the output of their world.
+        - history:
+            The history of the changes made in this player's game, so that turns can be undone,
+            or None if changes are not recorded.
 
 
     Representation Invariants:
         -
     """
+    __slots__ = ('x', 'y', 'inventory', 'victory', 'world', 'moves', 'score', 'input_source', 'output', 'history')
 
     x: int
     y: int
-    inventory: list[Item]
+    inventory: Inventory
     victory: bool
     world: World
     moves: int
     score: int
+    input_source: Callable[[str], str]
+    output: OutputSink
+    history: Optional[History]
 
     def __init__(self, x: int, y: int, world: World) -> None:
         """
@@ -579,28 +1496,56 @@ class Player:
         self.world = world
         self.x = x
         self.y = y
-        self.inventory = []
+        self.inventory = Inventory()
         self.victory = False
         self.score = 0
         self.moves = 0
+        self.input_source = input
+        self.output = world.output
+        self.history = None
+
+    def change(self, obj: object, attribute: str, value: object) -> None:
+        """Change the given attribute of obj, a location or interactable in this player's game, to value."""
+        if self.history is not None:
+            self.history.record((setattr, obj, attribute, getattr(obj, attribute)))
+        setattr(obj, attribute, value)
+
+    def add_to(self, interactables: Interactables, obj: Union[Item, Furniture]) -> None:
+        """Add obj to the end of interactables, a location's or this player's inventory, in this player's game."""
+        interactables.append(obj)
+        if self.history is not None:
+            self.history.record((interactables.remove, obj))
+
+    def remove_from(self, interactables: Interactables, obj: Union[Item, Furniture]) -> None:
+        """Remove obj from interactables, a location's or this player's inventory, in this player's game."""
+        place = interactables.remove(obj)
+        if self.history is not None:
+            self.history.record((interactables.put_back, obj, place))
 
     def add_to_inv(self, item: Item) -> None:
         """Adds an Item to this player's inventory.
         Adds points if item has not been picked up before."""
         if not item.picked_up:
             self.add_points(item.points)
-            item.picked_up = True
+            self.change(item, 'picked_up', True)
         # Handle PowerUp
         if isinstance(item, PowerUp):
             self.moves += item.moves_back
-        self.inventory.append(item)
+        self.add_to(self.inventory, item)
 
     def remove_from_inv(self, item: Item) -> None:
         """Removes this item from this player's inventory."""
-        for i in range(0, len(self.inventory)):
-            if self.inventory[i] == item:
-                self.inventory.pop(i)
-                return
+        if item in self.inventory:
+            self.remove_from(self.inventory, item)
+
+    def has_item(self, name: str) -> bool:
+        """Return whether an object with the given name is in this player's inventory.
+        A name that a condition of this player's world depends on is a mask test (see World.item_masks).
+        """
+        mask = self.world.item_masks.get(name)
+        if mask is None:
+            return bool(self.inventory.named(name))
+        return self.inventory.holds_any(mask)
 
     def add_points(self, points: int) -> None:
         """Adds points to this player's score.
@@ -608,10 +1553,45 @@ class Player:
         """
         if points > 0:
             self.score += points
-            print(f'+{points} points')
+            self.output.emit('points', f'+{points} points', self)
         elif points < 0:
             self.score += points
-            print(f'{points} points')
+            self.output.emit('points', f'{points} points', self)
+
+
+def _parse_text(line: str) -> str:
+    """Return line without leading and trailing whitespace, or raise ValueError if that is empty."""
+    text = line.strip()
+    if not text:
+        raise ValueError
+    return text
+
+
+def _parse_mission(line: str) -> tuple[str, str, str]:
+    """Return the item given, item to deliver and item to receive on a line of an items file,
+    or raise ValueError if the line does not have them.
+    """
+    args = line.split(',')
+    if len(args) != 3:
+        raise ValueError
+    return args[0], args[1], args[2].strip()
+
+
+# How each type of interactable in an items file is read, by its type code. Each type maps to:
+#   - a function parsing the extra line that comes before the name, or None if there is no such line,
+#   - what the extra line should be, for error messages, and
+#   - a function returning a new interactable from its name, points, actions,
+#     the name of the furniture it is stored in (or ''), and its parsed extra line.
+INTERACTABLE_TYPES = {
+    'I': (None, '',
+          lambda name, points, actions, stored_in_furniture, _: Item(name, points, actions, stored_in_furniture)),
+    'F': (None, '', lambda name, points, actions, _, __: Furniture(name, points, actions)),
+    'LF': (_parse_text, 'a key', lambda name, points, _, __, key: LockedFurniture(name, points, key)),
+    'MF': (_parse_mission, 'ITEM GIVEN,ITEM TO DELIVER,ITEM TO RECEIVE',
+           lambda name, points, actions, _, mission: MissionFurniture(name, points, actions, *mission)),
+    'PU': (int, 'moves back', lambda name, points, actions, _, moves_back: PowerUp(name, points, actions, moves_back)),
+    'M': (None, '', lambda name, points, *_: MissionItem(name, points)),
+}
 
 
 class World:
@@ -619,27 +1599,67 @@ class World:
 
     Instance Attributes:
         - map:
-            A nested list representation of this world's map
+            A nested list representation of this world's map, or a SparseMap that is read the same way
         - locations:
             A list representation of all Location objects of this world's map
         - interactables:
             A mapping representation of Location numbers to Item and Furniture objects found in
-            the locations of this world's map
+            the locations of this world's map, indexed by name. Once interactables are added to locations,
+            this is the same store as the interactables attribute of each location, not a copy of it.
+        - location_index:
+            A mapping of each location number to its Location object in self.locations
+        - coordinates:
+            A mapping of each location number on this world's map to its (x, y) coordinates.
+            If a location number appears more than once on the map, its first position
+            (row by row, from the top left) is used.
+        - objects:
+            A list of every Item and Furniture object in this world, in the order they were loaded.
+            The index of an object in this list is its id. This list does not change during play.
+        - output:
+            The sink that this world's introduction is sent to, and that new players in this world send their output to.
+        - navigation:
+            The index of shortest routes on this world's map, or None if it has not been built yet.
+            It is shared with the forks of this world made after it is built.
+        - exam:
+            The (x, y) coordinates of the first ExamLocation of this world that is on its map,
+            or None if this world has no such location and cannot be won.
+        - required_items:
+            The names of the items needed to win at the exam, or () if there is no exam.
+        - item_masks:
+            A mapping of the name of each item that a condition of this world depends on (the items needed to win,
+            and the items delivered in missions) to the bitmask of the ids of the objects with that name.
 
     Representation Invariants:
         - map != []
         - locations != []
+        - all(self.location_index[loc.num] is loc for loc in self.locations)
+        - self.find_inconsistencies() == [] once interactables are added to locations
+        - -1 not in self.coordinates
+        - all(obj.obj_id == i for i, obj in enumerate(self.objects))
+        - all(name in self.item_masks for name in self.required_items)
     """
-    map: list[list[int]]
+    map: Union[list[list[int]], SparseMap]
     locations: list[Location]
-    interactables: dict[int, list[Union[Furniture, Item]]]
-
-    def __init__(self, map_data: TextIO, location_data: TextIO, items_data: TextIO) -> None:
+    interactables: dict[int, Interactables]
+    location_index: dict[int, Location]
+    coordinates: dict[int, tuple[int, int]]
+    objects: list[Union[Item, Furniture]]
+    output: OutputSink
+    navigation: Optional[NavigationIndex]
+    exam: Optional[tuple[int, int]]
+    required_items: tuple[str, ...]
+    item_masks: dict[str, int]
+
+    def __init__(self, map_data: Union[TextIO, SparseMap], location_data: TextIO, items_data: TextIO,
+                 lazy_descriptions: bool = False, sparse_map: bool = False) -> None:
         """
         Initialize a new World for a text adventure game, based on the data in the given open files.
 
+        - map_data: open file containing the map, or a SparseMap to use as the map
         - location_data: name of text file containing location data (format left up to you)
         - items_data: name of text file containing item data (format left up to you)
+        - lazy_descriptions: whether location descriptions are read from location_data on demand (see load_locations)
+        - sparse_map: whether the map is loaded into a SparseMap instead of a nested list (see load_sparse_map)
         """
 
         # NOTES:
@@ -651,10 +1671,21 @@ class World:
         # You may ADD parameters/attributes/methods to this class as you see fit.
         # BUT DO NOT RENAME OR REMOVE ANY EXISTING METHODS/ATTRIBUTES IN THIS CLASS
 
-        # The map MUST be stored in a nested list as described in the load_map() function's docstring below
-        self.map = self.load_map(map_data)
-        self.locations = self.load_locations(location_data)
+        # The map MUST be stored in a nested list as described in the load_map() function's docstring below,
+        # unless it is a huge map that only fits in memory as a SparseMap
+        if isinstance(map_data, SparseMap):
+            self.map = map_data
+        elif sparse_map:
+            self.map = self.load_sparse_map(map_data)
+        else:
+            self.map = self.load_map(map_data)
+        self.coordinates = self.index_coordinates()
+        self.locations = self.load_locations(location_data, lazy_descriptions)
         self.interactables = self.load_items(items_data)
+        self.objects = [interactable for interactables in self.interactables.values() for interactable in interactables]
+        self.index_conditions()
+        self.output = PRINT_SINK
+        self.navigation = None
 
     # NOTE: The method below is REQUIRED. Complete it exactly as specified.
     def load_map(self, map_data: TextIO) -> list[list[int]]:
@@ -676,11 +1707,50 @@ class World:
 
         return world_map
 
-    def load_locations(self, location_data: TextIO) -> list[Location]:
+    def load_sparse_map(self, map_data: TextIO) -> SparseMap:
+        """Return the map in open file map_data, in the same format as for load_map, as a SparseMap.
+        Only the walkable cells of the map are kept, so a huge map that is mostly blocked takes little memory.
+        """
+        world_map = SparseMap()
+        for line in map_data:
+            numbers = line.split()
+            world_map.append_row(len(numbers), [(x, int(number)) for x, number in enumerate(numbers)
+                                                if number != '-1'])
+        return world_map
+
+    def index_coordinates(self) -> dict[int, tuple[int, int]]:
+        """Return a mapping of each location number on this world's map to its (x, y) coordinates.
+        Blocked cells (location number -1) are not included.
+        """
+        coordinates_so_far = {}
+        for x, y, location_number in walkable_cells(self.map):
+            if location_number not in coordinates_so_far:
+                coordinates_so_far[location_number] = (x, y)
+        return coordinates_so_far
+
+    def load_locations(self, location_data: TextIO, lazy_descriptions: bool = False) -> list[Location]:
         """Store locations from open file location_data as the locations attribute of this object.
-        Locations are stored in a list.
+        Locations are stored in a list, and indexed by location number in the location_index attribute.
+
+        If lazy_descriptions is True, the descriptions of the locations are not kept in memory.
+        Instead, the offset of each description in the file is recorded, and the file is memory-mapped
+        so that descriptions are read from it when they are needed (see DescriptionSource).
+
+        Preconditions:
+            - not lazy_descriptions or location_data is a file on disk, opened at its start
         """
         self.locations = []
+        self.location_index = {}
+
+        descriptions = None
+        if lazy_descriptions:
+            # Imported here so that importing this module stays cheap
+            import mmap
+            from array import array
+            descriptions = DescriptionSource(mmap.mmap(location_data.fileno(), 0, access=mmap.ACCESS_READ),
+                                             array('q'), array('q'))
+            lines = _LineReader(location_data.buffer)
+            location_data = lines
 
         line = location_data.readline()
 
@@ -690,20 +1760,22 @@ class World:
 
         # Read locations until EOF
         while line:
-            is_mission_location = False
-            item_to_deliver = ''
-            item_to_receive = ''
+            location_kind = ''
 
             # Read location number
             line = location_data.readline()
             try:
                 location_number = int(line)
-            except ValueError:  # Special mission location
-                is_mission_location = True
-                substrings = line.split(',')
-                location_number = int(substrings[0])
-                item_to_deliver = substrings[1].split(':::')[1]
-                item_to_receive = substrings[2].strip()
+            except ValueError:  # Special mission or exam location
+                number_text, _, kind_text = line.partition(',')
+                location_number = int(number_text)
+                kind, _, arguments = kind_text.partition(':::')
+                location_kind = 'exam' if kind.strip() == 'exam' else 'mission'
+                if location_kind == 'exam':
+                    required_items = tuple(name.strip() for name in arguments.split(',') if name.strip())
+                else:
+                    item_to_deliver, item_to_receive = arguments.split(',')[:2]
+                    item_to_receive = item_to_receive.strip()
 
             # Read location points
             line = location_data.readline()
@@ -712,176 +1784,236 @@ class World:
             # Read brief description
             line = location_data.readline()
             brief = line.strip()
+            if descriptions is not None:
+                brief_slot = lines.record_stripped(descriptions)
 
             # Read long description
             line = location_data.readline()
             long = ''
+            if descriptions is not None:
+                long_start = lines.start
             while line.strip() != 'END':
-                long += line
+                if descriptions is None:
+                    long += line
                 line = location_data.readline()
+            if descriptions is not None:
+                long_slot = descriptions.add(long_start, lines.start)
 
             line = location_data.readline()
             assert line.strip() == ''
 
-            if not is_mission_location:
-                self.locations.append(Location(
-                    location_number, points, brief, long)
-                )
+            if not location_kind:
+                location = Location(location_number, points, brief, long)
+            elif location_kind == 'exam':
+                location = ExamLocation(location_number, points, brief, long, required_items)
             else:
-                self.locations.append(MissionLocation(
-                    location_number, points, brief, long, item_to_deliver, item_to_receive)
-                )
+                location = MissionLocation(location_number, points, brief, long, item_to_deliver, item_to_receive)
+            if descriptions is not None:
+                location.describe_from(descriptions, brief_slot, long_slot)
+            self.locations.append(location)
+            self.location_index.setdefault(location_number, location)
 
         return self.locations
 
-    def load_items(self, items_data: TextIO) -> dict[int, list[Union[Item, Furniture]]]:
+    def load_items(self, items_data: TextIO) -> dict[int, Interactables]:
         """Store items from open file items_data as the items attribute of this object.
         Items are stored in a mapping that maps a location number to its corresponding Items in a list like so:
 
         If item1 and item2 are Item objects found in location 0, then load_items should assign this
         World object's items to be {-1: [], 0: [item1, item2]}.
+
+        The file is read in a single pass. Records for locations that are not in this world are skipped.
+        A WorldFileError giving the file and line is raised for the first record that is not in the format
+        of the template at the top of the file (see INTERACTABLE_TYPES for the type codes).
+
+        Preconditions:
+            - self.location_index has been loaded
         """
-        interactables_so_far = {}
+        with PausedGC():
+            return self._read_items(items_data)
 
-        line = items_data.readline()
+    def _read_items(self, items_data: TextIO) -> dict[int, Interactables]:
+        """Return the interactables read from open file items_data, as described in load_items."""
+        interactables_so_far = {}
+        # The first Furniture with each (location number, name), for finding the Furniture that Items are stored in
+        furniture_index = {}
+        # Interactables with the same actions share one table of them
+        action_tables = ActionTables()
+        filename = getattr(items_data, 'name', '<string>')
+        readline = items_data.readline
 
         # Cycle through the lines in items.txt that indicate a template
+        line = readline()
+        line_number = 1
         while line != '\n':
-            line = items_data.readline()
-
-        # Read lines until EOF
-        line = items_data.readline()
-
+            if not line:
+                raise WorldFileError.unexpected(filename, line_number, 'a blank line after the template', line)
+            line = readline()
+            line_number += 1
+
+        # Read records until EOF
+        line = readline()
+        line_number += 1
         while line:
-            # Determine whether Item is found in a location or inside Furniture object
-            # a location
-            stored_in_furniture = ''
-            try:
-                stored_in_location = int(line)
-            except ValueError:  # Item is stored in a furniture object
-                stored_in_location = int(line.split(':::')[0])
-                stored_in_furniture = line.split(':::')[1].strip()
+            record_line_number = line_number
 
-            # Read interactable type
-            line = items_data.readline()
+            # Determine whether the interactable is found in a location or inside a Furniture object
+            location_text, _, stored_in_furniture = line.partition(':::')
+            try:
+                stored_in_location = int(location_text)
+            except ValueError:
+                raise WorldFileError.unexpected(filename, line_number,
+                                                'LOCATION NUMBER or LOCATION NUMBER:::FURNITURE NAME', line) from None
+            stored_in_furniture = stored_in_furniture.strip()
+
+            # Read interactable type, and the extra line that comes before the name of some types
+            line = readline()
+            line_number += 1
             object_type = line.strip()
-
-            line = items_data.readline()
-
-            # Check object type as format changes if LF (LockedFurniture)
-            # or MF (MissionFurniture) or PU (PowerUp)
-            pu_moves_back = None
-            key = None
-            item_given = None
-            item_to_receive = None
-            item_to_deliver = None
-
-            if object_type == 'LF':
-                # Read key value
-                key = line.strip()
-                line = items_data.readline()
-            elif object_type == 'MF':
-                # Read item given, to deliver, and to receive respectively
-                args = line.split(',')
-                assert len(args) == 3
-                item_given = args[0]
-                item_to_deliver = args[1]
-                item_to_receive = args[2].strip()
-                line = items_data.readline()
-            elif object_type == 'PU':
-                pu_moves_back = int(line)
-                line = items_data.readline()
+            if object_type not in INTERACTABLE_TYPES:
+                raise WorldFileError.unexpected(filename, line_number,
+                                                f'an interactable type ({", ".join(INTERACTABLE_TYPES)})', line)
+            parse_extra_line, extra_line_expected, new_interactable = INTERACTABLE_TYPES[object_type]
+            extra = None
+            if parse_extra_line is not None:
+                line = readline()
+                line_number += 1
+                try:
+                    extra = parse_extra_line(line)
+                except ValueError:
+                    raise WorldFileError.unexpected(filename, line_number, extra_line_expected, line) from None
 
             # Read interactable name
+            line = readline()
+            line_number += 1
             name = line.strip()
+            if not name:
+                raise WorldFileError.unexpected(filename, line_number, 'a name', line)
 
             # Read points
-            line = items_data.readline()
-            points = int(line)
+            line = readline()
+            line_number += 1
+            try:
+                points = int(line)
+            except ValueError:
+                raise WorldFileError.unexpected(filename, line_number, 'points', line) from None
 
             # Read actions
             actions = {}
-            line = items_data.readline()
+            line = readline()
+            line_number += 1
             while line.strip() != 'END':
-                args = line.split(':::')
-                actions[args[0]] = args[1].strip()
-                line = items_data.readline()
-
-            # Create new interactable objects based on type
-            for loc in self.locations:
-                if loc.num == stored_in_location:
-                    if object_type == 'F':
-                        # Create new Furniture object
-                        new_furniture = Furniture(name, points, actions)
-                        # Add Furniture to interactables_so_far
-                        if stored_in_location in interactables_so_far:
-                            interactables_so_far[stored_in_location] += [new_furniture]
-                        else:
-                            interactables_so_far[stored_in_location] = [new_furniture]
-                    elif object_type == 'LF':
-                        # Create LockedFurniture object
-                        new_locked_furniture = LockedFurniture(name, points, key)
-                        # Add LockedFurniture to interactables_so_far
-                        if stored_in_location in interactables_so_far:
-                            interactables_so_far[stored_in_location] += [new_locked_furniture]
-                        else:
-                            interactables_so_far[stored_in_location] = [new_locked_furniture]
-                    elif object_type == 'MF':
-                        # Create MissionFurniture object
-                        new_mission_furniture = MissionFurniture(name, points, actions,
-                                                                 item_given, item_to_deliver, item_to_receive)
-                        # Add MissionFurniture to interactables_so_far
-                        if stored_in_location in interactables_so_far:
-                            interactables_so_far[stored_in_location] += [new_mission_furniture]
-                        else:
-                            interactables_so_far[stored_in_location] = [new_mission_furniture]
-                    elif object_type == 'I':
-                        new_item = Item(name, points, actions, stored_in_furniture)
-                        # Add Item to interactables_so_far
-                        if stored_in_location in interactables_so_far:
-                            interactables_so_far[stored_in_location] += [new_item]
-                        else:
-                            interactables_so_far[stored_in_location] = [new_item]
-                        if stored_in_furniture:
-                            # Find Furniture it is stored in
-                            for furniture in interactables_so_far[stored_in_location]:
-                                if furniture.name == stored_in_furniture:
-                                    # Add item to Furniture
-                                    furniture.items.append(new_item)
-                                    break
-                    elif object_type == 'PU':
-                        new_powerup = PowerUp(name, points, actions, pu_moves_back)
-                        # Add PowerUp to interactables_so_far
-                        if stored_in_location in interactables_so_far:
-                            interactables_so_far[stored_in_location] += [new_powerup]
-                        else:
-                            interactables_so_far[stored_in_location] = [new_powerup]
-                    elif object_type == 'M':
-                        new_mission_item = MissionItem(name, points)
-                        # Add MissionItem to interactables_so_far
-                        if stored_in_location in interactables_so_far:
-                            interactables_so_far[stored_in_location] += [new_mission_item]
-                        else:
-                            interactables_so_far[stored_in_location] = [new_mission_item]
-
-                    break
-
-            items_data.readline()
-            line = items_data.readline()
+                parsed = action_tables.parse(line)
+                if parsed is None:
+                    raise WorldFileError.unexpected(filename, line_number, 'ACTION:::OUTPUT or END', line)
+                actions[parsed[0]] = parsed[1]
+                line = readline()
+                line_number += 1
+
+            line = readline()
+            line_number += 1
+            if line.strip():
+                raise WorldFileError.unexpected(filename, line_number, 'a blank line after END', line)
+
+            # Create the interactable, unless its location is not in this world
+            if stored_in_location in self.location_index:
+                interactable = new_interactable(name, points, actions, stored_in_furniture, extra)
+                interactable.actions = action_tables.intern(interactable.actions)
+                if stored_in_location not in interactables_so_far:
+                    # Interactables are loaded straight into the store of their location
+                    interactables_so_far[stored_in_location] = self.location_index[stored_in_location].interactables
+                interactables_so_far[stored_in_location].append(interactable)
+                if isinstance(interactable, Furniture):
+                    furniture_index.setdefault((stored_in_location, name), interactable)
+                elif interactable.stored_in_furniture:
+                    furniture = furniture_index.get((stored_in_location, interactable.stored_in_furniture))
+                    if furniture is None:
+                        raise WorldFileError(filename, record_line_number,
+                                             f'there is no furniture {stored_in_furniture!r} at location '
+                                             f'{stored_in_location} to store {name!r} in')
+                    furniture.store(interactable)
+
+            line = readline()
+            line_number += 1
 
         return interactables_so_far
 
+    def index_conditions(self) -> None:
+        """Give each object in this world its index in self.objects as its id, and read the exam, the items
+        needed to win and the masks of the items that conditions depend on from the locations and interactables
+        of this world (see the exam, required_items and item_masks attributes).
+        """
+        exam_location = next((location for location in self.locations
+                              if isinstance(location, ExamLocation) and location.num in self.coordinates), None)
+        self.exam = None if exam_location is None else self.coordinates[exam_location.num]
+        self.required_items = () if exam_location is None else exam_location.required_items
+
+        names = set(self.required_items)
+        names.update(location.item_to_deliver for location in self.locations if isinstance(location, MissionLocation))
+        names.update(obj.item_to_deliver for obj in self.objects if isinstance(obj, MissionFurniture))
+        self.item_masks = dict.fromkeys(names, 0)
+        for obj_id, obj in enumerate(self.objects):
+            obj.obj_id = obj_id
+            if obj.name in self.item_masks:
+                self.item_masks[obj.name] |= 1 << obj_id
+
+    def has_won(self, p: Player) -> bool:
+        """Return whether p is at the exam of this world with every item needed to win in their inventory.
+        This is one mask test per item needed to win, however many items p has.
+        """
+        return (p.x, p.y) == self.exam and all(p.inventory.holds_any(self.item_masks[name])
+                                                for name in self.required_items)
+
     def add_interactables_to_locations(self) -> None:
-        """Add every interactable in this world to its corresponding location."""
-        for location_num in self.interactables:
-            for location in self.locations:
-                if location.num == location_num:
-                    location.interactables.extend(self.interactables[location_num])
+        """Add every interactable in this world to its corresponding location.
+
+        Each location and self.interactables share one store of the interactables at that location,
+        so this only links the stores that are not shared yet. Calling this more than once does nothing more.
+        """
+        for location_num, location in self.location_index.items():
+            if location_num not in self.interactables:
+                self.interactables[location_num] = location.interactables
+            elif self.interactables[location_num] is not location.interactables:
+                self.interactables[location_num].extend(location.interactables)
+                location.interactables = self.interactables[location_num]
+
+    def find_inconsistencies(self, p: Optional[Player] = None) -> list[str]:
+        """Return a description of each way that the interactables of this world, and the inventory of p
+        if it is given, break the representation invariants. Return [] if there are none.
+        """
+        problems = []
+        places = {}
+        stores = [(f'location {location_num}', interactables)
+                  for location_num, interactables in self.interactables.items()]
+        if p is not None:
+            stores.append(('the inventory', p.inventory))
+        for place, interactables in stores:
+            problems.extend(f'{place}: {problem}' for problem in interactables.find_inconsistencies())
+            for interactable in interactables:
+                if id(interactable) in places:
+                    problems.append(f'{interactable.name!r} is in both {places[id(interactable)]} and {place}')
+                places[id(interactable)] = place
+
+        for location_num, location in self.location_index.items():
+            if self.interactables.get(location_num) is not location.interactables:
+                problems.append(f'location {location_num} does not share its store with World.interactables')
+        objects = {id(interactable) for interactable in self.objects}
+        for interactable_id, place in places.items():
+            if interactable_id not in objects:
+                problems.append(f'{place} holds an interactable that is not in World.objects')
+        if p is not None:
+            problems.extend(f'{interactable.name!r} is in no location or inventory'
+                            for interactable in self.objects if id(interactable) not in places)
+        return problems
 
     def add_actions_to_locations(self) -> None:
-        """Add every action available in a location in this world to thatfo location's available_actions."""
+        """Add every action available in a location in this world to that location's available_actions.
+
+        The available actions of a location are counted as interactables are added to it and removed from it,
+        so this only needs to be called after the actions of an interactable in this world are changed.
+        """
         for location in self.locations:
-            location.available_actions = location.get_available_actions()
+            location.interactables.recount_actions()
 
     # NOTE: The method below is REQUIRED. Complete it exactly as specified.
     def get_location(self, x: int, y: int) -> Optional[Location]:
@@ -889,61 +2021,91 @@ class World:
          that position. Otherwise, return None. (Remember, locations represented by the number -1 on the map should
          return None.)
         """
-        try:
-            location_number = self.map[y][x]
+        location_number = self.location_number_at(x, y)
 
-            # Check if location_number is -1
-            if location_number == -1:
-                return None
+        # Check if location_number is -1
+        if location_number == -1:
+            return None
 
-            for location in self.locations:
-                if location.num == location_number:
-                    return location
+        return self.location_index.get(location_number)
 
-            return None
+    def location_number_at(self, x: int, y: int) -> int:
+        """Return the location number at (x, y) in this world's map, or -1 if that cell is blocked or off the map."""
+        if isinstance(self.map, SparseMap):
+            return self.map.location_number(x, y)
+        if 0 <= y < len(self.map) and 0 <= x < len(self.map[y]):
+            return self.map[y][x]
+        return -1
 
-        except IndexError:
-            return None
+    def fork(self) -> World:
+        """Return a copy of this world for a new game, sharing all data that does not change during play.
+
+        The map, coordinates, navigation index, location descriptions and interactable actions are shared with this
+        world.
+        Locations and interactables are copied, so that playing in the copy does not change this world.
+
+        Preconditions:
+            - No player in this world has picked up an item
+        """
+        # Map the id of each interactable in this world to its copy
+        copies = {id(interactable): copy.copy(interactable) for interactable in self.objects}
+        for interactable_copy in copies.values():
+            if isinstance(interactable_copy, Furniture) and interactable_copy.items:
+                interactable_copy.items = tuple(copies[id(item)] for item in interactable_copy.items)
+
+        world = copy.copy(self)
+        world.objects = [copies[id(interactable)] for interactable in self.objects]
+        # Map the id of each store of interactables in this world to its copy, so that shared stores stay shared
+        stores = {id(interactables): Interactables(copies[id(interactable)] for interactable in interactables)
+                  for interactables in self.interactables.values()}
+        world.interactables = {location_num: stores[id(interactables)]
+                               for location_num, interactables in self.interactables.items()}
+        world.locations = []
+        world.location_index = {}
+        for location in self.locations:
+            location_copy = copy.copy(location)
+            if id(location.interactables) in stores:
+                location_copy.interactables = stores[id(location.interactables)]
+            else:
+                location_copy.interactables = Interactables(copies[id(interactable)]
+                                                            for interactable in location.interactables)
+            world.locations.append(location_copy)
+            world.location_index.setdefault(location_copy.num, location_copy)
+        return world
+
+    def get_navigation(self) -> NavigationIndex:
+        """Return the index of shortest routes on this world's map, building it if it has not been built yet."""
+        if self.navigation is None:
+            from navigation import NavigationIndex
+            self.navigation = NavigationIndex(self.map, self.coordinates.values())
+        return self.navigation
 
     def get_game_introduction(self) -> None:
-        """Prints the rules of the game to the console."""
-        print('\n\nESCAPING UOFT\n')
-        print('How to Play:')
-        print('You have an important exam this evening. You\'ve been studying for weeks.\n'
-              'You realized that staying in your university residence, CampusOne, was not productive, so you '
-              'went to several different places yesterday.\n'
-              'But... it seems like you have lost your T-Card, lucky pen, and cheat sheet, and you '
-              'need those items for your exam.\n'
-              'Can you get those three items before your exam begins?\n')
-        print('Rules:')
-        print('At every location, type \"menu\" to see available actions you can perform.')
-        print('When you have found your items, head back to CampusOne to go to the Exam Center.\n')
+        """Prints the rules of the game to this world's output."""
+        self.output.emit('info', '\n\nESCAPING UOFT\n')
+        self.output.emit('info', 'How to Play:')
+        self.output.emit('info', 'You have an important exam this evening. You\'ve been studying for weeks.\n'
+                                 'You realized that staying in your university residence, CampusOne, was not '
+                                 'productive, so you went to several different places yesterday.\n'
+                                 'But... it seems like you have lost your T-Card, lucky pen, and cheat sheet, and you '
+                                 'need those items for your exam.\n'
+                                 'Can you get those three items before your exam begins?\n')
+        self.output.emit('info', 'Rules:')
+        self.output.emit('info', 'At every location, type \"menu\" to see available actions you can perform.')
+        self.output.emit('info', 'When you have found your items, head back to CampusOne to go to the Exam Center.'
+                                 '\n')
 
     def move_player(self, x: int, y: int, p: Player) -> None:
         """Moves the given player to location at (x, y) in this world's map.
         If the move is invalid (i.e., at a location number -1 or out of the bounds of the map)
         then, a warning is printed to the console.
         """
-        new_location = None
-
-        if x < 0 or y < 0:
-            location_num = -1
-        else:
-            # Get the location at (x, y)
-            try:
-                location_num = self.map[y][x]
-            except IndexError:
-                location_num = -1
-
-        for location in self.locations:
-            if location.num == location_num:
-                new_location = location
-
+        new_location = self.location_index.get(self.location_number_at(x, y))
         assert new_location is not None
 
         # Check if location is valid
         if new_location.num == -1:
-            new_location.get_brief()
+            new_location.get_brief(p.output)
         else:  # Location is valid
             p.x = x
             p.y = y
@@ -965,66 +2127,46 @@ class World:
             - self.get_location(p.x, p.y) is location
         """
         if not item_name:
-            print('Invalid item name.\n')
+            p.output.emit('error', 'Invalid item name.\n')
             return
 
         # Check if item is already in player inventory
-        for item in p.inventory:
-            if item.name == item_name:
-                print(f'You have already picked up {item_name}.')
-                return
+        if p.inventory.named(item_name):
+            p.output.emit('error', f'You have already picked up {item_name}.')
+            return
 
         # Search for provided item in the provided location
-        try:
-            for interactable in self.interactables[location.num]:
-                if interactable.name == item_name and isinstance(interactable, Item):
-                    item = interactable
-
-                    # Handle MissionItem
-                    if isinstance(item, MissionItem):
-                        # Check if mission has been completed:
-                        if item.mission_completed:
-                            p.add_to_inv(item)
-                            location.interactables.remove(item)
-                            self.interactables[location.num].remove(item)
-                            print(item.actions['pick'])
-                            return
-                        else:
-                            print(f'You have not completed the mission for {item.name}.')
-                            return
-                    # Handle PowerUp
-                    elif isinstance(item, PowerUp):
-                        p.add_to_inv(item)
-                        p.moves += item.moves_back
-                        location.interactables.remove(item)
-                        self.interactables[location.num].remove(item)
-                        print(item.actions['pick'])
-                        return
-                    # Handle Item in Furniture
-                    elif item.stored_in_furniture != '':
-                        # assert item.stored_in_furniture in {}
-                        for furniture in self.interactables[location.num]:
-                            if (isinstance(furniture, Furniture)
-                                    and furniture.name == item.stored_in_furniture
-                                    and furniture.opened):
-                                p.add_to_inv(item)
-                                location.interactables.remove(item)
-                                self.interactables[location.num].remove(item)
-                                print(item.actions['pick'])
-                                return
-                        # Furniture is not opened
-                        print(f'You cannot pick up {item.name} right now.')
-                        return
-                    else:  # Handle Item
-                        p.add_to_inv(item)
-                        location.interactables.remove(item)
-                        self.interactables[location.num].remove(item)
-                        print(item.actions['pick'])
-                        return
-        except KeyError:
-            pass
-
-        print(f'{item_name} is not an item at Location {location.num}!')
+        item = location.interactables.first(item_name, Item)
+        if item is None:
+            p.output.emit('error', f'{item_name} is not an item at Location {location.num}!')
+        # Handle MissionItem
+        elif isinstance(item, MissionItem):
+            # Check if mission has been completed:
+            if item.mission_completed:
+                p.add_to_inv(item)
+                p.remove_from(location.interactables, item)
+                p.output.emit('picked_up', item.actions['pick'], item)
+            else:
+                p.output.emit('error', f'You have not completed the mission for {item.name}.')
+        # Handle PowerUp
+        elif isinstance(item, PowerUp):
+            p.add_to_inv(item)
+            p.moves += item.moves_back
+            p.remove_from(location.interactables, item)
+            p.output.emit('picked_up', item.actions['pick'], item)
+        # Handle Item in Furniture
+        elif item.stored_in_furniture != '':
+            if any(isinstance(furniture, Furniture) and furniture.opened
+                   for furniture in location.interactables.named(item.stored_in_furniture)):
+                p.add_to_inv(item)
+                p.remove_from(location.interactables, item)
+                p.output.emit('picked_up', item.actions['pick'], item)
+            else:  # Furniture is not opened
+                p.output.emit('error', f'You cannot pick up {item.name} right now.')
+        else:  # Handle Item
+            p.add_to_inv(item)
+            p.remove_from(location.interactables, item)
+            p.output.emit('picked_up', item.actions['pick'], item)
 
     def drop(self, p: Player, location: Location, item_name: str) -> None:
         """The named item is removed from the given player's inventory if drop is valid.
@@ -1038,16 +2180,15 @@ class World:
         Preconditions:
             - self.get_location(p.x, p.y) is location
         """
-        for item in p.inventory:
-            if item_name == item.name:
-                p.remove_from_inv(item)
-                item.stored_in_furniture = ''
-                location.interactables.append(item)
-                self.interactables[location.num].append(item)
-                print(item.actions['drop'])
-                return
+        item = p.inventory.first(item_name)
+        if item is None:
+            p.output.emit('error', f'{item_name} is not in your inventory.')
+            return
 
-        print(f'{item_name} is not in your inventory.')
+        p.remove_from_inv(item)
+        p.change(item, 'stored_in_furniture', '')
+        p.add_to(location.interactables, item)
+        p.output.emit('dropped', item.actions['drop'], item)
 
     def open(self, p: Player, location: Location, furniture_name: str) -> None:
         """The named furniture is opened if open is valid.
@@ -1062,20 +2203,20 @@ class World:
         Preconditions:
             - player is located at location
         """
-        try:
-            for interactable in self.interactables[location.num]:
-                if (interactable.name == furniture_name
-                        and isinstance(interactable, Furniture)):
-                    furniture = interactable
-                    if 'open' in furniture.actions:
-                        # Check if furniture has already been opened
-                        if furniture.opened:
-                            print(f'You have already opened {furniture_name}.')
-                            return
-                        else:
-                            furniture.open(p)
-                            return
+        if not location.interactables.named(furniture_name):
+            p.output.emit('error', f'{furniture_name} does not exist at location {location.num}.')
+            return
+
+        for interactable in location.interactables.named(furniture_name):
+            if isinstance(interactable, Furniture):
+                furniture = interactable
+                if 'open' in furniture.actions:
+                    # Check if furniture has already been opened
+                    if furniture.opened:
+                        p.output.emit('error', f'You have already opened {furniture_name}.')
+                        return
                     else:
-                        print(f'{furniture_name} cannot be opened.')
-        except KeyError:
-            print(f'{furniture_name} does not exist at location {location.num}.')
+                        furniture.open(p)
+                        return
+                else:
+                    p.output.emit('error', f'{furniture_name} cannot be opened.')
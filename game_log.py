@@ -0,0 +1,226 @@
+"""CSC111 Project 1: Session Logs
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module keeps an append-only log of a game session, so that the state of the session after any
+turn can be rebuilt later, such as to find out what happened in a session on the server.
+
+    log = SessionLog(open('session.log', 'a'), p)   # after the first location is described
+    ...
+    log.record_turn('pick tcard', [])               # after each turn, and the next location is described
+    ...
+    w, p = rebuild(open('session.log'), definition, turn=12)
+
+A log is a text file with one JSON object per line:
+
+    {"log": LOG_VERSION, "world": the fingerprint of the world}
+    {"checkpoint": the turn, "state": the game saved after that turn, in base64}
+    {"turn": the turn, "command": the command, "input": the answers to prompts during the turn,
+     "events": [[kind, the name of the subject, or the text], ...], "x": x, "y": y, "moves": moves, "score": score}
+
+Only the events in LOGGED_EVENTS are kept: points, and interactables being moved or opened. The first checkpoint
+is the state the session was in when the log started, at turn 0. Another checkpoint is written every
+checkpoint_every turns, and after every turn with a command in UNREPLAYED_VERBS, whose effects depend on more
+than the game, so that rebuilding the state after any turn only replays the turns since the nearest checkpoint.
+
+    python game_log.py session.log [TURN]
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2024 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import base64
+import json
+import sys
+from typing import Iterable, Iterator, Optional, TextIO
+
+from adventure import MENU, begin_turn, is_game_over, take_turn
+from game_data import Player, World
+from game_output import NullSink, OutputSink
+from game_state import WorldDefinition, definition_of
+
+LOG_VERSION = 1
+CHECKPOINT_EVERY = 50
+
+# The kinds of events that are kept in a log
+LOGGED_EVENTS = ('points', 'picked_up', 'dropped', 'opened', 'delivered')
+
+# Commands that are not replayed: they read or write saved games, or undo turns from a history that a
+# rebuilt game does not have. A checkpoint is written after every turn with one of these commands.
+UNREPLAYED_VERBS = ('save', 'load', 'undo')
+
+_CHECKPOINT_PREFIX = '{"checkpoint":'
+_encode = json.JSONEncoder(separators=(',', ':')).encode
+
+
+class LogError(Exception):
+    """Raised when a log cannot be rebuilt into a game of a world."""
+
+
+class _LogSink(OutputSink):
+    """An output sink that sends every event on to another sink, and keeps the events in LOGGED_EVENTS."""
+    sink: OutputSink
+    events: list[list[str]]
+
+    def __init__(self, sink: OutputSink) -> None:
+        self.sink = sink
+        self.events = []
+
+    def emit(self, kind: str, text: str, subject: object = None, end: str = '\n') -> None:
+        """Send the event on, and keep it if its kind is in LOGGED_EVENTS."""
+        if kind in LOGGED_EVENTS:
+            self.events.append([kind, getattr(subject, 'name', text)])
+        self.sink.emit(kind, text, subject, end)
+
+
+class SessionLog:
+    """An append-only log of the turns of a player's game.
+
+    Lines are written to file as turns are recorded, and it is up to the owner of file to flush and close it.
+    Open file with buffering=1 to write each line as soon as it is recorded.
+
+    Instance Attributes:
+        - file:
+            The file that this log is written to.
+        - player:
+            The player whose game is logged.
+        - turns:
+            The number of turns recorded so far.
+        - checkpoint_every:
+            The most turns recorded between two checkpoints.
+
+    Representation Invariants:
+        - self.turns >= 0
+        - self.checkpoint_every > 0
+    """
+    file: TextIO
+    player: Player
+    turns: int
+    checkpoint_every: int
+    _definition: WorldDefinition
+    _sink: _LogSink
+
+    def __init__(self, file: TextIO, player: Player, checkpoint_every: int = CHECKPOINT_EVERY) -> None:
+        """Start logging the game of player to file, from the state it is in now.
+
+        The player's output is sent through this log, so the log should be started after anything that changes
+        the player's output sink.
+
+        Preconditions:
+            - the player is about to enter their next command
+        """
+        self.file = file
+        self.player = player
+        self.turns = 0
+        self.checkpoint_every = checkpoint_every
+        self._definition = definition_of(player.world)
+        self._sink = _LogSink(player.output)
+        player.output = self._sink
+        self._write({'log': LOG_VERSION, 'world': self._definition.fingerprint})
+        self._write_checkpoint()
+
+    def _write(self, record: dict) -> None:
+        """Append record to the log."""
+        self.file.write(_encode(record) + '\n')
+
+    def _write_checkpoint(self) -> None:
+        """Append the current state of the game to the log."""
+        state = self._definition.save(self.player.world, self.player)
+        self._write({'checkpoint': self.turns, 'state': base64.b64encode(state).decode('ascii')})
+
+    def record_turn(self, command: str, answers: list[str]) -> None:
+        """Record a turn in which the player entered command, and answered the prompts during it with answers.
+
+        Preconditions:
+            - the turn is over, and the player's location has been described if the game is not over
+        """
+        self.turns += 1
+        p = self.player
+        self._write({'turn': self.turns, 'command': command, 'input': answers, 'events': self._sink.events,
+                     'x': p.x, 'y': p.y, 'moves': p.moves, 'score': p.score})
+        self._sink.events = []
+        if self.turns % self.checkpoint_every == 0 or command.split(' ', 1)[0] in UNREPLAYED_VERBS:
+            self._write_checkpoint()
+
+
+def read_log(lines: Iterable[str]) -> Iterator[dict]:
+    """Return the records of the log with the given lines, in order."""
+    return (json.loads(line) for line in lines if line.strip())
+
+
+def rebuild(lines: Iterable[str], definition: WorldDefinition,
+            turn: Optional[int] = None) -> tuple[World, Player]:
+    """Return a new game of definition in the state after the given turn of the log with the given lines,
+    or after its last turn if turn is None.
+
+    The game is loaded from the nearest checkpoint at or before turn, and only the turns after it are replayed.
+    Only the checkpoints and those turns are decoded. Raise LogError if the log is not of this world, does not
+    reach turn, or a replayed turn does not end in the state it was logged with.
+    """
+    lines = [line for line in lines if line.strip()]
+    if not lines:
+        raise LogError('the log is empty')
+    header = json.loads(lines[0])
+    if header.get('log') != LOG_VERSION:
+        raise LogError(f'the log is not a session log of version {LOG_VERSION}')
+    if header.get('world') != definition.fingerprint:
+        raise LogError('the log is of a different world')
+
+    start, checkpoint = None, None
+    for i in range(len(lines) - 1, 0, -1):
+        if lines[i].startswith(_CHECKPOINT_PREFIX):
+            record = json.loads(lines[i])
+            if turn is None or record['checkpoint'] <= turn:
+                start, checkpoint = i, record
+                break
+    if checkpoint is None:
+        raise LogError('the log has no checkpoint to rebuild from')
+
+    w, p = definition.new_game()
+    definition.load(w, p, base64.b64decode(checkpoint['state']))
+    location = w.get_location(p.x, p.y)
+    reached = checkpoint['checkpoint']
+    output, input_source = p.output, p.input_source
+    p.output = NullSink()
+    try:
+        for line in lines[start + 1:]:
+            if turn is not None and reached >= turn:
+                break
+            if line.startswith(_CHECKPOINT_PREFIX):
+                continue
+            record = json.loads(line)
+            answers = iter(record['input'])
+            p.input_source = lambda prompt='': next(answers)
+            quit_game = take_turn(w, p, location, record['command'], MENU)
+            if not is_game_over(p, quit_game):
+                location = begin_turn(w, p)
+            if (p.x, p.y, p.moves, p.score) != (record['x'], record['y'], record['moves'], record['score']):
+                raise LogError(f'turn {record["turn"]} of the log does not replay to the state it was logged with')
+            reached = record['turn']
+    finally:
+        p.output, p.input_source = output, input_source
+
+    if turn is not None and reached < turn:
+        raise LogError(f'the log ends at turn {reached}, before turn {turn}')
+    return w, p
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in {2, 3}:
+        print('usage: python game_log.py LOG [TURN]')
+        sys.exit(2)
+    with open(sys.argv[1]) as log_file:
+        world, player = rebuild(log_file, WorldDefinition.from_files(),
+                                int(sys.argv[2]) if len(sys.argv) == 3 else None)
+    print(f'location={world.get_location(player.x, player.y).num} x={player.x} y={player.y} '
+          f'moves={player.moves} score={player.score} victory={player.victory} '
+          f'inventory={[item.name for item in player.inventory]}')
@@ -0,0 +1,151 @@
+"""CSC111 Project 1: Game Output
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the sinks that a game sends its output to. Every message of the game
+is an event of one of EVENT_KINDS, with the text that is shown to the player and the location,
+interactable or player that it is about. Each Player has an output sink, which starts as the
+output sink of their World:
+
+    - PrintSink prints the text of each event, like the original game.
+    - NullSink discards every event, for simulations that only need the final state.
+    - BufferedSink collects the text of events until it is taken, for network sessions.
+    - EventSink collects the events themselves, for tools that react to what happens rather than to text.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2024 CSC111 Teaching Team
+"""
+from __future__ import annotations
+
+EVENT_KINDS = (
+    'location',     # the description of a location; the subject is the Location
+    'hint',         # a hint about what to do next
+    'action',       # the result of an action on an interactable; the subject is the Item or Furniture
+    'points',       # the player's score changed
+    'picked_up',    # an item was added to the inventory; the subject is the Item
+    'dropped',      # an item was removed from the inventory; the subject is the Item
+    'opened',       # a furniture was opened; the subject is the Furniture
+    'contents',     # the items stored in a furniture; the subject is the Furniture
+    'delivered',    # a mission item was delivered; the subject is the MissionFurniture
+    'info',         # information the player asked for, such as the menu, score or inventory
+    'error',        # a command that could not be done
+    'prompt',       # a request for the player's next command
+    'ending',       # how the game ended
+)
+
+
+class Event:
+    """A message of a game, as sent to an output sink.
+
+    Instance Attributes:
+        - kind:
+            What the message is about.
+        - text:
+            The text of the message that is shown to the player.
+        - subject:
+            The location, interactable or player that the message is about, or None.
+        - end:
+            The text printed after self.text.
+
+    Representation Invariants:
+        - self.kind in EVENT_KINDS
+    """
+    kind: str
+    text: str
+    subject: object
+    end: str
+
+    def __init__(self, kind: str, text: str, subject: object = None, end: str = '\n') -> None:
+        """Initialize a new event."""
+        self.kind = kind
+        self.text = text
+        self.subject = subject
+        self.end = end
+
+    def __repr__(self) -> str:
+        return f'Event({self.kind!r}, {self.text!r})'
+
+
+class OutputSink:
+    """Where a game sends its output. This is an abstract class; subclasses decide what to do with events."""
+
+    def emit(self, kind: str, text: str, subject: object = None, end: str = '\n') -> None:
+        """Send an event of the given kind, with the given text followed by end, about subject.
+
+        Preconditions:
+            - kind in EVENT_KINDS
+        """
+        raise NotImplementedError
+
+
+class NullSink(OutputSink):
+    """An output sink that discards every event."""
+
+    def emit(self, kind: str, text: str, subject: object = None, end: str = '\n') -> None:
+        """Discard the event."""
+
+
+class PrintSink(OutputSink):
+    """An output sink that prints the text of every event to the current sys.stdout."""
+
+    def emit(self, kind: str, text: str, subject: object = None, end: str = '\n') -> None:
+        """Print text followed by end."""
+        print(text, end=end)
+
+
+class BufferedSink(OutputSink):
+    """An output sink that collects the text of events until it is taken."""
+    _parts: list[str]
+
+    def __init__(self) -> None:
+        """Initialize a new, empty sink."""
+        self._parts = []
+
+    def emit(self, kind: str, text: str, subject: object = None, end: str = '\n') -> None:
+        """Collect text followed by end."""
+        self._parts.append(text + end)
+
+    def getvalue(self) -> str:
+        """Return the text collected so far."""
+        return ''.join(self._parts)
+
+    def take(self) -> str:
+        """Return the text collected so far, and empty this sink."""
+        text = ''.join(self._parts)
+        self._parts.clear()
+        return text
+
+
+class EventSink(OutputSink):
+    """An output sink that collects every event.
+
+    Instance Attributes:
+        - events:
+            The events collected so far, in order.
+    """
+    events: list[Event]
+
+    def __init__(self) -> None:
+        """Initialize a new, empty sink."""
+        self.events = []
+
+    def emit(self, kind: str, text: str, subject: object = None, end: str = '\n') -> None:
+        """Collect an event with the given kind, text, subject and end."""
+        self.events.append(Event(kind, text, subject, end))
+
+    def text(self) -> str:
+        """Return the text of the events collected so far, as a PrintSink would have printed it."""
+        return ''.join(event.text + event.end for event in self.events)
+
+
+# The sink that worlds send their output to, unless they are given another one
+PRINT_SINK = PrintSink()
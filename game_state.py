@@ -0,0 +1,521 @@
+"""CSC111 Project 1: World Definitions and Game States
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module splits a game into the parts that never change during play, a WorldDefinition,
+and a compact GameState holding everything that does. A WorldDefinition is loaded from the world
+files once, and can then start any number of games, or restore any GameState, without reading
+the files again.
+
+    definition = WorldDefinition.from_files()
+    w, p = definition.new_game()
+    ...
+    snapshot = definition.capture(w, p)      # cheap to copy and to keep
+    w2, p2 = definition.new_game(snapshot)   # continue from the snapshot in a separate game
+    data = definition.save(w, p)             # a few dozen bytes, to keep on disk
+    definition.load(w2, p2, data)
+
+A saved game is a GameState encoded as its difference from the initial state of its world:
+
+    SAVE_MAGIC, SAVE_VERSION (1 byte), the world's fingerprint (4 bytes), the CRC-32 of the rest of the data
+    (4 bytes), then variable-length integers:
+    x, y, moves, score, victory, each bitset XORed with the initial bitset,
+    the number of items in the inventory and their ids,
+    the number of locations whose interactables are not a subsequence of their initial interactables, and for
+    each, its number, and the number and ids of the interactables at the end of it that are not in that subsequence.
+
+Objects that are not listed are still at their initial location, in their initial order. A saved game is only
+loaded if its checksum matches, the player is on a walkable location, and only Items are in the inventory.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2024 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import io
+import struct
+import weakref
+import zlib
+from array import array
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Optional, Union
+
+from adventure import new_game
+from compiled_world import new_compiled_game
+from game_data import Furniture, Interactables, Item, MissionItem, MissionLocation, Player, SparseMap, World
+
+WORLD_FILES = ('map.txt', 'locations.txt', 'items.txt')
+
+# The place of an object that is in the player's inventory
+INVENTORY = -2
+
+SAVE_MAGIC = b'CSCG'
+SAVE_VERSION = 2
+SAVE_HEADER = struct.Struct('<4sBII')
+# The file that the save and load commands use when they are not given one
+SAVE_FILE = 'adventure.sav'
+
+# The definition that each world started by WorldDefinition.new_game is a game of
+_games: weakref.WeakKeyDictionary[World, WorldDefinition] = weakref.WeakKeyDictionary()
+# The definition of the world in WORLD_FILES, once it is needed
+_default_definition: Optional[WorldDefinition] = None
+
+
+class SaveFileError(Exception):
+    """Raised when saved game data is damaged, or is not a game of the world it is loaded into."""
+
+
+@dataclass
+class GameState:
+    """Everything about a game that can change during play.
+
+    Locations are identified by their index in World.locations, and interactables by their id,
+    which is their index in World.objects. Bit i of a bitset is set for location or object i.
+
+    Instance Attributes:
+        - x:
+            The player's x coordinate on the map.
+        - y:
+            The player's y coordinate on the map.
+        - moves:
+            The player's number of moves.
+        - score:
+            The player's score.
+        - victory:
+            The player's victory status.
+        - visited:
+            Bitset of the locations that have been visited.
+        - missions:
+            Bitset of the MissionLocations whose mission has been completed.
+        - picked_up:
+            Bitset of the Items that have ever been picked up.
+        - opened:
+            Bitset of the Furniture that has been opened.
+        - completed:
+            Bitset of the MissionItems whose mission has been completed.
+        - stored:
+            Bitset of the Items that are still stored in the Furniture they were loaded in.
+        - places:
+            The number of the location that each object is at, or INVENTORY if it is in the player's inventory.
+        - order:
+            The position of each object in its location's interactables, or in the player's inventory.
+
+    Representation Invariants:
+        - len(self.places) == len(self.order)
+    """
+    x: int
+    y: int
+    moves: int
+    score: int
+    victory: bool
+    visited: int
+    missions: int
+    picked_up: int
+    opened: int
+    completed: int
+    stored: int
+    places: array
+    order: array
+
+    def copy(self) -> GameState:
+        """Return a copy of this state that can be changed without changing this state."""
+        return GameState(self.x, self.y, self.moves, self.score, self.victory, self.visited, self.missions,
+                         self.picked_up, self.opened, self.completed, self.stored,
+                         array('i', self.places), array('i', self.order))
+
+
+@dataclass(frozen=True)
+class WorldDefinition:
+    """The parts of a world that never change during play, shared by every game of that world.
+
+    Instance Attributes:
+        - start:
+            The (x, y) coordinates that every player starts at.
+        - initial:
+            The state of a new game. It must not be mutated; use initial.copy() to change it.
+
+    Representation Invariants:
+        - No player ever plays in self._template
+    """
+    start: tuple[int, int]
+    initial: GameState
+    _template: World
+
+    @staticmethod
+    def from_files(files: tuple[str, str, str] = WORLD_FILES, lazy_descriptions: bool = False) -> WorldDefinition:
+        """Return the definition of the world in the given map, locations and items files.
+        If lazy_descriptions is True, location descriptions are read from the locations file when they are needed.
+        """
+        if lazy_descriptions:
+            with open(files[0]) as map_file, open(files[1]) as locations_file, open(files[2]) as items_file:
+                w, p = new_game(map_file, locations_file, items_file, lazy_descriptions=True)
+            return WorldDefinition.from_world(w, p)
+
+        texts = []
+        for filename in files:
+            with open(filename) as f:
+                texts.append(f.read())
+        w, p = new_game(io.StringIO(texts[0]), io.StringIO(texts[1]), io.StringIO(texts[2]))
+        return WorldDefinition.from_world(w, p)
+
+    @staticmethod
+    def from_compiled(path: str) -> WorldDefinition:
+        """Return the definition of the world compiled in the file at path (see compiled_world)."""
+        return WorldDefinition.from_world(*new_compiled_game(path))
+
+    @staticmethod
+    def from_world(world: World, player: Player) -> WorldDefinition:
+        """Return the definition of the given world, with games starting where the given player is.
+
+        Preconditions:
+            - No player has played in world
+        """
+        # Built before any game is forked from world, so that every game shares it
+        world.get_navigation()
+        return WorldDefinition((player.x, player.y), capture_state(world, player), world)
+
+    @property
+    def map(self) -> Union[list[list[int]], SparseMap]:
+        """Return the map shared by every game of this world. It must not be mutated."""
+        return self._template.map
+
+    @property
+    def template(self) -> World:
+        """Return the world that every game of this world is forked from, as it was before any play.
+        It must not be mutated or played in.
+        """
+        return self._template
+
+    def new_game(self, state: Optional[GameState] = None) -> tuple[World, Player]:
+        """Return a new game of this world, in the given state if one is given.
+        The new world shares all data that does not change during play with every other game of this world.
+        """
+        w = self._template.fork()
+        _games[w] = self
+        p = Player(self.start[0], self.start[1], w)
+        if state is not None:
+            restore_state(w, p, state)
+        return w, p
+
+    def capture(self, world: World, player: Player) -> GameState:
+        """Return the state of the given game of this world."""
+        return capture_state(world, player)
+
+    def restore(self, world: World, player: Player, state: GameState) -> None:
+        """Change the given game of this world to be in the given state."""
+        restore_state(world, player, state)
+
+    def save(self, world: World, player: Player) -> bytes:
+        """Return the state of the given game of this world as saved game data."""
+        return encode_state(self, capture_state(world, player))
+
+    def load(self, world: World, player: Player, data: bytes) -> None:
+        """Change the given game of this world to be in the state saved in data.
+        Raise SaveFileError if data is not a saved game of this world.
+        """
+        restore_state(world, player, decode_state(self, data))
+
+    @cached_property
+    def fingerprint(self) -> int:
+        """A checksum of the locations and interactables of this world, which saved games of it are marked with."""
+        checksum = zlib.crc32(array('i', [location.num for location in self._template.locations]).tobytes())
+        checksum = zlib.crc32(self.initial.places.tobytes(), checksum)
+        for interactable in self._template.objects:
+            checksum = zlib.crc32(f'{type(interactable).__name__}:{interactable.name}'.encode(), checksum)
+        return checksum
+
+    @cached_property
+    def homes(self) -> dict[int, list[int]]:
+        """The ids of the interactables at each place in the initial state of this world, in order."""
+        return _stores(self.initial)
+
+
+def definition_of(world: World) -> WorldDefinition:
+    """Return the definition that world is a game of.
+    Worlds that were not started by WorldDefinition.new_game are taken to be games of the world in WORLD_FILES.
+    """
+    global _default_definition
+    if world in _games:
+        return _games[world]
+    if _default_definition is None:
+        _default_definition = WorldDefinition.from_files()
+    return _default_definition
+
+
+def save_to_file(world: World, player: Player, path: str) -> int:
+    """Save the game that the given player is playing in the given world to the file at path,
+    and return the size of the saved game in bytes.
+    """
+    data = definition_of(world).save(world, player)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def load_from_file(world: World, player: Player, path: str) -> None:
+    """Change the game that the given player is playing in the given world to the game saved in the file at path.
+    Raise SaveFileError if the file is not a saved game of this world.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    definition_of(world).load(world, player, data)
+
+
+def capture_state(world: World, player: Player) -> GameState:
+    """Return the state of the game that the given player is playing in the given world."""
+    ids = {id(interactable): i for i, interactable in enumerate(world.objects)}
+    places = array('i', [INVENTORY]) * len(world.objects)
+    order = array('i', [0]) * len(world.objects)
+    for location_num, interactables in world.interactables.items():
+        for position, interactable in enumerate(interactables):
+            places[ids[id(interactable)]] = location_num
+            order[ids[id(interactable)]] = position
+    for position, item in enumerate(player.inventory):
+        order[ids[id(item)]] = position
+
+    visited = missions = 0
+    for i, location in enumerate(world.locations):
+        if location.visited:
+            visited |= 1 << i
+        if isinstance(location, MissionLocation) and location.mission_completed:
+            missions |= 1 << i
+
+    picked_up = opened = completed = stored = 0
+    for i, interactable in enumerate(world.objects):
+        if isinstance(interactable, Furniture):
+            if interactable.opened:
+                opened |= 1 << i
+        else:
+            if interactable.picked_up:
+                picked_up |= 1 << i
+            if interactable.stored_in_furniture:
+                stored |= 1 << i
+            if isinstance(interactable, MissionItem) and interactable.mission_completed:
+                completed |= 1 << i
+
+    return GameState(player.x, player.y, player.moves, player.score, player.victory, visited, missions,
+                     picked_up, opened, completed, stored, places, order)
+
+
+def restore_state(world: World, player: Player, state: GameState) -> None:
+    """Change the game that the given player is playing in the given world to be in the given state.
+
+    Preconditions:
+        - world was forked from the same world as the one state was captured from
+    """
+    player.x, player.y = state.x, state.y
+    player.moves, player.score, player.victory = state.moves, state.score, state.victory
+    if player.history is not None:
+        player.history.clear()
+
+    for i, location in enumerate(world.locations):
+        location.visited = bool(state.visited >> i & 1)
+        if isinstance(location, MissionLocation):
+            location.mission_completed = bool(state.missions >> i & 1)
+
+    # Names of the Furniture that each Item was loaded in, from a world that has never been played
+    loaded_in = {}
+    for furniture in world.objects:
+        if isinstance(furniture, Furniture):
+            for item in furniture.items:
+                loaded_in[id(item)] = furniture.name
+
+    for i, interactable in enumerate(world.objects):
+        if isinstance(interactable, Furniture):
+            interactable.opened = bool(state.opened >> i & 1)
+        else:
+            interactable.picked_up = bool(state.picked_up >> i & 1)
+            interactable.stored_in_furniture = loaded_in.get(id(interactable), '') if state.stored >> i & 1 else ''
+            if isinstance(interactable, MissionItem):
+                interactable.mission_completed = bool(state.completed >> i & 1)
+
+    # Each location shares its store of interactables with world.interactables, so each store is refilled once
+    placed = sorted(range(len(world.objects)), key=lambda obj_id: (state.places[obj_id], state.order[obj_id]))
+    for interactables in world.interactables.values():
+        interactables.clear()
+    player.inventory.clear()
+    for obj_id in placed:
+        if state.places[obj_id] == INVENTORY:
+            player.inventory.append(world.objects[obj_id])
+        else:
+            if state.places[obj_id] not in world.interactables:
+                world.interactables[state.places[obj_id]] = Interactables()
+            world.interactables[state.places[obj_id]].append(world.objects[obj_id])
+
+
+def _stores(state: GameState) -> dict[int, list[int]]:
+    """Return the ids of the objects at each place in state, in order."""
+    stores = {}
+    for obj_id in sorted(range(len(state.places)), key=lambda i: (state.places[i], state.order[i])):
+        stores.setdefault(state.places[obj_id], []).append(obj_id)
+    return stores
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    """Append value to out as an unsigned variable-length integer, 7 bits per byte.
+
+    Preconditions:
+        - value >= 0
+    """
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _write_signed(out: bytearray, value: int) -> None:
+    """Append value to out as a variable-length integer, with its sign in its lowest bit."""
+    _write_varint(out, value << 1 if value >= 0 else (-value << 1) - 1)
+
+
+class _VarintReader:
+    """A reader of the variable-length integers in saved game data.
+
+    Instance Attributes:
+        - data:
+            The saved game data.
+        - position:
+            The index in data of the next byte to read.
+    """
+    data: bytes
+    position: int
+
+    def __init__(self, data: bytes, position: int) -> None:
+        """Initialize a new reader of data, starting at position."""
+        self.data = data
+        self.position = position
+
+    def read(self) -> int:
+        """Return the next unsigned integer, or raise SaveFileError if the data ends before it does."""
+        value = shift = 0
+        while True:
+            if self.position >= len(self.data):
+                raise SaveFileError('saved game data ends unexpectedly')
+            byte = self.data[self.position]
+            self.position += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def read_signed(self) -> int:
+        """Return the next signed integer."""
+        value = self.read()
+        return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+    def read_ids(self, objects: int) -> list[int]:
+        """Return a count, and that many object ids, each less than objects."""
+        ids = [self.read() for _ in range(self.read())]
+        if any(obj_id >= objects for obj_id in ids):
+            raise SaveFileError('saved game data refers to an interactable that is not in this world')
+        return ids
+
+
+def encode_state(definition: WorldDefinition, state: GameState) -> bytes:
+    """Return state, a state of a game of definition, as saved game data (see the module docstring)."""
+    initial = definition.initial
+    out = bytearray(SAVE_HEADER.size)
+    for value in (state.x, state.y, state.moves, state.score):
+        _write_signed(out, value)
+    out.append(state.victory)
+    for value, initial_value in ((state.visited, initial.visited), (state.missions, initial.missions),
+                                 (state.picked_up, initial.picked_up), (state.opened, initial.opened),
+                                 (state.completed, initial.completed), (state.stored, initial.stored)):
+        _write_varint(out, value ^ initial_value)
+
+    stores = _stores(state)
+    inventory = stores.pop(INVENTORY, [])
+    _write_varint(out, len(inventory))
+    for obj_id in inventory:
+        _write_varint(out, obj_id)
+
+    # The objects at each place that are still where they started form a prefix of that place,
+    # since interactables are only ever added to the end of a place
+    tails = []
+    for place, ids in stores.items():
+        position = last_order = 0
+        while position < len(ids) and initial.places[ids[position]] == place and \
+                (position == 0 or initial.order[ids[position]] > last_order):
+            last_order = initial.order[ids[position]]
+            position += 1
+        if position < len(ids):
+            tails.append((place, ids[position:]))
+    _write_varint(out, len(tails))
+    for place, ids in tails:
+        _write_signed(out, place)
+        _write_varint(out, len(ids))
+        for obj_id in ids:
+            _write_varint(out, obj_id)
+    SAVE_HEADER.pack_into(out, 0, SAVE_MAGIC, SAVE_VERSION, definition.fingerprint,
+                          zlib.crc32(memoryview(out)[SAVE_HEADER.size:]))
+    return bytes(out)
+
+
+def decode_state(definition: WorldDefinition, data: bytes) -> GameState:
+    """Return the state saved in data by encode_state, for a game of definition.
+    Raise SaveFileError if data is not a saved game of definition.
+    """
+    if len(data) < SAVE_HEADER.size:
+        raise SaveFileError('this is not a saved game')
+    magic, version, fingerprint, checksum = SAVE_HEADER.unpack_from(data)
+    if magic != SAVE_MAGIC:
+        raise SaveFileError('this is not a saved game')
+    if version != SAVE_VERSION:
+        raise SaveFileError(f'this game was saved in format version {version}, not {SAVE_VERSION}')
+    if fingerprint != definition.fingerprint:
+        raise SaveFileError('this game was saved in a different world')
+    if checksum != zlib.crc32(memoryview(data)[SAVE_HEADER.size:]):
+        raise SaveFileError('saved game data is damaged')
+
+    initial = definition.initial
+    objects = len(initial.places)
+    reader = _VarintReader(data, SAVE_HEADER.size)
+    x, y, moves, score = (reader.read_signed() for _ in range(4))
+    victory = bool(reader.read())
+    visited, missions, picked_up, opened, completed, stored = (
+        reader.read() ^ initial_value for initial_value in (initial.visited, initial.missions, initial.picked_up,
+                                                            initial.opened, initial.completed, initial.stored))
+    inventory = reader.read_ids(objects)
+    tails = {}
+    for _ in range(reader.read()):
+        place = reader.read_signed()
+        tails[place] = reader.read_ids(objects)
+    if reader.position != len(data):
+        raise SaveFileError('saved game data has extra bytes at the end')
+
+    world = definition.template
+    if world.get_location(x, y) is None:
+        raise SaveFileError('saved game data puts the player where there is no location')
+    if not all(isinstance(world.objects[obj_id], Item) for obj_id in inventory):
+        raise SaveFileError('saved game data puts furniture in the inventory')
+    if not tails.keys() <= world.location_index.keys():
+        raise SaveFileError('saved game data puts an interactable in a location that is not in this world')
+
+    moved = set(inventory)
+    for ids in tails.values():
+        moved.update(ids)
+    if len(moved) != len(inventory) + sum(len(ids) for ids in tails.values()):
+        raise SaveFileError('saved game data puts an interactable in two places')
+
+    places = array('i', initial.places)
+    order = array('i', initial.order)
+    for position, obj_id in enumerate(inventory):
+        places[obj_id] = INVENTORY
+        order[obj_id] = position
+    # Only the places that objects were moved from or to are not in their initial order
+    for place in {initial.places[obj_id] for obj_id in moved} | tails.keys():
+        ids = [obj_id for obj_id in definition.homes.get(place, []) if obj_id not in moved] + tails.get(place, [])
+        for position, obj_id in enumerate(ids):
+            places[obj_id] = place
+            order[obj_id] = position
+    return GameState(x, y, moves, score, victory, visited, missions, picked_up, opened, completed, stored,
+                     places, order)
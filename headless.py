@@ -0,0 +1,194 @@
+"""CSC111 Project 1: Headless Game Runner
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module replays games in-process, without a terminal. Commands are fed from
+a transcript file or any iterable of strings into the same turn functions as the game loop
+in the `adventure` module, and each game returns a structured GameResult.
+
+To replay transcripts from the command line:
+
+    python headless.py gameplay1.txt gameplay4.txt
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2024 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import sys
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, Optional
+
+from adventure import MENU, begin_turn, take_turn, is_game_over
+from game_data import History, World, Player
+from game_output import BufferedSink, OutputSink
+from game_state import WORLD_FILES, WorldDefinition
+
+# Definitions of the worlds that have already been loaded, keyed by the paths of their files
+_definitions: dict[tuple[str, str, str], WorldDefinition] = {}
+
+
+@dataclass
+class StepEvent:
+    """A single turn of a replayed game.
+
+    Instance Attributes:
+        - command:
+            The action the player entered this turn.
+        - location:
+            The number of the location the player was at when they entered command.
+        - output:
+            Everything printed in response to command, including the description of the location
+            the player is at afterwards.
+        - extra_input:
+            Lines read by prompts during this turn, such as the key of a LockedFurniture.
+        - score:
+            The player's score after this turn.
+        - moves:
+            The player's number of moves after this turn.
+    """
+    command: str
+    location: int
+    output: str
+    extra_input: list[str]
+    score: int
+    moves: int
+
+
+@dataclass
+class GameResult:
+    """The result of a replayed game.
+
+    Instance Attributes:
+        - victory:
+            Whether the player won.
+        - quit:
+            Whether the player quit.
+        - score:
+            The player's final score.
+        - moves:
+            The player's final number of moves.
+        - opening:
+            Everything printed before the player's first command.
+        - steps:
+            A StepEvent for every command the player entered, in order.
+
+    Representation Invariants:
+        - not (self.victory and self.quit)
+    """
+    victory: bool
+    quit: bool
+    score: int
+    moves: int
+    opening: str
+    steps: list[StepEvent] = field(default_factory=list)
+
+
+def load_definition(files: tuple[str, str, str] = WORLD_FILES) -> WorldDefinition:
+    """Return the definition of the world in the given map, locations and items files.
+    Each set of files is only read from disk once.
+    """
+    if files not in _definitions:
+        _definitions[files] = WorldDefinition.from_files(files)
+    return _definitions[files]
+
+
+def load_game(files: tuple[str, str, str] = WORLD_FILES) -> tuple[World, Player]:
+    """Return a new World and Player for the given map, locations and items files."""
+    return load_definition(files).new_game()
+
+
+def _input_from(commands: Iterator[str], extra_input: list[str], output: OutputSink) -> Callable[[str], str]:
+    """Return an input function that reads lines from commands and records them in extra_input.
+    Like the built-in input function, it sends the prompt to output, and raises EOFError when there are no lines left.
+    """
+    def read_line(prompt: str = '') -> str:
+        """Return the next line of commands."""
+        output.emit('prompt', prompt, end='')
+        for line in commands:
+            extra_input.append(line)
+            return line
+        raise EOFError
+
+    return read_line
+
+
+def replay(commands: Iterable[str], files: tuple[str, str, str] = WORLD_FILES,
+           game: Optional[tuple[World, Player]] = None) -> GameResult:
+    """Play a new game with the given commands and return its result.
+
+    The game ends when the player wins, quits, runs out of moves, or there are no commands left.
+    Prompts during a turn, such as asking for the key of a LockedFurniture, read the next command.
+    If game is given, commands are played in that world by that player instead of in a new game.
+    The player is given a History if they do not have one, so that commands can undo turns.
+    """
+    w, p = game if game is not None else load_game(files)
+    lines = iter(commands)
+    extra_input = []
+    output = BufferedSink()
+    p.input_source = _input_from(lines, extra_input, output)
+    p.output = output
+    if p.history is None:
+        p.history = History()
+
+    location = begin_turn(w, p)
+    result = GameResult(False, False, 0, 0, output.take())
+
+    quit_game = False
+    while not is_game_over(p, quit_game):
+        command = next(lines, None)
+        if command is None:
+            break
+        command = command.lower().strip()
+        command_location = location.num
+
+        extra_input.clear()
+        out_of_input = False
+        try:
+            quit_game = take_turn(w, p, location, command, MENU)
+            if not is_game_over(p, quit_game):
+                location = begin_turn(w, p)
+        except EOFError:  # A prompt ran out of commands
+            out_of_input = True
+
+        result.steps.append(StepEvent(command, command_location, output.take(), list(extra_input),
+                                      p.score, p.moves))
+        if out_of_input:
+            break
+
+    result.victory = p.victory
+    result.quit = quit_game
+    result.score = p.score
+    result.moves = p.moves
+    return result
+
+
+def replay_transcript(transcript: str, files: tuple[str, str, str] = WORLD_FILES) -> GameResult:
+    """Replay the game recorded in the transcript file at the given path, such as gameplay1.txt.
+
+    A transcript contains exactly what a player types when playing adventure.py, so its first
+    line answers the "Press ENTER to continue." prompt and is skipped.
+    """
+    with open(transcript) as f:
+        lines = f.read().splitlines()
+    return replay(lines[1:], files)
+
+
+def replay_many(transcripts: Iterable[str], files: tuple[str, str, str] = WORLD_FILES) -> list[GameResult]:
+    """Replay every transcript file in transcripts and return their results in order."""
+    return [replay_transcript(transcript, files) for transcript in transcripts]
+
+
+if __name__ == '__main__':
+    for path in sys.argv[1:]:
+        game_result = replay_transcript(path)
+        print(f'{path}: victory={game_result.victory} quit={game_result.quit} '
+              f'score={game_result.score} moves={game_result.moves} steps={len(game_result.steps)}')
@@ -0,0 +1,280 @@
+"""CSC111 Project 1: Instrumentation
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module measures where the time of a game goes. It is off unless it is enabled:
+
+    python adventure.py --stats[=FILE]
+    python server.py [PORT [LOG DIRECTORY]] --stats[=FILE]
+
+or by calling enable() from code. While it is off, nothing is wrapped, so the game runs exactly as it does
+without this module. While it is on, these calls are counted and timed into latency histograms:
+
+    - do_action of the adventure module, by the verb of the command (or 'invalid' for verbs that do nothing)
+    - World.move_player, World.pick, World.open and Location.visit, by operation
+    - World.__init__, as the operation 'load_world'
+
+The stats command shows what has been recorded. If a FILE is given when the game or server is started,
+"stats export" writes the record to that file, and only to that file, in the Prometheus text exposition format,
+where the _count of each histogram is the counter of its calls:
+
+    # TYPE adventure_command_duration_seconds histogram
+    adventure_command_duration_seconds_bucket{verb="go",le="5e-06"} 0
+    ...
+    adventure_command_duration_seconds_sum{verb="go"} 0.000412
+    adventure_command_duration_seconds_count{verb="go"} 12
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2024 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import functools
+import os
+import time
+from bisect import bisect_left
+from types import ModuleType
+from typing import Callable, Optional
+
+from game_data import Location, Player, World
+
+# The upper bounds in seconds of the buckets of every latency histogram, before the last bucket of +Inf
+BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0)
+
+# The name and label of the metric of commands and of other operations
+COMMAND_METRIC = ('adventure_command_duration_seconds', 'verb')
+OPERATION_METRIC = ('adventure_operation_duration_seconds', 'operation')
+HELP = {
+    COMMAND_METRIC: 'Time to handle a command, by the verb of the command.',
+    OPERATION_METRIC: 'Time taken by a game operation, such as moving a player or loading a world.',
+}
+
+# The methods that are timed as operations: (class, method name, operation)
+OPERATIONS = (
+    (World, 'move_player', 'move_player'),
+    (World, 'pick', 'pick'),
+    (World, 'open', 'open'),
+    (Location, 'visit', 'visit'),
+    (World, '__init__', 'load_world'),
+)
+
+
+class Histogram:
+    """A histogram of latencies in seconds, with the buckets of BUCKETS.
+
+    Instance Attributes:
+        - counts:
+            The number of latencies in each bucket, not counting those of the buckets before it.
+            The last count is of the latencies greater than every bound in BUCKETS.
+        - total:
+            The sum of the latencies.
+        - count:
+            The number of latencies.
+
+    Representation Invariants:
+        - len(self.counts) == len(BUCKETS) + 1
+        - sum(self.counts) == self.count
+    """
+    counts: list[int]
+    total: float
+    count: int
+
+    def __init__(self) -> None:
+        """Initialize a new histogram with no latencies."""
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        """Add a latency of the given number of seconds to this histogram."""
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Return the upper bound of the bucket of the latency at quantile q of this histogram,
+        or infinity if that latency is greater than every bound in BUCKETS.
+
+        Preconditions:
+            - self.count > 0
+            - 0.0 <= q <= 1.0
+        """
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank and seen > 0:
+                return bound
+        return float('inf')
+
+
+class Instrumentation:
+    """The counts and latencies recorded while instrumentation is enabled.
+
+    Instance Attributes:
+        - histograms:
+            A mapping of each (metric name, label name) in COMMAND_METRIC and OPERATION_METRIC
+            to the histogram of each value of that label.
+        - started:
+            The time.time() at which recording started.
+        - export_path:
+            The file that the stats command exports this record to, or None if it cannot export it.
+            It is chosen by whoever starts the game or server, never by a player.
+    """
+    histograms: dict[tuple[str, str], dict[str, Histogram]]
+    started: float
+    export_path: Optional[str]
+
+    def __init__(self, export_path: Optional[str] = None) -> None:
+        """Initialize a new record with no calls, which the stats command exports to export_path, if it is given."""
+        self.histograms = {COMMAND_METRIC: {}, OPERATION_METRIC: {}}
+        self.started = time.time()
+        self.export_path = export_path
+
+    def observe(self, metric: tuple[str, str], label: str, seconds: float) -> None:
+        """Record a call with the given label value of metric that took the given number of seconds."""
+        histograms = self.histograms[metric]
+        histogram = histograms.get(label)
+        if histogram is None:
+            histogram = histograms[label] = Histogram()
+        histogram.observe(seconds)
+
+    def report(self) -> str:
+        """Return a table of the calls of each verb and operation, and their latencies in microseconds.
+        The median and 99th percentile are the upper bounds of the buckets they fall in.
+        """
+        lines = [f'Recorded over {time.time() - self.started:.0f} seconds.',
+                 f'{"":<12} {"calls":>8} {"total ms":>10} {"mean us":>9} {"p50 us":>9} {"p99 us":>9}']
+        for (_, label_name), histograms in self.histograms.items():
+            if not histograms:
+                continue
+            lines.append(f'By {label_name}:')
+            for label, histogram in sorted(histograms.items(), key=lambda item: -item[1].total):
+                lines.append(f'{label:<12} {histogram.count:>8} {histogram.total * 1e3:>10.2f} '
+                             f'{histogram.total / histogram.count * 1e6:>9.1f} '
+                             f'{histogram.quantile(0.5) * 1e6:>9.0f} {histogram.quantile(0.99) * 1e6:>9.0f}')
+        if len(lines) == 2:
+            lines.append('Nothing has been recorded yet.')
+        return '\n'.join(lines)
+
+    def to_prometheus(self) -> str:
+        """Return the histograms of this record in the Prometheus text exposition format."""
+        lines = []
+        for (name, label_name), histograms in self.histograms.items():
+            lines.append(f'# HELP {name} {HELP[name, label_name]}')
+            lines.append(f'# TYPE {name} histogram')
+            for label, histogram in sorted(histograms.items()):
+                labels = f'{label_name}="{_escaped(label)}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{labels}}} {histogram.total!r}')
+                lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path: str) -> None:
+        """Write the histograms of this record to the file at path, in the Prometheus text exposition format.
+        The file is replaced, so that a scraper reading it sees either the old or the new export.
+        """
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(temporary, path)
+
+
+def _escaped(label: str) -> str:
+    """Return label with backslashes, double quotes and newlines escaped, as a Prometheus label value."""
+    return label.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# The record being made, and the original of every function wrapped to make it, while instrumentation is enabled
+_active: Optional[Instrumentation] = None
+_originals: list[tuple[object, str, Callable]] = []
+
+
+def active() -> Optional[Instrumentation]:
+    """Return the record being made, or None if instrumentation is off."""
+    return _active
+
+
+def enable(game: Optional[ModuleType] = None, export_path: Optional[str] = None) -> Instrumentation:
+    """Turn instrumentation on, if it is off, and return the record being made.
+
+    game is the module whose do_action is timed: the adventure module by default. adventure.py passes itself,
+    because it runs as __main__ rather than as the adventure module. export_path is the file that the stats
+    command exports the record to, if it is given.
+    """
+    global _active
+    if _active is not None:
+        return _active
+    if game is None:
+        import adventure  # Imported here because adventure imports this module when it is enabled
+        game = adventure
+    _active = Instrumentation(export_path)
+    _wrap(game, 'do_action', _timed_command(game.do_action, game, _active))
+    for cls, method, operation in OPERATIONS:
+        _wrap(cls, method, _timed_operation(getattr(cls, method), operation, _active))
+    return _active
+
+
+def disable() -> Optional[Instrumentation]:
+    """Turn instrumentation off, putting back every wrapped function, and return the record that was being made,
+    or None if instrumentation was already off.
+    """
+    global _active
+    record = _active
+    while _originals:
+        owner, name, original = _originals.pop()
+        setattr(owner, name, original)
+    _active = None
+    return record
+
+
+def _wrap(owner: object, name: str, wrapper: Callable) -> None:
+    """Replace the attribute name of owner, a module or class, with wrapper, remembering the original."""
+    _originals.append((owner, name, getattr(owner, name)))
+    setattr(owner, name, wrapper)
+
+
+def _timed_command(do_action: Callable, game: ModuleType, record: Instrumentation) -> Callable:
+    """Return do_action of the module game, timing each call into record by the verb of its command."""
+    perf_counter = time.perf_counter
+
+    @functools.wraps(do_action)
+    def timed(world: World, player: Player, player_location: Location, player_choice: str,
+              menu_actions: list[str]) -> None:
+        verb = game.parse_command(player_choice).verb
+        # Only verbs that can do something are kept apart, so that typos do not each get a histogram
+        if not (verb in game.COMMANDS or verb in player_location.available_actions
+                or verb in player.inventory.actions):
+            verb = 'invalid'
+        start = perf_counter()
+        try:
+            return do_action(world, player, player_location, player_choice, menu_actions)
+        finally:
+            record.observe(COMMAND_METRIC, verb, perf_counter() - start)
+    return timed
+
+
+def _timed_operation(method: Callable, operation: str, record: Instrumentation) -> Callable:
+    """Return method, timing each call into record as the given operation."""
+    perf_counter = time.perf_counter
+
+    @functools.wraps(method)
+    def timed(*args: object, **kwargs: object) -> object:
+        start = perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            record.observe(OPERATION_METRIC, operation, perf_counter() - start)
+    return timed
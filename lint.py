@@ -0,0 +1,42 @@
+"""CSC111 Project 1: PythonTA Checks
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module runs PythonTA on the project's modules. It is a development tool only:
+the game modules no longer run PythonTA when they are imported or launched, so that
+starting the game does not load python_ta, pylint and astroid.
+
+    python lint.py                  # check every module in the project
+    python lint.py game_data.py     # check the given modules
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2024 CSC111 Teaching Team
+"""
+import glob
+import os
+import sys
+
+PYTHON_TA_CONFIG = {
+    'max-line-length': 120
+}
+
+
+def lint(modules: list[str]) -> None:
+    """Run PythonTA on each of the given module files."""
+    import python_ta  # Imported here so that importing this module stays cheap
+    for module in modules:
+        python_ta.check_all(module, config=PYTHON_TA_CONFIG)
+
+
+if __name__ == '__main__':
+    project_directory = os.path.dirname(os.path.abspath(__file__))
+    lint(sys.argv[1:] or sorted(glob.glob(os.path.join(project_directory, '*.py'))))
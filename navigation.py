@@ -0,0 +1,253 @@
+"""CSC111 Project 1: Navigation
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module indexes the map of a world for finding shortest routes between its cells, for the goto
+and hint commands and for anything else that needs distances on the map. The index is built once per world,
+and shared by every fork of it (see World.get_navigation).
+
+Only the walkable cells of the map are indexed, numbered row by row, so blocked cells cost nothing but an
+entry in the grid of cell numbers. A SparseMap has no such grid: its walkable cells are already numbered row
+by row, so cells are looked up in the map itself. The moves between walkable cells are kept in compressed sparse rows:
+the neighbours of cell i are neighbours[offsets[i]:offsets[i + 1]].
+
+A distance field holds the number of moves from one cell to every other cell, found by breadth-first search.
+Moves are reversible, so the field of either end of a route answers its distance in O(1), and the field of
+its destination answers its path in O(length of the path). The fields of every location are built with the
+index if there are at most cache_size locations, so that every query on a small map is answered without
+searching. Otherwise fields are built when they are first needed, and the most recently used cache_size of
+them are kept.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2024 CSC111 Teaching Team
+"""
+from __future__ import annotations
+from array import array
+from typing import Iterable, Optional, Union
+
+from game_data import SparseMap, walkable_cells
+
+# The (dx, dy) of a move north, south, east and west, in the order that the neighbours of a cell are tried
+STEPS = ((0, -1), (0, 1), (1, 0), (-1, 0))
+
+
+class NavigationIndex:
+    """An index of the shortest routes between the walkable cells of a map.
+
+    Instance Attributes:
+        - width:
+            The length of the longest row of the map.
+        - height:
+            The number of rows of the map.
+        - cells:
+            The number of walkable cells of the map.
+        - cache_size:
+            The greatest number of distance fields kept.
+
+    Representation Invariants:
+        - self.cells == len(self._positions)
+        - len(self._offsets) == self.cells + 1
+        - self.cache_size > 0
+    """
+    width: int
+    height: int
+    cells: int
+    cache_size: int
+    # The number of the walkable cell at y * width + x, or -1 if that cell is blocked or not on the map,
+    # unless the map is a SparseMap
+    _numbers: array
+    _sparse_map: Optional[SparseMap]
+    # The y * width + x of each walkable cell
+    _positions: array
+    _offsets: array
+    _neighbours: array
+    # The number of the connected component of each walkable cell
+    _components: array
+    # The distance fields, by the number of the cell they are from, kept in order from least to most recently used
+    _fields: dict[int, array]
+    _typecode: str
+    _unreachable: int
+
+    def __init__(self, world_map: Union[list[list[int]], SparseMap], locations: Iterable[tuple[int, int]] = (),
+                 cache_size: int = 64) -> None:
+        """Initialize a new index of world_map. If there are at most cache_size locations, given by their (x, y)
+        coordinates, the field of each of them is built now.
+        """
+        self.height = len(world_map)
+        if isinstance(world_map, SparseMap):
+            self._sparse_map = world_map
+            self.width = max(world_map.row_lengths, default=0)
+            self._numbers = array('i')
+        else:
+            self._sparse_map = None
+            self.width = max((len(row) for row in world_map), default=0)
+            self._numbers = array('i', [-1]) * (self.width * self.height)
+        self.cache_size = cache_size
+        self._positions = array('q')
+        for x, y, _ in walkable_cells(world_map):
+            if self._sparse_map is None:
+                self._numbers[y * self.width + x] = len(self._positions)
+            self._positions.append(y * self.width + x)
+        self.cells = len(self._positions)
+        # Distances fit in two bytes on any map with fewer cells than the largest two byte number
+        self._typecode = 'H' if self.cells < 0xFFFF else 'I'
+        self._unreachable = 0xFFFF if self._typecode == 'H' else 0xFFFFFFFF
+
+        offsets = [0]
+        neighbours = []
+        numbers, width, height = self._numbers, self.width, self.height
+        for position in self._positions:
+            x, y = position % width, position // width
+            for dx, dy in STEPS:
+                if self._sparse_map is not None:
+                    neighbour = self._sparse_map.cell_index(x + dx, y + dy)
+                elif 0 <= x + dx < width and 0 <= y + dy < height:
+                    neighbour = numbers[position + dy * width + dx]
+                else:
+                    neighbour = -1
+                if neighbour != -1:
+                    neighbours.append(neighbour)
+            offsets.append(len(neighbours))
+        self._offsets = array('i', offsets)
+        self._neighbours = array('i', neighbours)
+
+        self._components = array('i', [-1]) * self.cells
+        component = 0
+        for cell in range(self.cells):
+            if self._components[cell] == -1:
+                self._label(cell, component)
+                component += 1
+
+        self._fields = {}
+        locations = list(locations)
+        if len(locations) <= cache_size:
+            for x, y in locations:
+                if self.cell_number(x, y) != -1:
+                    self._field(self.cell_number(x, y))
+
+    def cell_number(self, x: int, y: int) -> int:
+        """Return the number of the walkable cell at (x, y), or -1 if there is none."""
+        if self._sparse_map is not None:
+            return self._sparse_map.cell_index(x, y)
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self._numbers[y * self.width + x]
+        return -1
+
+    def _label(self, start: int, component: int) -> None:
+        """Mark every cell reachable from start as being in the given component."""
+        offsets, neighbours, components = self._offsets, self._neighbours, self._components
+        components[start] = component
+        frontier = [start]
+        for cell in frontier:
+            for i in range(offsets[cell], offsets[cell + 1]):
+                if components[neighbours[i]] == -1:
+                    components[neighbours[i]] = component
+                    frontier.append(neighbours[i])
+
+    def _field(self, start: int) -> array:
+        """Return the distance field of the walkable cell start, building it if it is not kept."""
+        fields = self._fields
+        field = fields.pop(start, None)
+        if field is None:
+            offsets, neighbours, unreachable = self._offsets, self._neighbours, self._unreachable
+            field = array(self._typecode, [unreachable]) * self.cells
+            field[start] = 0
+            frontier = [start]
+            distance = 0
+            while frontier:
+                distance += 1
+                next_frontier = []
+                for cell in frontier:
+                    for i in range(offsets[cell], offsets[cell + 1]):
+                        neighbour = neighbours[i]
+                        if field[neighbour] == unreachable:
+                            field[neighbour] = distance
+                            next_frontier.append(neighbour)
+                frontier = next_frontier
+            if len(fields) >= self.cache_size:
+                del fields[next(iter(fields))]
+        fields[start] = field
+        return field
+
+    def _ends(self, start: tuple[int, int], end: tuple[int, int]) -> Optional[tuple[int, int]]:
+        """Return the numbers of the cells at start and end, or None if there is no route between them."""
+        start_cell, end_cell = self.cell_number(*start), self.cell_number(*end)
+        if start_cell == -1 or end_cell == -1 or self._components[start_cell] != self._components[end_cell]:
+            return None
+        return start_cell, end_cell
+
+    def is_reachable(self, start: tuple[int, int], end: tuple[int, int]) -> bool:
+        """Return whether a player at the (x, y) coordinates start can walk to the coordinates end."""
+        return self._ends(start, end) is not None
+
+    def distance(self, start: tuple[int, int], end: tuple[int, int]) -> Optional[int]:
+        """Return the fewest moves from the (x, y) coordinates start to the coordinates end,
+        or None if there is no route between them.
+        """
+        ends = self._ends(start, end)
+        if ends is None:
+            return None
+        start_cell, end_cell = ends
+        if start_cell in self._fields:
+            return self._field(start_cell)[end_cell]
+        return self._field(end_cell)[start_cell]
+
+    def path(self, start: tuple[int, int], end: tuple[int, int]) -> Optional[list[tuple[int, int]]]:
+        """Return the (dx, dy) of each move of a shortest route from the (x, y) coordinates start to the coordinates
+        end, or None if there is no route between them.
+
+        The route is always found in the field of end, so the same route is returned whichever fields are kept.
+        """
+        ends = self._ends(start, end)
+        if ends is None:
+            return None
+        start_cell, end_cell = ends
+        return self._descend(self._field(end_cell), start_cell)
+
+    def _descend(self, field: array, cell: int) -> list[tuple[int, int]]:
+        """Return the (dx, dy) of each move from cell to the cell that field is from, always moving to a closer cell.
+        Neighbours are tried in the order of STEPS, so routes of the same length are chosen the same way.
+        """
+        offsets, neighbours, width = self._offsets, self._neighbours, self.width
+        steps = []
+        while field[cell] != 0:
+            for i in range(offsets[cell], offsets[cell + 1]):
+                if field[neighbours[i]] == field[cell] - 1:
+                    here, there = self._positions[cell], self._positions[neighbours[i]]
+                    steps.append((there % width - here % width, there // width - here // width))
+                    cell = neighbours[i]
+                    break
+        return steps
+
+    def distances_to(self, end: tuple[int, int]) -> dict[tuple[int, int], int]:
+        """Return the fewest moves to the (x, y) coordinates end from the coordinates of each cell that can reach it."""
+        end_cell = self.cell_number(*end)
+        if end_cell == -1:
+            return {}
+        field, width, unreachable = self._field(end_cell), self.width, self._unreachable
+        return {(position % width, position // width): distance
+                for position, distance in zip(self._positions, field) if distance != unreachable}
+
+    def nearest(self, start: tuple[int, int], ends: Iterable[tuple[int, int]]) -> Optional[tuple[tuple[int, int], int]]:
+        """Return the coordinates in ends that are the fewest moves from the (x, y) coordinates start, and the
+        number of moves to them, or None if none of them can be reached. Ties go to the first of ends.
+        """
+        start_cell = self.cell_number(*start)
+        if start_cell == -1:
+            return None
+        field = self._field(start_cell)
+        best = None
+        for end in ends:
+            end_cell = self.cell_number(*end)
+            if end_cell != -1 and field[end_cell] != self._unreachable and (best is None or field[end_cell] < best[1]):
+                best = (end, field[end_cell])
+        return best
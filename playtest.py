@@ -0,0 +1,248 @@
+"""CSC111 Project 1: Monte Carlo Playtesting
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module plays many games with random or heuristic agents to balance the world.
+Episodes are spread across a pool of processes. Each worker loads the world once, and resets
+its game to the world's initial GameState between episodes. Every chunk of episodes is reduced
+to a PlaytestStats in its worker, and the parent merges chunks as they finish, so memory does
+not grow with the number of episodes.
+
+    python playtest.py [EPISODES] [random|heuristic]
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2024 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import os
+import random
+import sys
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Optional
+
+from adventure import DIRECTIONS, MENU, MAX_MOVES, begin_turn, take_turn, is_game_over
+from game_data import Item, Location, LockedFurniture, Player, World
+from game_output import NullSink
+from game_state import WORLD_FILES, WorldDefinition
+
+AGENTS = ('random', 'heuristic')
+GO_COMMANDS = tuple(f'go {direction}' for direction in DIRECTIONS)
+INFO_COMMANDS = ('look', 'inventory', 'score', 'menu')
+
+# The world definition and game of this worker process, loaded once by _init_worker
+_worker_definition: Optional[WorldDefinition] = None
+_worker_game: Optional[tuple[World, Player]] = None
+
+
+@dataclass
+class PlaytestStats:
+    """Aggregate results of playtesting episodes.
+
+    Instance Attributes:
+        - episodes:
+            The number of episodes played.
+        - wins:
+            The number of episodes won.
+        - out_of_moves:
+            The number of episodes lost by running out of moves.
+        - stuck:
+            The number of episodes that were still going after the most commands an episode may take.
+        - crashes:
+            The number of episodes that ended with the game raising an exception, for each exception type
+            and command that raised it.
+        - scores:
+            The number of episodes that ended with each score.
+        - dead_ends:
+            The number of lost episodes that ended in each state, given as the player's location number
+            and the sorted names of the items in their inventory.
+
+    Representation Invariants:
+        - self.wins + self.out_of_moves + self.stuck + sum(self.crashes.values()) == self.episodes
+        - sum(self.scores.values()) == self.episodes
+    """
+    episodes: int = 0
+    wins: int = 0
+    out_of_moves: int = 0
+    stuck: int = 0
+    crashes: Counter = field(default_factory=Counter)
+    scores: Counter = field(default_factory=Counter)
+    dead_ends: Counter = field(default_factory=Counter)
+
+    def merge(self, other: PlaytestStats) -> None:
+        """Add the results in other to these results."""
+        self.episodes += other.episodes
+        self.wins += other.wins
+        self.out_of_moves += other.out_of_moves
+        self.stuck += other.stuck
+        self.crashes.update(other.crashes)
+        self.scores.update(other.scores)
+        self.dead_ends.update(other.dead_ends)
+
+    def win_rate(self) -> float:
+        """Return the fraction of episodes that were won."""
+        return self.wins / self.episodes if self.episodes else 0.0
+
+    def mean_score(self) -> float:
+        """Return the average score of the episodes."""
+        return sum(score * count for score, count in self.scores.items()) / self.episodes if self.episodes else 0.0
+
+    def report(self, top: int = 5) -> str:
+        """Return a summary of these results, with the top most common dead ends."""
+        lines = [f'episodes: {self.episodes}',
+                 f'win rate: {self.win_rate():.4f} (under {MAX_MOVES} moves)',
+                 f'out of moves: {self.out_of_moves}, stuck: {self.stuck}',
+                 f'mean score: {self.mean_score():.1f}',
+                 f'crashes: {sum(self.crashes.values())}',
+                 'scores: ' + ', '.join(f'{score}: {count}' for score, count in sorted(self.scores.items())),
+                 'most common dead ends:']
+        for (location_num, inventory), count in self.dead_ends.most_common(top):
+            lines.append(f'\t{count} at location {location_num} holding {", ".join(inventory) or "nothing"}')
+        for (error, command), count in self.crashes.most_common(top):
+            lines.append(f'\t{count} crashes with {error} on {command!r}')
+        return '\n'.join(lines)
+
+
+def choose_command(agent: str, player: Player, location: Location, rng: random.Random) -> str:
+    """Return the next command of the given kind of agent for the player at location.
+
+    A random agent picks uniformly from every command that makes sense at location.
+    A heuristic agent prefers picking up, opening and interacting with things, and moving to
+    locations it has not visited, over dropping items and asking for information.
+    """
+    commands = list(GO_COMMANDS)
+    weights = [1.0] * len(commands)
+    if agent == 'heuristic':
+        for i, (dx, dy) in enumerate(DIRECTIONS.values()):
+            neighbour = player.world.get_location(player.x + dx, player.y + dy) \
+                if player.x + dx >= 0 and player.y + dy >= 0 else None
+            weights[i] = 0.1 if neighbour is None else (4.0 if not neighbour.visited else 1.0)
+
+    inventory_names = {item.name for item in player.inventory}
+    for interactable in location.interactables:
+        if isinstance(interactable, Item) and interactable.name not in inventory_names:
+            commands.append(f'pick {interactable.name}')
+            weights.append(5.0)
+    for action, names in location.available_actions.items():
+        if action not in {'pick', 'drop'}:
+            for name in names:
+                commands.append(f'{action} {name}')
+                weights.append(3.0)
+    for item in player.inventory:
+        commands.append(f'drop {item.name}')
+        weights.append(0.2)
+        for action in item.actions:
+            if action not in {'pick', 'drop'}:
+                commands.append(f'{action} {item.name}')
+                weights.append(0.5)
+    commands.extend(INFO_COMMANDS)
+    weights.extend([0.1] * len(INFO_COMMANDS))
+
+    if agent == 'random':
+        return rng.choice(commands)
+    return rng.choices(commands, weights)[0]
+
+
+def play_episode(definition: WorldDefinition, game: tuple[World, Player], agent: str, rng: random.Random,
+                 max_commands: int, stats: PlaytestStats) -> None:
+    """Reset game to a new game of definition, play it with the given kind of agent, and record the result in stats.
+
+    Prompts, such as for the key of a LockedFurniture, are answered with a random key of the world or nothing.
+    """
+    w, p = game
+    definition.restore(w, p, definition.initial)
+    answers = [furniture.key for furniture in w.objects if isinstance(furniture, LockedFurniture)] + ['']
+    p.input_source = lambda prompt: rng.choice(answers)
+
+    quit_game = False
+    location = begin_turn(w, p)
+    commands = 0
+    crash = None
+    while not is_game_over(p, quit_game) and commands < max_commands:
+        command = choose_command(agent, p, location, rng)
+        try:
+            quit_game = take_turn(w, p, location, command, MENU)
+        except Exception as error:  # Crashes are results of the playtest, not of the harness
+            crash = (type(error).__name__, command)
+            break
+        commands += 1
+        if not is_game_over(p, quit_game):
+            location = begin_turn(w, p)
+
+    stats.episodes += 1
+    stats.scores[p.score] += 1
+    if crash is not None:
+        stats.crashes[crash] += 1
+    elif p.victory:
+        stats.wins += 1
+    elif p.moves >= MAX_MOVES:
+        stats.out_of_moves += 1
+        stats.dead_ends[(location.num, tuple(sorted(item.name for item in p.inventory)))] += 1
+    else:
+        stats.stuck += 1
+
+
+def _init_worker(files: tuple[str, str, str]) -> None:
+    """Load the world in the given files once for this worker process."""
+    global _worker_definition, _worker_game
+    _worker_definition = WorldDefinition.from_files(files)
+    _worker_game = _worker_definition.new_game()
+    # Nobody reads the output of a playtest
+    _worker_game[1].output = NullSink()
+
+
+def run_chunk(episodes: int, agent: str, seed: int, max_commands: int) -> PlaytestStats:
+    """Play the given number of episodes in this worker's game, and return their aggregate results.
+
+    Preconditions:
+        - _init_worker has been called in this process
+    """
+    stats = PlaytestStats()
+    rng = random.Random(seed)
+    for _ in range(episodes):
+        play_episode(_worker_definition, _worker_game, agent, rng, max_commands, stats)
+    return stats
+
+
+def playtest(episodes: int, agent: str = 'random', workers: Optional[int] = None, chunk_size: int = 1000,
+             seed: int = 0, max_commands: int = 500, files: tuple[str, str, str] = WORLD_FILES) -> PlaytestStats:
+    """Play the given number of episodes with the given kind of agent across a pool of worker processes,
+    and return their aggregate results. The results are the same for the same seed and chunk_size.
+
+    Preconditions:
+        - agent in AGENTS
+        - episodes >= 0 and chunk_size > 0
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = PlaytestStats()
+    chunks = [(min(chunk_size, episodes - start), seed + i)
+              for i, start in enumerate(range(0, episodes, chunk_size))]
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(files,)) as executor:
+        pending: set[Future] = set()
+        for chunk_episodes, chunk_seed in chunks:
+            # Keep a bounded number of chunks in flight, and merge results as they finish
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stats.merge(future.result())
+            pending.add(executor.submit(run_chunk, chunk_episodes, agent, chunk_seed, max_commands))
+        for future in pending:
+            stats.merge(future.result())
+    return stats
+
+
+if __name__ == '__main__':
+    results = playtest(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000,
+                       sys.argv[2] if len(sys.argv) > 2 else 'random')
+    print(results.report())
@@ -0,0 +1,267 @@
+"""CSC111 Project 1: Multi-Session Game Server
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module hosts many concurrent games over TCP with asyncio, using a line protocol:
+clients send one action per line, and the server replies with the same text that adventure.py
+prints, ending each reply with the "Enter action: " prompt. The connection is closed when the
+game is over.
+
+The world files are loaded once into a WorldDefinition. Every session plays in its own new game
+of that definition, which shares the map, descriptions and actions, and only copies the objects
+that change during play.
+
+If the server is given a log directory, the turns of each session are logged to their own file in it,
+as described in the game_log module, so that the state of a session after any turn can be rebuilt.
+
+    python server.py [PORT [LOG DIRECTORY]] [--stats[=FILE]]
+
+With --stats, the calls of each session are timed (see the instrumentation module), and any client can
+see them with the stats command. With --stats=FILE, "stats export" also writes them to FILE, which is the only
+file that clients can make the server write.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2024 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import asyncio
+import itertools
+import os
+import sys
+from typing import Optional, TextIO
+
+from adventure import FILE_COMMANDS, MENU, begin_turn, take_turn, is_game_over, print_ending
+from game_data import History, Location, Player
+from game_log import SessionLog
+from game_output import BufferedSink
+from game_state import WORLD_FILES, WorldDefinition
+from headless import load_definition
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8111
+PROMPT = 'What to do?\n\n\nEnter action: '
+
+# The menu of every session, which has no commands that name files on the server: the server saves idle games
+# itself, with GameServer.park and GameServer.resume
+SESSION_MENU = [action for action in MENU if action not in FILE_COMMANDS]
+
+
+class PromptPending(Exception):
+    """Raised when a turn prompts the player for more input that the client has not sent yet."""
+
+
+class GameSession:
+    """A single player's game on a GameServer.
+
+    A turn that prompts for more input, such as the key of a LockedFurniture, is run again from
+    the start once the client sends the answer. This works because turns prompt before they change any state.
+
+    Instance Attributes:
+        - player:
+            The player of this session, in this session's own world.
+        - location:
+            The location the player is at.
+        - quit_game:
+            Whether the player has quit.
+        - pending_command:
+            A command waiting for the answer to a prompt, or None if there is no such command.
+        - output:
+            The output of this session's game that has not been sent to the client yet.
+        - log:
+            The log of this session's turns, or None if they are not logged.
+
+    Representation Invariants:
+        - self.player.world.get_location(self.player.x, self.player.y) is self.location
+    """
+    player: Player
+    location: Location
+    quit_game: bool
+    pending_command: Optional[str]
+    output: BufferedSink
+    log: Optional[SessionLog]
+    _answers: list[str]
+    _log_file: Optional[TextIO]
+
+    def __init__(self, player: Player, log_file: Optional[TextIO] = None) -> None:
+        """Initialize a new session for the given player, who has not started playing yet.
+        If log_file is given, the session's turns are logged to it once the session starts or resumes.
+        """
+        self.player = player
+        self.quit_game = False
+        self.pending_command = None
+        self._answers = []
+        self.output = BufferedSink()
+        self.log = None
+        self._log_file = log_file
+        player.input_source = self._read_answer
+        player.output = self.output
+        player.history = History()
+        player.world.output = self.output
+
+    def start_log(self) -> None:
+        """Start logging this session's turns, from the state its game is in now, if it has a log file."""
+        if self._log_file is not None:
+            self.log = SessionLog(self._log_file, self.player)
+
+    def close(self) -> None:
+        """Close this session's log file, if it has one."""
+        if self._log_file is not None:
+            self._log_file.close()
+
+    def _read_answer(self, prompt: str) -> str:
+        """Return the client's answer to prompt, or raise PromptPending if the client has not answered yet."""
+        if not self._answers:
+            raise PromptPending(prompt)
+        return self._answers.pop(0)
+
+    def is_over(self) -> bool:
+        """Return whether the game in this session is over."""
+        return is_game_over(self.player, self.quit_game)
+
+    def start(self) -> str:
+        """Start the game and return the introduction and the description of the starting location."""
+        self.player.world.get_game_introduction()
+        self.output.emit('info', f"You can always type {', '.join(SESSION_MENU)} at any location.\n")
+        self.location = begin_turn(self.player.world, self.player)
+        self.start_log()
+        self.output.emit('prompt', PROMPT, end='')
+        return self.output.take()
+
+    def handle_line(self, line: str) -> str:
+        """Play the action in the given line from the client, and return the output to send back."""
+        line = line.strip()
+        if self.pending_command is not None:
+            command, self._answers = self.pending_command, [line]
+            self.pending_command = None
+        else:
+            command, self._answers = line.lower(), []
+        answers = list(self._answers)
+
+        w = self.player.world
+        try:
+            self.quit_game = take_turn(w, self.player, self.location, command, SESSION_MENU)
+        except PromptPending as prompt:
+            self.pending_command = command
+            self.output.emit('prompt', prompt.args[0], end='')
+            return self.output.take()
+
+        if self.is_over():
+            print_ending(self.player, self.quit_game)
+        else:
+            self.location = begin_turn(w, self.player)
+            self.output.emit('prompt', PROMPT, end='')
+        if self.log is not None:
+            self.log.record_turn(command, answers)
+        return self.output.take()
+
+
+class GameServer:
+    """A server hosting concurrent games of one world over a line protocol.
+
+    Instance Attributes:
+        - definition:
+            The definition of the world loaded from this server's files, shared by every session.
+        - sessions:
+            The number of sessions currently connected.
+        - log_directory:
+            The directory that the log of each session is written to, or None if sessions are not logged.
+    """
+    definition: WorldDefinition
+    sessions: int
+    log_directory: Optional[str]
+    _session_ids: itertools.count
+
+    def __init__(self, files: tuple[str, str, str] = WORLD_FILES, log_directory: Optional[str] = None) -> None:
+        """Initialize a new server for the world in the given map, locations and items files.
+        If log_directory is given, each session is logged to a new file in it.
+        """
+        self.definition = load_definition(files)
+        self.sessions = 0
+        self.log_directory = log_directory
+        self._session_ids = itertools.count(1)
+
+    def _new_log_file(self) -> Optional[TextIO]:
+        """Return a new file in this server's log directory for the log of a session, or None if there is none."""
+        if self.log_directory is None:
+            return None
+        os.makedirs(self.log_directory, exist_ok=True)
+        while True:
+            path = os.path.join(self.log_directory, f'session-{os.getpid()}-{next(self._session_ids)}.log')
+            try:
+                return open(path, 'x', buffering=1)
+            except FileExistsError:
+                pass
+
+    def new_session(self) -> GameSession:
+        """Return a new session with its own game of this server's world."""
+        _, p = self.definition.new_game()
+        return GameSession(p, self._new_log_file())
+
+    def park(self, session: GameSession) -> bytes:
+        """Return the saved game of session, so that the session can be dropped until its client returns.
+
+        Preconditions:
+            - session has started, is not over, and is not waiting for the answer to a prompt
+        """
+        return self.definition.save(session.player.world, session.player)
+
+    def resume(self, data: bytes) -> GameSession:
+        """Return a session continuing the game that park saved in data."""
+        w, p = self.definition.new_game()
+        self.definition.load(w, p, data)
+        session = GameSession(p, self._new_log_file())
+        session.location = w.get_location(p.x, p.y)
+        session.start_log()
+        return session
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Play a game with the client connected through reader and writer until it is over or the client leaves."""
+        session = self.new_session()
+        self.sessions += 1
+        try:
+            writer.write(session.start().encode())
+            await writer.drain()
+            while not session.is_over():
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write(session.handle_line(line.decode()).encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            session.close()
+            writer.close()
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.Server:
+        """Start accepting clients on the given host and port, and return the running asyncio server.
+        If port is 0, a free port is chosen.
+        """
+        return await asyncio.start_server(self.handle_client, host, port, limit=2 ** 16, backlog=4096)
+
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, log_directory: Optional[str] = None) -> None:
+    """Run a GameServer on the given host and port forever, logging sessions to log_directory if it is given."""
+    server = await GameServer(log_directory=log_directory).start(host, port)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    stats_options = [arg for arg in sys.argv[1:] if arg == '--stats' or arg.startswith('--stats=')]
+    args = [arg for arg in sys.argv[1:] if arg not in stats_options]
+    if stats_options:
+        import instrumentation
+        instrumentation.enable(export_path=stats_options[-1][len('--stats='):] or None)
+    asyncio.run(serve(port=int(args[0]) if args else DEFAULT_PORT,
+                      log_directory=args[1] if len(args) > 1 else None))
@@ -0,0 +1,439 @@
+"""CSC111 Project 1: Route Solver
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module finds the shortest sequence of commands that wins a game, so that a world
+can be checked to be winnable before it is shipped. A world is compiled into a small search
+model holding only the objects needed to win, and searched with A* over states made of the
+player's position, inventory, opened furniture and completed missions, and the player's moves.
+
+Every solution can be replayed through the real game with verify, which is what the command line does:
+
+    python solver.py
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2024 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import heapq
+from dataclasses import dataclass
+from typing import Optional
+
+from adventure import DIRECTIONS, MAX_MOVES
+from game_data import (Furniture, Item, LockedFurniture, MissionFurniture, MissionItem, MissionLocation, Player,
+                       PowerUp, World)
+from game_state import WorldDefinition
+from headless import GameResult, replay
+
+
+@dataclass(frozen=True)
+class SearchState:
+    """A state of the search, without the player's moves.
+
+    Objects are identified by their id in World.objects, and bit i of a bitset is set for object i.
+
+    Instance Attributes:
+        - cell:
+            The player's (x, y) coordinates.
+        - inventory:
+            Bitset of the objects in the player's inventory.
+        - opened:
+            Bitset of the Furniture that has been opened.
+        - completed:
+            Bitset of the MissionItems whose mission has been completed.
+        - delivered:
+            Bitset of the objects that have been delivered, and so are no longer where they were loaded.
+        - missions:
+            Set of the numbers of the MissionLocations whose mission has been completed.
+    """
+    cell: tuple[int, int]
+    inventory: int
+    opened: int
+    completed: int
+    delivered: int
+    missions: frozenset[int]
+
+
+class SolverModel:
+    """The parts of a world that matter for winning it, compiled for searching.
+
+    Instance Attributes:
+        - world:
+            The world this model was compiled from. It is never played in.
+        - home:
+            The number of the location each object was loaded at, by object id.
+        - names:
+            The name of each object, by object id.
+        - relevant:
+            The ids of the objects that can help to win: the required items, the objects needed
+            to get them, and PowerUps that take moves back.
+        - required:
+            Bitset of the required items. If a required item is not in the world, or there is no exam, this is None.
+        - exam:
+            The (x, y) coordinates of the exam location, or None if there is none.
+        - distances:
+            The number of moves from each cell that can reach the exam location to it.
+        - via:
+            For each required item, the number of moves from each cell to the exam location
+            through the location where that item is picked up.
+        - max_moves:
+            A player wins only with fewer moves than this.
+        - moves_back_per_pick:
+            The most moves that picking up a relevant PowerUp takes back, or 0 if there are none.
+    """
+    world: World
+    home: list[int]
+    names: list[str]
+    relevant: list[int]
+    required: Optional[int]
+    exam: Optional[tuple[int, int]]
+    distances: dict[tuple[int, int], int]
+    via: dict[int, dict[tuple[int, int], int]]
+    max_moves: int
+    moves_back_per_pick: int
+    _ids: dict[int, int]
+    _container: dict[int, int]
+
+    def __init__(self, world: World, exam: Optional[tuple[int, int]] = None,
+                 required: Optional[tuple[str, ...]] = None, max_moves: int = MAX_MOVES) -> None:
+        """Compile a new model of the given world, which no player has played in.
+        The exam and the required items are those of the world (see World.exam) unless they are given.
+        """
+        self.world = world
+        self.exam = world.exam if exam is None else exam
+        if required is None:
+            required = world.required_items
+        self.max_moves = max_moves
+        self._ids = {id(obj): i for i, obj in enumerate(world.objects)}
+        self.names = [obj.name for obj in world.objects]
+        self.home = [0] * len(world.objects)
+        for location_num, interactables in world.interactables.items():
+            for obj in interactables:
+                self.home[self._ids[id(obj)]] = location_num
+
+        # Map the id of each Item loaded in a Furniture to the id of that Furniture
+        self._container = {}
+        for i, obj in enumerate(world.objects):
+            if isinstance(obj, Item) and obj.stored_in_furniture:
+                furniture = self._find(self.home[i], obj.stored_in_furniture, Furniture)
+                if furniture is not None:
+                    self._container[i] = furniture
+
+        required_ids = [self._first_item_named(name) for name in required]
+        self.required = None if None in required_ids or self.exam is None else sum(1 << i for i in set(required_ids))
+        self.relevant = sorted(self._relevant_objects([i for i in required_ids if i is not None]))
+        self.distances = {} if self.exam is None else self._distances_to(self.exam)
+        self.via = {}
+        for i in required_ids:
+            item_cell = world.coordinates.get(self.home[i]) if i is not None else None
+            if item_cell is not None and item_cell in self.distances:
+                self.via[i] = {cell: distance + self.distances[item_cell]
+                               for cell, distance in self._distances_to(item_cell).items()}
+        self.moves_back_per_pick = max([-2 * self.world.objects[i].moves_back for i in self.relevant
+                                        if isinstance(self.world.objects[i], PowerUp)], default=0)
+
+    def _find(self, location_num: int, name: str, kind: type) -> Optional[int]:
+        """Return the id of the first object of the given kind loaded at location_num with the given name."""
+        for obj in self.world.interactables.get(location_num, []):
+            if obj.name == name and isinstance(obj, kind):
+                return self._ids[id(obj)]
+        return None
+
+    def _first_item_named(self, name: str) -> Optional[int]:
+        """Return the id of the first Item in the world with the given name."""
+        for i, obj in enumerate(self.world.objects):
+            if obj.name == name and isinstance(obj, Item):
+                return i
+        return None
+
+    def _relevant_objects(self, required_ids: list[int]) -> set[int]:
+        """Return the ids of the objects needed to get the given objects, and of useful PowerUps."""
+        relevant = set()
+        to_visit = list(required_ids)
+        while to_visit:
+            i = to_visit.pop()
+            if i in relevant:
+                continue
+            relevant.add(i)
+            if i in self._container:
+                to_visit.append(self._container[i])
+            if isinstance(self.world.objects[i], MissionItem):
+                to_visit.extend(self._mission_sources(i))
+        for i, obj in enumerate(self.world.objects):
+            if isinstance(obj, PowerUp) and obj.moves_back < 0:
+                relevant.add(i)
+        return relevant
+
+    def _mission_sources(self, i: int) -> list[int]:
+        """Return the ids of the objects needed to complete the mission for MissionItem i."""
+        sources = []
+        name, location_num = self.names[i], self.home[i]
+        for j in range(len(self.world.objects)):
+            obj = self.world.objects[j]
+            if isinstance(obj, MissionFurniture) and self.home[j] == location_num:
+                if obj.item_given == name:
+                    sources.append(j)
+                elif obj.item_to_receive == name:
+                    sources.append(j)
+                    sources.extend(k for k in [self._first_item_named(obj.item_to_deliver)] if k is not None)
+        location = self.world.location_index.get(location_num)
+        if isinstance(location, MissionLocation) and location.item_to_receive == name:
+            sources.extend(k for k in [self._first_item_named(location.item_to_deliver)] if k is not None)
+        return sources
+
+    def _distances_to(self, cell: tuple[int, int]) -> dict[tuple[int, int], int]:
+        """Return the number of moves from every cell that can reach the given cell."""
+        return self.world.get_navigation().distances_to(cell)
+
+    def is_walkable(self, cell: tuple[int, int]) -> bool:
+        """Return whether a player can move to the given cell."""
+        x, y = cell
+        if x < 0 or y < 0 or y >= len(self.world.map) or x >= len(self.world.map[y]):
+            return False
+        return self.world.map[y][x] != -1
+
+    def location_num(self, cell: tuple[int, int]) -> int:
+        """Return the number of the location at the given walkable cell."""
+        return self.world.map[cell[1]][cell[0]]
+
+    def start_state(self, player: Player) -> SearchState:
+        """Return the search state at the start of the given player's first turn."""
+        state = SearchState((player.x, player.y), 0, 0, 0, 0, frozenset())
+        return self._deliver_at_location(state)
+
+    def heuristic(self, state: SearchState, moves: Optional[int] = None) -> float:
+        """Return a lower bound on the number of commands needed to win from state.
+
+        If moves is given, it also counts the PowerUp pick and drop commands needed to take back
+        enough moves to walk to the exam location in time.
+        """
+        distance = self.distances.get(state.cell)
+        if distance is None:
+            return float('inf')
+        missing = 0
+        for i, distances in self.via.items():
+            if not state.inventory >> i & 1:
+                missing += 1
+                distance = max(distance, distances.get(state.cell, float('inf')))
+        estimate = max(distance, missing)
+
+        if moves is not None:
+            deficit = moves + distance - (self.max_moves - 1)
+            if deficit > 0:
+                if self.moves_back_per_pick == 0:
+                    return float('inf')
+                picks = -(-deficit // self.moves_back_per_pick)
+                estimate += 2 * picks - 1
+        return estimate
+
+    def is_victory(self, state: SearchState, moves: int) -> bool:
+        """Return whether a player wins in state after moving moves times."""
+        return state.cell == self.exam and state.inventory & self.required == self.required and moves < self.max_moves
+
+    def _present(self, state: SearchState, i: int, location_num: int) -> bool:
+        """Return whether object i is at the given location in state."""
+        return self.home[i] == location_num and not (state.inventory | state.delivered) >> i & 1
+
+    def _in_inventory(self, state: SearchState, name: str) -> Optional[int]:
+        """Return the id of an object in the inventory with the given name in state, if there is one."""
+        for i in self.relevant:
+            if state.inventory >> i & 1 and self.names[i] == name:
+                return i
+        return None
+
+    def _present_named(self, state: SearchState, name: str, location_num: int, kind: type) -> Optional[int]:
+        """Return the id of the first relevant object of the given kind and name at the given location in state."""
+        for i in self.relevant:
+            if self.names[i] == name and isinstance(self.world.objects[i], kind) \
+                    and self._present(state, i, location_num):
+                return i
+        return None
+
+    def _receive(self, state: SearchState, receive: int, deliver: Optional[int]) -> SearchState:
+        """Return state after MissionItem receive is completed and picked up, and deliver is delivered."""
+        inventory = state.inventory | 1 << receive
+        delivered = state.delivered
+        if deliver is not None:
+            inventory &= ~(1 << deliver)
+            delivered |= 1 << deliver
+        return SearchState(state.cell, inventory, state.opened, state.completed | 1 << receive, delivered,
+                           state.missions)
+
+    def _deliver_at_location(self, state: SearchState) -> SearchState:
+        """Return state after the start of a turn, when a MissionLocation checks the player's delivery."""
+        location_num = self.location_num(state.cell)
+        location = self.world.location_index.get(location_num)
+        if not isinstance(location, MissionLocation) or location_num in state.missions:
+            return state
+        deliver = self._in_inventory(state, location.item_to_deliver)
+        receive = self._present_named(state, location.item_to_receive, location_num, MissionItem)
+        if deliver is None or receive is None:
+            return state
+        state = self._receive(state, receive, deliver)
+        return SearchState(state.cell, state.inventory, state.opened, state.completed, state.delivered,
+                           state.missions | {location_num})
+
+    def successors(self, state: SearchState, moves: int) -> list[tuple[list[str], SearchState, int]]:
+        """Return the commands that make progress from state, each with the state and moves after them."""
+        results = []
+        x, y = state.cell
+        for direction, (dx, dy) in DIRECTIONS.items():
+            if self.is_walkable((x + dx, y + dy)):
+                results.append(([f'go {direction}'],
+                                SearchState((x + dx, y + dy), state.inventory, state.opened, state.completed,
+                                            state.delivered, state.missions), moves + 1))
+
+        location_num = self.location_num(state.cell)
+        for i in self.relevant:
+            obj = self.world.objects[i]
+            if isinstance(obj, Furniture):
+                if self.home[i] == location_num:
+                    results.extend(self._furniture_commands(state, moves, i))
+            elif state.inventory >> i & 1:
+                if isinstance(obj, PowerUp) and self.home[i] == location_num:
+                    results.append(([f'drop {obj.name}'],
+                                    SearchState(state.cell, state.inventory & ~(1 << i), state.opened,
+                                                state.completed, state.delivered, state.missions), moves))
+            elif self._present(state, i, location_num) and self._can_pick(state, i):
+                after = SearchState(state.cell, state.inventory | 1 << i, state.opened, state.completed,
+                                    state.delivered, state.missions)
+                moves_after = moves + 2 * obj.moves_back if isinstance(obj, PowerUp) else moves
+                results.append(([f'pick {obj.name}'], after, moves_after))
+        return results
+
+    def _can_pick(self, state: SearchState, i: int) -> bool:
+        """Return whether object i can be picked up in state, assuming it is at the player's location."""
+        obj = self.world.objects[i]
+        if self._in_inventory(state, obj.name) is not None:
+            return False
+        if isinstance(obj, MissionItem):
+            return bool(state.completed >> i & 1)
+        if i in self._container:
+            return bool(state.opened >> self._container[i] & 1)
+        return True
+
+    def _furniture_commands(self, state: SearchState, moves: int,
+                            i: int) -> list[tuple[list[str], SearchState, int]]:
+        """Return the commands that make progress with Furniture i at the player's location."""
+        furniture = self.world.objects[i]
+        location_num = self.home[i]
+        results = []
+        if 'open' in furniture.actions and not state.opened >> i & 1:
+            commands = [f'open {furniture.name}']
+            if isinstance(furniture, LockedFurniture):
+                commands.append(furniture.key)
+            results.append((commands, SearchState(state.cell, state.inventory, state.opened | 1 << i,
+                                                  state.completed, state.delivered, state.missions), moves))
+        if isinstance(furniture, MissionFurniture):
+            given = self._present_named(state, furniture.item_given, location_num, MissionItem)
+            if 'examine' in furniture.actions and given is not None \
+                    and self._in_inventory(state, furniture.item_given) is None:
+                results.append(([f'examine {furniture.name}'], self._receive(state, given, None), moves))
+            deliver = self._in_inventory(state, furniture.item_to_deliver)
+            receive = self._present_named(state, furniture.item_to_receive, location_num, MissionItem)
+            if 'deliver' in furniture.actions and deliver is not None and receive is not None:
+                results.append(([f'deliver {furniture.name}'], self._receive(state, receive, deliver), moves))
+        return results
+
+    def search(self, player: Player, track_moves: bool) -> Optional[tuple[list[str], int]]:
+        """Return the fewest lines that win from the start of the given player's game, and the player's
+        moves after entering them, or None if the game cannot be won.
+
+        If track_moves is False, the limit on moves is ignored, and a state is only searched the first
+        time it is reached. Otherwise, a state is searched again whenever it is reached with fewer
+        moves than every time it was reached with as few commands.
+        """
+        if self.required is None:
+            return None
+        start = self.start_state(player)
+        # The Pareto-optimal (commands, moves) labels with which each state has been reached
+        labels = {start: [(0, player.moves if track_moves else 0)]}
+        parents = {(start, 0, player.moves): None}
+        counter = 0
+        frontier = [(self.heuristic(start, player.moves if track_moves else None), 0, counter, start, player.moves,
+                     False)]
+
+        while frontier:
+            _, commands_so_far, _, state, moves, won = heapq.heappop(frontier)
+            node = (state, commands_so_far, moves)
+            if won:
+                return self._path(parents, node), moves
+            if track_moves and moves >= self.max_moves:
+                continue
+            for commands, after, moves_after in self.successors(state, moves):
+                cost = commands_so_far + 1
+                won = self.is_victory(after, moves_after if track_moves else 0)
+                if not won:
+                    # A victory is checked after a command, before the next turn starts
+                    after = self._deliver_at_location(after)
+                label = (cost, moves_after if track_moves else 0)
+                if any(c <= label[0] and m <= label[1] for c, m in labels.get(after, [])):
+                    continue
+                estimate = 0 if won else self.heuristic(after, moves_after if track_moves else None)
+                if estimate == float('inf'):
+                    continue
+                labels[after] = [(c, m) for c, m in labels.get(after, []) if not (label[0] <= c and label[1] <= m)]
+                labels[after].append(label)
+                parents[(after, cost, moves_after)] = (node, commands)
+                counter += 1
+                heapq.heappush(frontier, (cost + estimate, cost, counter, after, moves_after, won))
+        return None
+
+    @staticmethod
+    def _path(parents: dict, node: tuple) -> list[str]:
+        """Return the lines that lead to node in the search tree described by parents."""
+        commands = []
+        while parents[node] is not None:
+            node, node_commands = parents[node]
+            commands = node_commands + commands
+        return commands
+
+
+def solve(world: World, player: Player, exam: Optional[tuple[int, int]] = None,
+          required: Optional[tuple[str, ...]] = None, max_moves: int = MAX_MOVES) -> Optional[list[str]]:
+    """Return the shortest list of lines a player can enter to win the game of the given player and world,
+    or None if the game cannot be won. Answers to prompts, such as the keys of LockedFurniture, are separate lines.
+
+    The game is won by being at exam with every item in required, with fewer than max_moves moves.
+    The exam and the required items are those of the world unless they are given.
+
+    Preconditions:
+        - No player has played in world
+    """
+    model = SolverModel(world, exam, required, max_moves)
+    # Ignoring the limit on moves first keeps the search finite when PowerUps can take moves back forever
+    solution = model.search(player, track_moves=False)
+    if solution is not None and solution[1] >= max_moves:
+        solution = model.search(player, track_moves=True)
+    return None if solution is None else solution[0]
+
+
+def solve_definition(definition: WorldDefinition) -> Optional[list[str]]:
+    """Return the shortest list of lines that wins a new game of the given world, or None if it cannot be won."""
+    w, p = definition.new_game()
+    return solve(w, p)
+
+
+def verify(definition: WorldDefinition, commands: list[str]) -> GameResult:
+    """Return the result of playing commands in a new game of the given world with the real game engine."""
+    return replay(commands, game=definition.new_game())
+
+
+if __name__ == '__main__':
+    world_definition = WorldDefinition.from_files()
+    solution = solve_definition(world_definition)
+    if solution is None:
+        print('This world cannot be won.')
+    else:
+        print('\n'.join(solution))
+        result = verify(world_definition, solution)
+        print(f'\n{len(solution)} lines, victory={result.victory} moves={result.moves} score={result.score}')
@@ -0,0 +1,160 @@
+"""CSC111 Project 1: Tests of Game Data
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module tests that the stores of interactables of a world stay consistent as a game is played:
+after every command of random games, the name index and the action counts of every store are up to date,
+and the available actions of every location kept incrementally are those rebuilt by get_available_actions.
+
+    python -m pytest test_game_data.py
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2024 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import random
+from collections import Counter
+
+import pytest
+
+from adventure import DIRECTIONS, MENU, begin_turn, do_action
+from game_data import Furniture, History, Interactables, Item, Player, World
+from game_output import NullSink
+from game_state import WorldDefinition
+from world_generator import load_generated_world
+
+# The commands of each random game, and the number of games played in each world
+COMMANDS_PER_GAME = 200
+GAMES = 10
+
+
+def _random_command(w: World, p: Player, rng: random.Random) -> str:
+    """Return a random go, pick, drop or open command for p, mostly ones that can succeed."""
+    location = w.get_location(p.x, p.y)
+    kind = rng.choice(('go', 'pick', 'drop', 'open'))
+    if kind == 'go':
+        return f'go {rng.choice(list(DIRECTIONS))}'
+    if kind == 'pick':
+        names = [obj.name for obj in location.interactables if isinstance(obj, Item)] or ['nothing']
+        return f'pick {rng.choice(names)}'
+    if kind == 'drop':
+        names = [obj.name for obj in p.inventory] or ['nothing']
+        return f'drop {rng.choice(names)}'
+    names = [obj.name for obj in location.interactables if isinstance(obj, Furniture)] or ['nothing']
+    return f'open {rng.choice(names)}'
+
+
+def _action_problems(w: World) -> list[str]:
+    """Return a description of each location of w whose available actions are not those of its interactables."""
+    problems = []
+    for location in w.locations:
+        rebuilt = {action: Counter(names) for action, names in location.get_available_actions().items()}
+        kept = {action: Counter(names) for action, names in location.available_actions.items()}
+        if rebuilt != kept:
+            problems.append(f'location {location.num}: {kept} is not {rebuilt}')
+    return problems
+
+
+def _snapshot(w: World, p: Player) -> list:
+    """Return where p is, with p's moves and score, and the objects of every store of w and of p's inventory,
+    in order, with their actions and the names of each action, in order: everything about the stores that
+    a player can see, such as in the menu.
+    """
+    stores = [*w.interactables.values(), p.inventory]
+    return [(p.x, p.y, p.moves, p.score)] + [
+        (list(store), [(action, list(names.items())) for action, names in store.actions.items()]) for store in stores]
+
+
+def _play_and_check(w: World, p: Player, seed: int) -> None:
+    """Play a random game of p in w, checking that w is consistent after every command."""
+    rng = random.Random(seed)
+    p.output = NullSink()
+    # Locked furniture is opened with the right key half of the time
+    p.input_source = lambda prompt: rng.choice(('coal', 'wrong key'))
+    location = begin_turn(w, p)
+    for _ in range(COMMANDS_PER_GAME):
+        command = _random_command(w, p, rng)
+        do_action(w, p, location, command, MENU)
+        location = begin_turn(w, p)
+        assert w.find_inconsistencies(p) == [], command
+        assert _action_problems(w) == [], command
+
+
+@pytest.mark.parametrize('seed', range(GAMES))
+def test_default_world_stays_consistent(seed: int) -> None:
+    """Random games of the default world keep every store and every location's actions up to date."""
+    _play_and_check(*WorldDefinition.from_files().new_game(), seed)
+
+
+@pytest.mark.parametrize('seed', range(GAMES))
+def test_generated_world_stays_consistent(seed: int) -> None:
+    """Random games of a generated quest world with several items per location keep every store
+    and every location's actions up to date, including locations holding many items with the same actions.
+    """
+    w = load_generated_world(8, 8, 0.8, 3, seed=seed, quest=True)
+    _play_and_check(w, Player(2, 4, w), seed)
+
+
+def test_picking_and_dropping_updates_actions() -> None:
+    """Picking up the only item of a location removes its pick action, and dropping it
+    in another location adds the action there.
+    """
+    w, p = WorldDefinition.from_files().new_game()
+    p.output = NullSink()
+    ramen_location = next(location for location in w.locations if location.interactables.first('ramen'))
+    p.x, p.y = w.coordinates[ramen_location.num]
+    location = begin_turn(w, p)
+    do_action(w, p, location, 'pick ramen', MENU)
+    assert p.has_item('ramen')
+    assert 'ramen' not in location.available_actions.get('pick', {})
+    p.x, p.y = w.coordinates[16]
+    location = begin_turn(w, p)
+    do_action(w, p, location, 'drop ramen', MENU)
+    assert location.available_actions['pick']['ramen'] == 1
+    assert _action_problems(w) == []
+
+
+@pytest.mark.parametrize('seed', range(GAMES))
+def test_undo_restores_order(seed: int) -> None:
+    """Undoing a turn of a random game puts back every object, and every name and action of every store,
+    in the order it was in before the turn, so that the menu lists them as it did.
+    """
+    rng = random.Random(seed)
+    w, p = WorldDefinition.from_files().new_game()
+    p.output = NullSink()
+    p.input_source = lambda prompt: 'coal'
+    p.history = History()
+    location = begin_turn(w, p)
+    for _ in range(COMMANDS_PER_GAME):
+        before = _snapshot(w, p)
+        p.history.begin_step(p)
+        do_action(w, p, location, _random_command(w, p, rng), MENU)
+        # A turn that changed nothing has no step of its own to undo
+        if rng.random() < 0.5 and _snapshot(w, p) != before:
+            p.history.rewind(p)
+            assert _snapshot(w, p) == before
+        location = begin_turn(w, p)
+
+
+def test_put_back_restores_the_order_of_names() -> None:
+    """Putting back the only object with a name puts its name back among the names of its actions where it was,
+    and puts back its actions where they were if no other object had them.
+    """
+    first, middle, last = Item('first', 0), Item('middle', 0, {'eat': ''}), Item('last', 0, {'read': ''})
+    store = Interactables([first, middle, last])
+    before = [(action, list(names.items())) for action, names in store.actions.items()]
+    place = store.remove(middle)
+    assert 'eat' not in store.actions and list(store.actions['pick']) == ['first', 'last']
+    store.put_back(middle, place)
+    assert list(store) == [first, middle, last]
+    assert [(action, list(names.items())) for action, names in store.actions.items()] == before
+    assert store.find_inconsistencies() == []
@@ -0,0 +1,46 @@
+"""CSC111 Project 1: Tests of the World Generator
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module tests that every generated quest world can be won: the solver finds a winning sequence
+of commands for it, and playing that sequence in the real game engine wins the game.
+
+    python -m pytest test_world_generator.py
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2024 CSC111 Teaching Team
+"""
+from __future__ import annotations
+
+import pytest
+
+from adventure import START_X, START_Y
+from game_data import Player
+from game_state import WorldDefinition
+from solver import solve_definition, verify
+from world_generator import load_generated_world
+
+# The (width, height, density) of the generated quest worlds, each generated with every seed in SEEDS.
+# Sparse maps have walls that make the walking distance to a cell much longer than its Manhattan distance.
+SIZES = ((8, 8, 1.0), (12, 12, 0.8), (20, 20, 0.7), (40, 40, 0.7))
+SEEDS = range(10)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('width, height, density', SIZES)
+def test_generated_quest_world_is_solvable(width: int, height: int, density: float, seed: int) -> None:
+    """Every generated quest world has a winning sequence of commands that wins in the real game engine."""
+    w = load_generated_world(width, height, density, seed=seed, quest=True)
+    definition = WorldDefinition.from_world(w, Player(START_X, START_Y, w))
+    solution = solve_definition(definition)
+    assert solution is not None
+    assert verify(definition, solution).victory
@@ -0,0 +1,223 @@
+"""CSC111 Project 1: Synthetic World Generator
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module generates synthetic worlds of any size in the same formats as
+map.txt, locations.txt and items.txt, so that the game_data classes can be measured
+on worlds much larger than the one shipped with the game. Huge worlds that are mostly blocked can be
+generated straight into a SparseMap, without ever writing out their blocked cells.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2024 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import io
+import math
+import os
+import random
+import sys
+from typing import Union
+
+from adventure import MAX_MOVES, START_X, START_Y
+from game_data import SparseMap, World, walkable_cells
+from navigation import NavigationIndex
+
+LOCATIONS_TEMPLATE = ('[LOCATION NUMBER],[optional MISSION location object]:::{item to deliver},{item to receive}\n'
+                      '[LOCATION NUMBER],exam:::{item needed to win},...,{item needed to win}\n'
+                      '[POINTS]\n'
+                      '[BRIEF DESCRIPTION]\n'
+                      '[LONG DESCRIPTION]\n'
+                      'END\n')
+ITEMS_TEMPLATE = ('TEMPLATE:\n'
+                  '-----------------------------------\n'
+                  '[LOCATION NUMBER:::FURNITURE NAME]\n'
+                  '[I (ITEM)]\n'
+                  '[ITEM NAME]\n'
+                  '[POINTS]\n'
+                  '[ACTION]:::[TEXT OUTPUT WHEN ACTION IS PERFORMED]\n'
+                  'END\n'
+                  '-----------------------------------\n')
+# The cell of the exam location of a quest world, and the items needed to win there, which are placed by _quest_blocks
+EXAM_X, EXAM_Y = 3, 4
+REQUIRED_ITEMS = ('tcard', 'cheat sheet', 'lucky pen')
+# Cells that must be walkable for a generated world to be playable with the adventure module
+QUEST_CELLS = ((START_X, START_Y), (EXAM_X, EXAM_Y))
+
+
+def generate_map(width: int, height: int, density: float = 1.0, seed: int = 0,
+                 walkable: tuple[tuple[int, int], ...] = ()) -> list[list[int]]:
+    """Return a width x height map where roughly density of the cells are walkable.
+    Walkable cells are numbered 1, 2, 3, ... row by row, and blocked cells are -1.
+    The cells at the (x, y) coordinates in walkable are always walkable.
+
+    Preconditions:
+        - width > 0 and height > 0
+        - 0.0 < density <= 1.0
+    """
+    rng = random.Random(seed)
+    world_map = []
+    location_number = 0
+    for y in range(height):
+        row = []
+        for x in range(width):
+            if density >= 1.0 or rng.random() < density or (x, y) in walkable:
+                location_number += 1
+                row.append(location_number)
+            else:
+                row.append(-1)
+        world_map.append(row)
+    return world_map
+
+
+def generate_sparse_map(width: int, height: int, density: float = 1.0, seed: int = 0,
+                        walkable: tuple[tuple[int, int], ...] = ()) -> SparseMap:
+    """Return a width x height SparseMap where roughly density of the cells are walkable, numbered like generate_map.
+
+    The gaps between walkable cells are drawn from a geometric distribution, so the time taken depends on the
+    number of walkable cells, not on the size of the map. The map is not the one generate_map returns for seed.
+
+    Preconditions:
+        - width > 0 and height > 0
+        - 0.0 < density <= 1.0
+    """
+    rng = random.Random(seed)
+    cells = width * height
+    if density >= 1.0:
+        positions = set(range(cells))
+    else:
+        positions = {y * width + x for x, y in walkable}
+        log_blocked = math.log(1.0 - density)
+        position = int(math.log(1.0 - rng.random()) / log_blocked)
+        while position < cells:
+            positions.add(position)
+            position += int(math.log(1.0 - rng.random()) / log_blocked) + 1
+
+    world_map = SparseMap()
+    row = []
+    y = 0
+    for location_number, position in enumerate(sorted(positions), start=1):
+        while position // width > y:
+            world_map.append_row(width, row)
+            row = []
+            y += 1
+        row.append((position % width, location_number))
+    while y < height:
+        world_map.append_row(width, row)
+        row = []
+        y += 1
+    return world_map
+
+
+def generate_world(width: int, height: int, density: float = 1.0, items_per_location: int = 0,
+                   seed: int = 0, quest: bool = False, description_lines: int = 1) -> tuple[str, str, str]:
+    """Return the text of a generated map.txt, locations.txt and items.txt, in that order.
+
+    Every walkable location gets items_per_location Items named "item <location>.<k>",
+    and a long description of description_lines lines.
+    If quest is True, the items needed to win (REQUIRED_ITEMS) are placed at random
+    locations near the start: one lying around, one in a desk and one in a safe locked with the key "coal".
+    A bike PowerUp is placed at another random location, the starting location of the adventure module
+    and the cell (EXAM_X, EXAM_Y) are always walkable, and the location at that cell is an exam location.
+
+    Preconditions:
+        - width > 0 and height > 0
+        - 0.0 < density <= 1.0
+        - items_per_location >= 0
+        - description_lines >= 1
+        - not quest or (width >= 4 and height >= 5)
+    """
+    world_map = generate_map(width, height, density, seed, QUEST_CELLS if quest else ())
+    map_text = '\n'.join(' '.join(str(n) for n in row) for row in world_map) + '\n'
+    return (map_text,) + _generate_contents(world_map, items_per_location, seed, quest, description_lines)
+
+
+def _generate_contents(world_map: Union[list[list[int]], SparseMap], items_per_location: int, seed: int,
+                       quest: bool, description_lines: int) -> tuple[str, str]:
+    """Return the text of a generated locations.txt and items.txt for world_map, as described in generate_world."""
+    location_numbers = sorted(n for _, _, n in walkable_cells(world_map))
+    exam = world_map[EXAM_Y][EXAM_X] if quest else -1
+
+    filler = 'The walls, the floor and the people here look like those of every other location.\n'
+    location_blocks = ['-1\n0\nThat way is blocked.\nThat way is blocked.\nEND']
+    for n in location_numbers:
+        kind = f',exam:::{",".join(REQUIRED_ITEMS)}' if n == exam else ''
+        location_blocks.append(f'{n}{kind}\n{n % 10}\n'
+                               f'You are in generated location {n}.\n'
+                               f'You are in generated location {n}. It looks like every other location.\n'
+                               + filler * (description_lines - 1) + 'END')
+    locations_text = LOCATIONS_TEMPLATE + '\n' + '\n\n'.join(location_blocks) + '\n'
+
+    item_blocks = []
+    for n in location_numbers:
+        for k in range(items_per_location):
+            item_blocks.append(f'{n}\nI\nitem {n}.{k}\n{k % 5}\nexamine:::A generated item.\nEND')
+    if quest:
+        item_blocks.extend(_quest_blocks(world_map, random.Random(seed + 1)))
+    items_text = ITEMS_TEMPLATE + '\n' + ''.join(block + '\n\n' for block in item_blocks)
+
+    return locations_text, items_text
+
+
+def _quest_blocks(world_map: Union[list[list[int]], SparseMap], rng: random.Random) -> list[str]:
+    """Return the items.txt records of a quest placed at random locations of world_map
+    near the starting location, so that the quest can always be finished in time.
+
+    Fetching the three items in any order and then walking to the exam takes at most 6 * radius moves
+    plus the moves from the start to the exam, where radius is the most moves from the start to any item,
+    so items are placed only where that is fewer than MAX_MOVES.
+    """
+    distances = NavigationIndex(world_map).distances_to((START_X, START_Y))
+    radius = (MAX_MOVES - 1 - distances[EXAM_X, EXAM_Y]) // 6
+    nearby = [n for x, y, n in walkable_cells(world_map) if distances.get((x, y), radius + 1) <= radius]
+    loose, desk, safe, bike = (rng.choice(nearby) for _ in range(4))
+    in_safe, lying_around, in_desk = REQUIRED_ITEMS
+    return [f'{loose}\nI\n{lying_around}\n50\nEND',
+            f'{desk}\nF\ndesk\n10\nopen:::You have opened the desk.\nEND',
+            f'{desk}:::desk\nI\n{in_desk}\n50\nEND',
+            f'{safe}\nLF\ncoal\nsafe\n50\nEND',
+            f'{safe}:::safe\nI\n{in_safe}\n100\nEND',
+            f'{bike}\nPU\n-5\nbike\n20\nride:::Weeeeeeeeeee!\nEND']
+
+
+def load_generated_world(width: int, height: int, density: float = 1.0, items_per_location: int = 0,
+                         seed: int = 0, quest: bool = False, sparse: bool = False) -> World:
+    """Return a World loaded from a generated world, with interactables and actions added to its locations.
+    If sparse is True, the map is generated straight into a SparseMap by generate_sparse_map.
+    """
+    if sparse:
+        world_map = generate_sparse_map(width, height, density, seed, QUEST_CELLS if quest else ())
+        locations_text, items_text = _generate_contents(world_map, items_per_location, seed, quest, 1)
+        w = World(world_map, io.StringIO(locations_text), io.StringIO(items_text))
+    else:
+        map_text, locations_text, items_text = generate_world(width, height, density, items_per_location, seed, quest)
+        w = World(io.StringIO(map_text), io.StringIO(locations_text), io.StringIO(items_text))
+    w.add_interactables_to_locations()
+    w.add_actions_to_locations()
+    return w
+
+
+def write_world(directory: str, width: int, height: int, density: float = 1.0, items_per_location: int = 0,
+                seed: int = 0, quest: bool = False, description_lines: int = 1) -> None:
+    """Write a generated world to map.txt, locations.txt and items.txt in the given directory."""
+    os.makedirs(directory, exist_ok=True)
+    texts = generate_world(width, height, density, items_per_location, seed, quest, description_lines)
+    for filename, text in zip(('map.txt', 'locations.txt', 'items.txt'), texts):
+        with open(os.path.join(directory, filename), 'w') as f:
+            f.write(text)
+
+
+if __name__ == '__main__':
+    # Usage: python world_generator.py DIRECTORY WIDTH HEIGHT [DENSITY] [ITEMS_PER_LOCATION]
+    args = sys.argv[1:]
+    write_world(args[0], int(args[1]), int(args[2]),
+                float(args[3]) if len(args) > 3 else 1.0,
+                int(args[4]) if len(args) > 4 else 0)